@@ -9,7 +9,12 @@ class LZS11(object):
         self.compressed = True
         self.outdata = bytearray()
 
-    def Decompress11LZS(self, filein):
+    def Decompress11LZS(self, filein, progress=None):
+        """
+        Decompress "filein". If "progress" is given, it's called every
+        0x2000 output bytes with the number of bytes decompressed so far
+        and the total; it may raise to abort the decompression.
+        """
         offset = 0
         # check that file is < 2GB
         #print("length of file: 0x%x" % len(filein))
@@ -30,8 +35,13 @@ class LZS11(object):
         outdata = bytearray()
         curr_size = 0
         lenFileIn = len(filein)
+        nextProgress = 0
 
         while curr_size < decomp_size and offset < lenFileIn:
+            if progress is not None and curr_size >= nextProgress:
+                progress(curr_size, decomp_size)
+                nextProgress = curr_size + 0x2000
+
             flags = filein[offset]
             offset += 1
 
@@ -98,7 +108,12 @@ class LZS11(object):
         self.curr_size = curr_size
         return outdata
 
-    def Compress11LZS(self, data):
+    def Compress11LZS(self, data, progress=None):
+        """
+        Compress "data". If "progress" is given, it's called every
+        0x2000 input bytes with the number of bytes compressed so far
+        and the total; it may raise to abort the compression.
+        """
         dcsize = len(data)
         cbuffer = bytearray()
 
@@ -119,8 +134,13 @@ class LZS11(object):
         flagrange = [7,6,5,4,3,2,1,0]
 
         CompressionSearch = self.CompressionSearch
+        nextProgress = 0
 
         while src < dcsize:
+            if progress is not None and src >= nextProgress:
+                progress(src, dcsize)
+                nextProgress = src + 0x2000
+
             flag = 0
             flagpos = dest
             cbuffer.append(flag)
@@ -4,16 +4,22 @@ import archive
 import lz77
 from QCodeEditor import QCodeEditor
 import json
+import multiprocessing
 import os, os.path
 import shutil
 import struct
 import sys
 import threading
 import time
+import traceback
 from xml.etree import ElementTree as etree
 
+from collections import Counter, OrderedDict
 from ctypes import create_string_buffer
 
+import tools.decodecache as decodecache
+import tools.texture as texture
+import tools.tileset as tilesetcodec
 from widgets.grass_widget import FlowerGrassWidget
 from widgets.prof_widget import ProfileOverrideWidget
 
@@ -90,25 +96,51 @@ def module_path():
 
 class TilesetClass():
     '''Contains Tileset data. Inits itself to a blank tileset.
-    Methods: addTile, removeTile, addObject, removeObject, clear'''
+    Methods: addTile, setBehaviours, clearBehaviours, addObject, removeObject, clearObjects, clear,
+    setObjectTile, reindexObject, getUsedTiles, getFreeTiles, getObjectsUsingTile'''
 
     class Tile():
-        def __init__(self, image, noalpha, bytelist):
+        '''A tile's images, and its 8 behaviour bytes as a view into the
+        tileset's behaviour table. byte0 to byte7 read and write the view.'''
+
+        __slots__ = ('image', 'noalpha', 'behaviour')
+
+        def __init__(self, image, noalpha, behaviour):
             '''Tile Constructor'''
 
             self.image = image
             self.noalpha = noalpha
-            self.byte0 = bytelist[0]
-            self.byte1 = bytelist[1]
-            self.byte2 = bytelist[2]
-            self.byte3 = bytelist[3]
-            self.byte4 = bytelist[4]
-            self.byte5 = bytelist[5]
-            self.byte6 = bytelist[6]
-            self.byte7 = bytelist[7]
+            self.behaviour = behaviour
+
+
+        def behaviourByte(n):
+            return property(lambda self: self.behaviour[n], lambda self, value: self.behaviour.__setitem__(n, value))
+
+        byte0 = behaviourByte(0)
+        byte1 = behaviourByte(1)
+        byte2 = behaviourByte(2)
+        byte3 = behaviourByte(3)
+        byte4 = behaviourByte(4)
+        byte5 = behaviourByte(5)
+        byte6 = behaviourByte(6)
+        byte7 = behaviourByte(7)
+
+        del behaviourByte
 
 
     class Object():
+        '''An object. Its tiles are kept in a TileGrid, which can still be
+        used like rows of (flags, tile, slot) tuples.'''
+
+        __slots__ = ('upperslope', 'lowerslope', 'height', 'width', 'tiles',
+                     'repeatX', 'repeatY', 'tilingMethodIdx', 'jsonData')
+
+        # Tables for TileGrid.mapFlags()
+        setRepeatX = tilesetcodec.byteTable(lambda flags: flags | 1)
+        clearRepeatX = tilesetcodec.byteTable(lambda flags: flags & ~1)
+        setRepeatY = tilesetcodec.byteTable(lambda flags: flags | 2)
+        clearRepeatY = tilesetcodec.byteTable(lambda flags: flags & ~2)
+        repeatXBits = tilesetcodec.byteTable(lambda flags: flags & 1)
 
         def __init__(self, height, width, uslope, lslope, tilelist):
             '''Tile Constructor'''
@@ -121,7 +153,10 @@ class TilesetClass():
             self.height = height
             self.width = width
 
-            self.tiles = tilelist
+            if isinstance(tilelist, tilesetcodec.TileGrid):
+                self.tiles = tilelist
+            else:
+                self.tiles = tilesetcodec.TileGrid(tilelist)
 
             self.determineRepetition()
 
@@ -159,21 +194,17 @@ class TilesetClass():
             #### Find X Repetition ####
             # You can have different X repetitions between rows, so we have to account for that
 
-            for y in range(self.height):
-                repeatXBn = -1
-                repeatXEd = -1
-
-                for x in range(len(self.tiles[y])):
-                    if self.tiles[y][x][0] & 1 and repeatXBn == -1:
-                        repeatXBn = x
+            flags = self.tiles.flags
 
-                    elif not self.tiles[y][x][0] & 1 and repeatXBn != -1:
-                        repeatXEd = x
-                        break
+            for y in range(self.height):
+                start, end = self.tiles.rowRange(y)
+                repeating = flags[start:end].tobytes().translate(self.repeatXBits)
 
+                repeatXBn = repeating.find(1)
                 if repeatXBn != -1:
+                    repeatXEd = repeating.find(0, repeatXBn)
                     if repeatXEd == -1:
-                        repeatXEd = len(self.tiles[y])
+                        repeatXEd = end - start
 
                     self.repeatX.append((y, repeatXBn, repeatXEd))
 
@@ -183,7 +214,8 @@ class TilesetClass():
             repeatYEd = -1
 
             for y in range(self.height):
-                if len(self.tiles[y]) and self.tiles[y][0][0] & 2:
+                start, end = self.tiles.rowRange(y)
+                if end > start and flags[start] & 2:
                     if repeatYBn == -1:
                         repeatYBn = y
 
@@ -221,62 +253,51 @@ class TilesetClass():
 
 
         def fillMissingTiles(self):
-            realH = len(self.tiles)
-            while realH > self.height:
-                del self.tiles[-1]
-                realH -= 1
-
-            for row in self.tiles:
-                realW = len(row)
-                while realW > self.width:
-                    del row[-1]
-                    realW -= 1
-
-            for row in self.tiles:
-                realW = len(row)
-                while realW < self.width:
-                    row.append((0, 0, 0))
-                    realW += 1
+            self.tiles.resize(self.width, self.height)
 
-            while realH < self.height:
-                self.tiles.append([(0, 0, 0) for _ in range(self.width)])
-                realH += 1
+            # The padding is made of tile 0, so the tile usage index and
+            # the thumbnail are out of date if the object is in the tileset
+            if Tileset is not None and self in Tileset.objectTileCounts:
+                Tileset.reindexObject(self)
+                ObjectThumbnails.invalidate(self)
 
 
         def createRepetitionX(self):
             self.repeatX = []
 
-            for y in range(self.height):
-                for x in range(len(self.tiles[y])):
-                    self.tiles[y][x] = (self.tiles[y][x][0] | 1, self.tiles[y][x][1], self.tiles[y][x][2])
+            self.tiles.mapFlags(self.setRepeatX, 0, self.height)
 
+            for y in range(self.height):
                 self.repeatX.append([0, len(self.tiles[y])])
 
 
         def createRepetitionY(self, y1, y2):
             self.clearRepetitionY()
 
-            for y in range(y1, y2):
-                for x in range(len(self.tiles[y])):
-                    self.tiles[y][x] = (self.tiles[y][x][0] | 2, self.tiles[y][x][1], self.tiles[y][x][2])
+            self.tiles.mapFlags(self.setRepeatY, y1, y2)
 
             self.repeatY = [y1, y2]
 
 
+        def setRepetitionX(self, y, start, end):
+            '''Makes tiles start to end of row y repeat, and the rest not'''
+
+            self.repeatX[y] = [start, end]
+
+            self.tiles.mapFlags(self.clearRepeatX, y, y + 1)
+            self.tiles.mapFlags(self.setRepeatX, y, y + 1, start, end)
+
+
         def clearRepetitionX(self):
             self.fillMissingTiles()
 
-            for y in range(self.height):
-                for x in range(self.width):
-                    self.tiles[y][x] = (self.tiles[y][x][0] & ~1, self.tiles[y][x][1], self.tiles[y][x][2])
+            self.tiles.mapFlags(self.clearRepeatX, 0, self.height)
 
             self.repeatX = []
 
 
         def clearRepetitionY(self):
-            for y in range(self.height):
-                for x in range(len(self.tiles[y])):
-                    self.tiles[y][x] = (self.tiles[y][x][0] & ~2, self.tiles[y][x][1], self.tiles[y][x][2])
+            self.tiles.mapFlags(self.clearRepeatY, 0, self.height)
 
             self.repeatY = []
 
@@ -321,29 +342,151 @@ class TilesetClass():
         self.animTilesBin = 0
         self.randTilesBin = 0
 
+        # The behaviours of all tiles, 8 bytes each. Tiles keep views into
+        # this, so it's only ever changed in place.
+        self.behaviours = bytearray(tilesetcodec.BEHAVIOURS_SIZE)
+        self.behaviourView = memoryview(self.behaviours)
+
         self.slot = 0
         self.placeNullChecked = False
 
+        self.clearTileIndex()
 
-    def addTile(self, image, noalpha, bytelist = (0, 0, 0, 0, 0, 0, 0, 0)):
+
+    def addTile(self, image, noalpha, bytelist = None):
         '''Adds an tile class to the tile list with the passed image or parameters'''
 
-        self.tiles.append(self.Tile(image, noalpha, bytelist))
+        offset = len(self.tiles) * tilesetcodec.BEHAVIOUR_SIZE
+        behaviour = self.behaviourView[offset : offset + tilesetcodec.BEHAVIOUR_SIZE]
+        if bytelist is not None:
+            behaviour[:] = bytes(bytelist)
+
+        self.tiles.append(self.Tile(image, noalpha, behaviour))
+
+
+    def setBehaviours(self, data):
+        '''Replaces the behaviours of all tiles with a 2048-byte buffer'''
+
+        self.behaviourView[:] = data
+
+
+    def clearBehaviours(self):
+        '''Resets the behaviours of all tiles to zero'''
+
+        self.behaviourView[:] = bytes(len(self.behaviours))
+
+
+    def clearTileIndex(self):
+        '''Resets the tile usage index. It keeps, for every slot and tile, how often
+        objects use the tile and which objects do, so that the queries below
+        don't have to go through all the objects.'''
+
+        self.tileRefs = [[0] * 256 for _ in range(4)]
+        self.tileUsers = {}
+        self.objectTileCounts = {}
+
+        # Tiles used from any slot, and tiles used from slots other than Pa0
+        self.usedTiles = set()
+        self.usedSlottedTiles = set()
+
+
+    def addTileRefs(self, object, key, delta):
+        '''Adds delta uses of the (slot, tile) key by object to the index'''
+
+        slot, tile = key
+
+        self.tileRefs[slot][tile] += delta
+
+        users = self.tileUsers.setdefault(key, {})
+        count = users.get(object, 0) + delta
+        if count:
+            users[object] = count
+        else:
+            del users[object]
+
+        refs = self.tileRefs
+        if refs[1][tile] or refs[2][tile] or refs[3][tile]:
+            self.usedSlottedTiles.add(tile)
+            self.usedTiles.add(tile)
+        else:
+            self.usedSlottedTiles.discard(tile)
+            if refs[0][tile]:
+                self.usedTiles.add(tile)
+            else:
+                self.usedTiles.discard(tile)
+
+
+    def reindexObject(self, object):
+        '''Updates the tile usage index after rows or columns of the object
+        were added or removed, or its tiles were changed directly'''
+
+        counts = Counter((tile[2] & 3, tile[1]) for row in object.tiles for tile in row)
+        old = self.objectTileCounts.get(object, Counter())
+
+        for key in counts.keys() | old.keys():
+            delta = counts[key] - old[key]
+            if delta:
+                self.addTileRefs(object, key, delta)
+
+        self.objectTileCounts[object] = counts
+
+
+    def unindexObject(self, object):
+        '''Removes all uses of tiles by object from the tile usage index'''
+
+        for key, count in self.objectTileCounts.pop(object, {}).items():
+            self.addTileRefs(object, key, -count)
+
+
+    def setObjectTile(self, object, y, x, tile):
+        '''Sets one tile of an object and updates the tile usage index.
+        Raises IndexError like object.tiles[y][x] would.'''
+
+        row = object.tiles[y]
+        old = row[x]
+        row[x] = tile
+
+        oldKey = (old[2] & 3, old[1])
+        newKey = (tile[2] & 3, tile[1])
+        if oldKey == newKey:
+            return
+
+        counts = self.objectTileCounts[object]
+        counts[oldKey] -= 1
+        if not counts[oldKey]:
+            del counts[oldKey]
+        counts[newKey] += 1
+
+        self.addTileRefs(object, oldKey, -1)
+        self.addTileRefs(object, newKey, 1)
 
 
     def getUsedTiles(self):
-        usedTiles = []
+        '''Returns the set of tiles used by objects. In slots other than Pa0,
+        uses of Pa0 tiles (which belong to another tileset) don't count.
+        The set is live; don't modify it.'''
 
-        for object in self.objects:
-            for i in range(len(object.tiles)):
-                for tile in object.tiles[i]:
-                    if not tile[2] & 3 and Tileset.slot:  # Pa0 tile 0 used in another slot, don't count it
-                        continue
+        if self.slot:
+            return self.usedSlottedTiles
+
+        return self.usedTiles
+
+
+    def getFreeTiles(self):
+        '''Returns the tiles not used by any object, in order'''
 
-                    if tile[1] not in usedTiles:
-                        usedTiles.append(tile[1])
+        usedTiles = self.getUsedTiles()
+        return [tile for tile in range(256) if tile not in usedTiles]
 
-        return usedTiles
+
+    def getObjectsUsingTile(self, tile, slot = None):
+        '''Returns a dict of the objects using the tile from the given slot
+        (default: this tileset's slot), to how many times they use it'''
+
+        if slot is None:
+            slot = self.slot
+
+        return self.tileUsers.get((slot, tile), {})
 
 
     def addObject(self, height = 1, width = 1,  uslope = [0, 0], lslope = [0, 0], tilelist = None, new = False):
@@ -354,13 +497,22 @@ class TilesetClass():
         if new:
             tilelist = [[(0, 0, Tileset.slot)]]
 
-        self.objects.append(self.Object(height, width, uslope, lslope, tilelist))
+        object = self.Object(height, width, uslope, lslope, tilelist)
+        self.objects.append(object)
+        self.reindexObject(object)
 
 
     def removeObject(self, index):
         '''Removes an Object by Index number. Don't use this much, because we want objects to preserve their ID.'''
 
-        self.objects.pop(index)
+        self.unindexObject(self.objects.pop(index))
+
+
+    def clearObjects(self):
+        '''Removes all objects'''
+
+        self.objects = []
+        self.clearTileIndex()
 
 
     def clear(self):
@@ -373,6 +525,9 @@ class TilesetClass():
         self.animTilesBin = 0
         self.randTilesBin = 0
 
+        self.clearBehaviours()
+        self.clearTileIndex()
+
 
 #############################################################################################
 ###################################### AnimTiles Class ######################################
@@ -890,6 +1045,8 @@ class InfoBox(QtWidgets.QWidget):
         self.hexdata.setFont(Font)
         self.numInfo = QtWidgets.QLabel('Slot: 0 Row: 0 Column: 0')
         self.numInfo.setFont(Font)
+        self.usageInfo = QtWidgets.QLabel('Not used by any object')
+        self.usageInfo.setFont(Font)
 
         coreLayout = QtWidgets.QVBoxLayout()
         terrLayout = QtWidgets.QVBoxLayout()
@@ -940,9 +1097,10 @@ class InfoBox(QtWidgets.QWidget):
         superLayout.addWidget(self.propertyBox, 0, 0, 1, 2)
         superLayout.addWidget(self.hexdata, 1, 0, 1, 4, Qt.AlignCenter)
         superLayout.addWidget(self.numInfo, 2, 0, 1, 4, Qt.AlignCenter)
-        superLayout.addWidget(self.collisionOverlay, 3, 0, 1, 1)
-        superLayout.addWidget(self.toggleAlpha, 3, 1, 1, 2, Qt.AlignCenter)
-        superLayout.addWidget(self.screenshotButton, 3, 3, 1, 1, Qt.AlignRight)
+        superLayout.addWidget(self.usageInfo, 3, 0, 1, 4, Qt.AlignCenter)
+        superLayout.addWidget(self.collisionOverlay, 4, 0, 1, 1)
+        superLayout.addWidget(self.toggleAlpha, 4, 1, 1, 2, Qt.AlignCenter)
+        superLayout.addWidget(self.screenshotButton, 4, 3, 1, 1, Qt.AlignRight)
         self.setLayout(superLayout)
 
 
@@ -980,106 +1138,182 @@ def getFramesheetGridSize():
 
 
 
-def SetupFramesheetModel(self, animdata):
-    global Tileset
-    self.framesheetList.setHeight()
-    self.framesheetmodel.clear()
-    self.frames = {}
-    frames = []
+class FramesheetCache():
+    '''Decodes framesheets from Tileset.animdata the first time they are
+    needed and keeps the resulting pixmaps in a size-bounded LRU.'''
 
-    count = 0
-    for key in list(animdata.keys()):
-        height = len(animdata[key])//64
+    MaxBytes = 64 * 1024 * 1024
 
-        image = QtGui.QImage(32, height, QtGui.QImage.Format_ARGB32)
-        frame = QtGui.QImage(32, 32, QtGui.QImage.Format_ARGB32)
+    def __init__(self):
+        self.pixmaps = OrderedDict()    # (key, frame index or None for the sheet) -> QPixmap
+        self.size = 0
 
-        bytes = animdata[key]
-        bits = ''.join(format(byte, '08b') for byte in bytes)
 
-        Xoffset = 0
-        Yoffset = 0
-        XBlock = 0
-        YBlock = 0
+    def frameCount(self, key):
+        return len(Tileset.animdata[key]) // 2048
 
-        frames = []
 
-        for i in range(0, len(bits), 16):
-            color = RGB4A3LUT[int(bits[i:i+16], 2)]
+    def sheet(self, key):
+        pixmap = self.get((key, None))
 
-            image.setPixel(Xoffset+XBlock, Yoffset+YBlock, color)
-            frame.setPixel(Xoffset+XBlock, (Yoffset+YBlock)%32, color)
+        if pixmap is None:
+            buffer, height = self.decode(key)
+            image = QtGui.QImage(buffer, 32, height, QtGui.QImage.Format_ARGB32)
+            pixmap = self.put((key, None), QtGui.QPixmap.fromImage(image))
 
-            XBlock += 1
-            if XBlock >= 4:
-                XBlock = 0
-                YBlock += 1
-                if YBlock >= 4:
-                    YBlock = 0
-                    Xoffset += 4
-                    if Xoffset >= 32:
-                        Xoffset = 0
-                        Yoffset += 4
-                        if (Yoffset+YBlock)%32 == 0 and not (Yoffset+YBlock) == 0:
-                            frames.append(QtGui.QPixmap.fromImage(frame))
-                            frame = QtGui.QImage(32, 32, QtGui.QImage.Format_ARGB32)
+        return pixmap
 
-        self.frames[key] = frames
 
-        tex = QtGui.QPixmap.fromImage(image)
+    def frame(self, key, index):
+        pixmap = self.get((key, index))
 
-        #fn = QtWidgets.QFileDialog.getSaveFileName(self, 'Choose a new filename', '', '.png (*.png)')[0]
-        #tex.save(fn)
+        if pixmap is None:
+            buffer, height = self.decode(key, index)
+            image = QtGui.QImage(buffer, 32, 32, QtGui.QImage.Format_ARGB32)
+            pixmap = self.put((key, index), QtGui.QPixmap.fromImage(image))
 
+        return pixmap
 
-        item = QtGui.QStandardItem(QtGui.QIcon(tex), '{0}'.format(key[7:-4]))
-        item.setEditable(False)
-        self.framesheetmodel.appendRow(item)
 
-        count += 1
+    def frames(self, key):
+        count = self.frameCount(key)
+        frames = [self.get((key, i)) for i in range(count)]
 
+        if None in frames:
+            # Decode the whole sheet once and slice the missing frames
+            # out of it, rather than decoding them one by one
+            buffer, height = self.decode(key)
 
-def RGB4A3FramesheetEncode(tex):
-    shorts = []
-    colorCache = {}
+            for i in range(count):
+                if frames[i] is None:
+                    image = QtGui.QImage(buffer[i*4096:(i+1)*4096], 32, 32, QtGui.QImage.Format_ARGB32)
+                    frames[i] = self.put((key, i), QtGui.QPixmap.fromImage(image))
 
-    for Yoffset in range(0, tex.height(), 4):
-        for Xoffset in range(0,32,4):
-            for ypixel in range(Yoffset, Yoffset + 4):
-                for xpixel in range(Xoffset, Xoffset + 4):
+        return frames
 
-                    pixel = tex.pixel(xpixel, ypixel)
 
-                    a = pixel >> 24
-                    r = (pixel >> 16) & 0xFF
-                    g = (pixel >> 8) & 0xFF
-                    b = pixel & 0xFF
+    def decode(self, key, index = None):
+        '''Decodes a whole framesheet, or a single frame of it, into an
+        ARGB32 buffer. Returns the buffer and its height.'''
 
-                    if pixel in colorCache:
-                        rgba = colorCache[pixel]
+        data = Tileset.animdata[key]
+
+        if index is None:
+            height = len(data) // 64
+            data = data[:height*64]
+        else:
+            height = 32
+            data = data[index*2048:(index+1)*2048]
+
+        argb = texture.decodeRGB4A3(data, 32, height)
+        return memoryview(argb).cast('B'), height
+
+
+    def store(self, key, image):
+        '''Seeds the cache with a framesheet that is already in memory,
+        e.g. one that was just imported from a png.'''
+
+        self.invalidate(key)
+        self.put((key, None), QtGui.QPixmap.fromImage(image))
+
+        for i in range(image.height() // 32):
+            self.put((key, i), QtGui.QPixmap.fromImage(image.copy(0, 32*i, 32, 32)))
+
+
+    def invalidate(self, key):
+        for cacheKey in [k for k in self.pixmaps if k[0] == key]:
+            self.drop(cacheKey)
+
+
+    def rename(self, oldKey, newKey):
+        for cacheKey in [k for k in self.pixmaps if k[0] == oldKey]:
+            self.pixmaps[(newKey, cacheKey[1])] = self.pixmaps.pop(cacheKey)
 
-                    else:
-                        if a < 238: # RGB4A3
-                            alpha = ((a + 18) << 1) // 73
-                            red = (r + 8) // 17
-                            green = (g + 8) // 17
-                            blue = (b + 8) // 17
 
-                            # 0aaarrrrggggbbbb
-                            rgba = blue | (green << 4) | (red << 8) | (alpha << 12)
+    def clear(self):
+        self.pixmaps.clear()
+        self.size = 0
+
+
+    def get(self, cacheKey):
+        pixmap = self.pixmaps.get(cacheKey)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(cacheKey)
+        return pixmap
+
+
+    def put(self, cacheKey, pixmap):
+        self.drop(cacheKey)
+
+        self.pixmaps[cacheKey] = pixmap
+        self.size += pixmap.width() * pixmap.height() * 4
+
+        # Evict the least recently used pixmaps, but never the one that
+        # was just added
+        while self.size > self.MaxBytes and len(self.pixmaps) > 1:
+            self.drop(next(iter(self.pixmaps)))
+
+        return pixmap
+
+
+    def drop(self, cacheKey):
+        pixmap = self.pixmaps.pop(cacheKey, None)
+        if pixmap is not None:
+            self.size -= pixmap.width() * pixmap.height() * 4
+
+
+class FramesheetIconEngine(QtGui.QIconEngine):
+    '''Icon engine for the framesheet list. The framesheet is only
+    decoded once the icon is actually painted.'''
+
+    def __init__(self, key):
+        super(FramesheetIconEngine, self).__init__()
+        self.key = key
+
+    def actualSize(self, size, mode, state):
+        native = QtCore.QSize(32, len(Tileset.animdata.get(self.key, b''))//64)
+        if native.width() <= size.width() and native.height() <= size.height():
+            return native
+        return native.scaled(size, Qt.KeepAspectRatio)
+
+    def paint(self, painter, rect, mode, state):
+        if self.key in Tileset.animdata:
+            painter.drawPixmap(rect, window.frames.sheet(self.key))
+
+    def pixmap(self, size, mode, state):
+        if self.key not in Tileset.animdata:
+            return QtGui.QPixmap()
+        return window.frames.sheet(self.key).scaled(self.actualSize(size, mode, state))
 
-                        else: # RGB555
-                            red = ((r + 4) << 2) // 33
-                            green = ((g + 4) << 2) // 33
-                            blue = ((b + 4) << 2) // 33
+    def clone(self):
+        return FramesheetIconEngine(self.key)
 
-                            # 1rrrrrgggggbbbbb
-                            rgba = blue | (green << 5) | (red << 10) | (0x8000)
 
-                        colorCache[pixel] = rgba
+def FramesheetIcon(key):
+    return QtGui.QIcon(FramesheetIconEngine(key))
 
-                    shorts.append(rgba)
-    return struct.pack('>{0}H'.format(len(shorts)), *shorts)
+
+def SetupFramesheetModel(self, animdata):
+    global Tileset
+    self.framesheetList.setHeight()
+    self.framesheetmodel.clear()
+    self.frames.clear()
+
+    # Framesheets stay as raw texel data in Tileset.animdata; they're
+    # decoded by self.frames once they're displayed or edited.
+    for key in list(animdata.keys()):
+        item = QtGui.QStandardItem(FramesheetIcon(key), '{0}'.format(key[7:-4]))
+        item.setEditable(False)
+        self.framesheetmodel.appendRow(item)
+
+
+def RGB4A3FramesheetEncode(tex):
+    if tex.format() != QtGui.QImage.Format_ARGB32:
+        tex = tex.convertToFormat(QtGui.QImage.Format_ARGB32)
+    if tex.width() != 32:
+        tex = tex.copy(0, 0, 32, tex.height())
+
+    return texture.encodeRGB4A3(tex.constBits().asstring(32 * tex.height() * 4), 32, tex.height())
 
 
 class framesheetOverlord(QtWidgets.QWidget):
@@ -1163,14 +1397,9 @@ class framesheetOverlord(QtWidgets.QWidget):
         image = framesheet.convertToFormat(QtGui.QImage.Format_ARGB32)
         data = RGB4A3FramesheetEncode(image)
         Tileset.animdata["BG_tex/{0}.bin".format(name)] = data
+        window.frames.store("BG_tex/{0}.bin".format(name), image)
 
-        frames = []
-        for y in range(0, len(data)//2048):
-            frame = framesheet.copy(0, 32*y, 32, 32)
-            frames.append(QtGui.QPixmap.fromImage(frame))
-        window.frames["BG_tex/{0}.bin".format(name)] = frames
-
-        window.framesheetmodel.appendRow(QtGui.QStandardItem(QtGui.QIcon(QtGui.QPixmap.fromImage(framesheet)), '{0}'.format(name)))
+        window.framesheetmodel.appendRow(QtGui.QStandardItem(FramesheetIcon("BG_tex/{0}.bin".format(name)), '{0}'.format(name)))
         index = window.framesheetList.currentIndex()
         window.framesheetList.setCurrentIndex(index)
         #self.setObject(index)
@@ -1191,7 +1420,10 @@ class framesheetOverlord(QtWidgets.QWidget):
 
         name = window.framesheetmodel.itemFromIndex(index).text()
         Tileset.animdata.pop("BG_tex/{0}.bin".format(name), None)
-        window.frames.pop("BG_tex/{0}.bin".format(name), None)
+        window.frames.invalidate("BG_tex/{0}.bin".format(name))
+
+        if window.frameEditor.texname == name:
+            window.frameEditor.framePixmaps = []
 
         window.framesheetmodel.removeRow(index.row())
 
@@ -1211,7 +1443,7 @@ class framesheetOverlord(QtWidgets.QWidget):
             return
 
         name = window.framesheetmodel.itemFromIndex(index).text()
-        iconSize = window.framesheetmodel.itemFromIndex(index).icon().availableSizes()[0]
+        iconSize = QtCore.QSize(32, len(Tileset.animdata["BG_tex/{0}.bin".format(name)])//64)
         framesheet, temp = self.openFs(False)
 
         if framesheet is None: return
@@ -1226,14 +1458,9 @@ class framesheetOverlord(QtWidgets.QWidget):
         image = framesheet.convertToFormat(QtGui.QImage.Format_ARGB32);
         data = RGB4A3FramesheetEncode(image)
         Tileset.animdata["BG_tex/{0}.bin".format(name)] = data
+        window.frames.store("BG_tex/{0}.bin".format(name), image)
 
-        frames = []
-        for y in range(0, len(data)//2048):
-            frame = framesheet.copy(0, 32*y, 32, 32)
-            frames.append(frame)
-        window.frames["BG_tex/{0}.bin".format(name)] = frames
-
-        window.framesheetmodel.itemFromIndex(index).setIcon(QtGui.QIcon(QtGui.QPixmap.fromImage(framesheet)))
+        window.framesheetmodel.itemFromIndex(index).setIcon(FramesheetIcon("BG_tex/{0}.bin".format(name)))
 
         window.framesheetList.update()
         self.update()
@@ -1267,7 +1494,8 @@ class framesheetOverlord(QtWidgets.QWidget):
 
         Tileset.animdata["BG_tex/{0}.bin".format(name)] = Tileset.animdata.pop("BG_tex/{0}.bin".format(oldName))
 
-        window.frames["BG_tex/{0}.bin".format(name)] = window.frames.pop("BG_tex/{0}.bin".format(oldName))
+        window.frames.rename("BG_tex/{0}.bin".format(oldName), "BG_tex/{0}.bin".format(name))
+        window.framesheetmodel.itemFromIndex(index).setIcon(FramesheetIcon("BG_tex/{0}.bin".format(name)))
 
         window.framesheetList.update()
         self.update()
@@ -1306,6 +1534,7 @@ class frameEditorOverlord(QtWidgets.QWidget):
 
 
         self.opened = []
+        self.framePixmaps = []
 
         self.coreType = QtWidgets.QGroupBox()
         self.coreType.setTitle('Animation properties:')
@@ -1449,7 +1678,7 @@ class frameEditorOverlord(QtWidgets.QWidget):
         path = QtWidgets.QFileDialog.getSaveFileName(self, 'Framesheet', '{}_{}.png'.format(self.texname, i+1), 'Framesheet (*.png)')[0]
         if not path: return
 
-        pixmap = window.frames["BG_tex/{0}.bin".format(self.texname)][i]
+        pixmap = window.frames.frame("BG_tex/{0}.bin".format(self.texname), i)
         pixmap.save(path, "PNG")
 
 
@@ -1463,25 +1692,20 @@ class frameEditorOverlord(QtWidgets.QWidget):
 
 
         i = self.table.currentRow()
-        window.frames["BG_tex/{0}.bin".format(self.texname)][i] = QtGui.QPixmap.fromImage(frame)
-        item = window.framesheetmodel.itemFromIndex(window.framesheetList.currentIndex())
-        icon = item.icon()
-        pixmap = icon.pixmap(icon.availableSizes()[0])
-
-        painter = QtGui.QPainter(pixmap)
-        painter.setCompositionMode(QtGui.QPainter.CompositionMode_Clear)
-        painter.fillRect(0, 32*i, 32, 32, Qt.transparent)
-        painter.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
-        painter.drawImage(0, 32*i, frame)
-        painter.end()
-        del painter
+        key = "BG_tex/{0}.bin".format(self.texname)
 
-        image = pixmap.toImage().convertToFormat(QtGui.QImage.Format_ARGB32);
-        data = RGB4A3FramesheetEncode(image)
-        Tileset.animdata["BG_tex/{0}.bin".format(self.texname)] = data
-        item.setIcon(QtGui.QIcon(pixmap))
+        # Frames are stored back to back, so only the replaced frame
+        # needs to be encoded
+        image = frame.convertToFormat(QtGui.QImage.Format_ARGB32)
+        data = Tileset.animdata[key]
+        Tileset.animdata[key] = data[:i*2048] + RGB4A3FramesheetEncode(image) + data[(i+1)*2048:]
 
-        self.table.cellWidget(i, 0).setPixmap(QtGui.QPixmap.fromImage(frame))
+        pixmap = QtGui.QPixmap.fromImage(frame)
+        window.frames.invalidate(key)
+        window.frames.put((key, i), pixmap)
+        self.framePixmaps[i] = pixmap
+
+        self.table.cellWidget(i, 0).setPixmap(pixmap)
 
         window.framesheetList.update()
         self.update()
@@ -1495,14 +1719,14 @@ class frameEditorOverlord(QtWidgets.QWidget):
                 duration = 0
                 framenum = 0
                 if self.checkBox.isChecked():
-                    for i, image in reversed(list(enumerate(window.frames["BG_tex/{0}.bin".format(self.texname)]))):
+                    for i, image in reversed(list(enumerate(self.framePixmaps))):
                         self.previewLabel.setPixmap(image)
                         delay = self.table.cellWidget(i, 1).value()
                         time.sleep(delay / 60)
                         duration += delay
                         framenum += 1
                 else:
-                    for i, image in enumerate(window.frames["BG_tex/{0}.bin".format(self.texname)]):
+                    for i, image in enumerate(self.framePixmaps):
                         self.previewLabel.setPixmap(image)
                         delay = self.table.cellWidget(i, 1).value()
                         time.sleep(delay / 60)
@@ -1720,7 +1944,10 @@ class frameEditorOverlord(QtWidgets.QWidget):
         self.framenum = len(Tileset.animdata["BG_tex/{0}.bin".format(self.texname)])//2048
         self.table.setRowCount(self.framenum)
 
-        for i, image in enumerate(window.frames["BG_tex/{0}.bin".format(self.texname)]):
+        # Captured here so that the preview thread never has to decode
+        self.framePixmaps = window.frames.frames("BG_tex/{0}.bin".format(self.texname))
+
+        for i, image in enumerate(self.framePixmaps):
             self.label = QtWidgets.QLabel(self)
             self.label.setPixmap(image)
             self.label.setAlignment(Qt.AlignCenter)
@@ -1738,7 +1965,6 @@ class frameEditorOverlord(QtWidgets.QWidget):
 
 
 
-        #print(window.frames)
 
         if self.texname in frameEditorData.animations:
             self.opened = frameEditorData.animations[self.texname]
@@ -2151,6 +2377,14 @@ def addRandomizationsFromXml(dest, xml):
     dest.sections = sections
 
 
+def RandTilesXmlToBin(data):
+    '''Converts the contents of a RandTiles .xml file to RandTiles.bin'''
+    dest = RandTilesClass()
+    addRandomizationsFromXml(dest, data)
+    encodeRandTiles(dest)
+    return dest.bin
+
+
 def unique(original):
     unique = []
     [unique.append(obj) for obj in original if obj not in unique]
@@ -2549,6 +2783,14 @@ def addAnimationsFromText(dest, txt):
         dest.animations = animations
 
 
+def AnimTilesTextToBin(data):
+    '''Converts the contents of an AnimTiles .txt file to AnimTiles.bin'''
+    dest = AnimTilesClass()
+    addAnimationsFromText(dest, data.decode('utf-8'))
+    encodeAnimTiles(dest)
+    return dest.bin
+
+
 def getAllEntriesWithName(dest, name, frames, removeFromAnimations=False):
     results = []
     if removeFromAnimations:
@@ -2600,12 +2842,43 @@ def getObjectMaxSize():
     return max
 
 
-def SetupObjectModel(self, objects, tiles):
-    global Tileset
-    self.clear()
+class ObjectThumbnailCache():
+    '''Keeps the object list's thumbnail of each object in a size-bounded
+    LRU, so that the list only repaints the objects whose tiles, or the
+    images of the tiles they use, have changed.'''
+
+    MaxBytes = 32 * 1024 * 1024
+
+    def __init__(self):
+        self.pixmaps = OrderedDict()    # object -> QPixmap
+        self.size = 0
+
+
+    def get(self, object, tiles):
+        pixmap = self.pixmaps.get(object)
+
+        if pixmap is None:
+            return self.put(object, self.render(object, tiles))
+
+        self.pixmaps.move_to_end(object)
+        return pixmap
 
-    count = 0
-    for object in objects:
+
+    def put(self, object, pixmap):
+        self.invalidate(object)
+
+        self.pixmaps[object] = pixmap
+        self.size += pixmap.width() * pixmap.height() * 4
+
+        # Evict the least recently used thumbnails, but never the one that
+        # was just added
+        while self.size > self.MaxBytes and len(self.pixmaps) > 1:
+            self.invalidate(next(iter(self.pixmaps)))
+
+        return pixmap
+
+
+    def render(self, object, tiles):
         tex = QtGui.QPixmap(object.width * 24, object.height * 24)
         tex.fill(Qt.transparent)
         painter = QtGui.QPainter(tex)
@@ -2623,11 +2896,184 @@ def SetupObjectModel(self, objects, tiles):
 
         painter.end()
 
-        item = QtGui.QStandardItem(QtGui.QIcon(tex), 'Object {0}'.format(count))
-        item.setEditable(False)
-        self.appendRow(item)
+        return tex
+
+
+    def invalidate(self, object):
+        pixmap = self.pixmaps.pop(object, None)
+        if pixmap is not None:
+            self.size -= pixmap.width() * pixmap.height() * 4
+
+
+    def invalidateTiles(self, tiles):
+        '''Drops the thumbnails of all objects that draw any of the tiles'''
+
+        for tile in tiles:
+            for object in Tileset.getObjectsUsingTile(tile):
+                self.invalidate(object)
+
+
+    def prune(self, objects):
+        '''Drops the thumbnails of objects that are gone'''
+
+        for object in self.pixmaps.keys() - set(objects):
+            self.invalidate(object)
+
+
+    def clear(self):
+        self.pixmaps.clear()
+        self.size = 0
+
+
+ObjectThumbnails = ObjectThumbnailCache()
+
+
+class ObjectIconEngine(QtGui.QIconEngine):
+    '''Icon engine for the object list. The thumbnail is only rendered
+    once the icon is actually painted, and painting it prefetches the
+    thumbnails of the rows around it.'''
+
+    def __init__(self, object, row):
+        super(ObjectIconEngine, self).__init__()
+        self.object = object
+        self.row = row
+
+    def actualSize(self, size, mode, state):
+        native = QtCore.QSize(self.object.width * 24, self.object.height * 24)
+        if native.width() <= size.width() and native.height() <= size.height():
+            return native
+        return native.scaled(size, Qt.KeepAspectRatio)
+
+    def paint(self, painter, rect, mode, state):
+        painter.drawPixmap(rect, ObjectThumbnails.get(self.object, Tileset.tiles))
+        window.objmodel.prefetchAround(self.row)
+
+    def pixmap(self, size, mode, state):
+        return ObjectThumbnails.get(self.object, Tileset.tiles).scaled(self.actualSize(size, mode, state))
+
+    def clone(self):
+        return ObjectIconEngine(self.object, self.row)
+
+
+class ObjectListModel(QtCore.QAbstractListModel):
+    '''Model for the object list. Rows are Tileset.objects, and their
+    thumbnails are rendered lazily by ObjectIconEngine, so opening a
+    tileset doesn't paint objects that are never scrolled into view.
+    Call refresh() after changing Tileset.objects.'''
+
+    PrefetchDistance = 8
+
+    def __init__(self, parent=None):
+        super(ObjectListModel, self).__init__(parent)
+
+        self.count = 0
+        self.pending = set()
+
+        # Renders one prefetched thumbnail per event loop pass, so that
+        # prefetching never holds up the UI
+        self.prefetchTimer = QtCore.QTimer(self)
+        self.prefetchTimer.setInterval(0)
+        self.prefetchTimer.timeout.connect(self.prefetchNext)
+
+
+    def rowCount(self, parent = QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+
+    def data(self, index, role = Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(Tileset.objects):
+            return None
+
+        if role == Qt.DisplayRole:
+            return 'Object {0}'.format(index.row())
+
+        if role == Qt.DecorationRole:
+            return QtGui.QIcon(ObjectIconEngine(Tileset.objects[index.row()], index.row()))
+
+        return None
+
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
 
-        count += 1
+    def refresh(self):
+        '''Brings the rows up to date with Tileset.objects. Rows are
+        added or removed at the end and the rest are updated in place;
+        cached thumbnails are kept.'''
+
+        count = len(Tileset.objects)
+        ObjectThumbnails.prune(Tileset.objects)
+
+        if count > self.count:
+            self.beginInsertRows(QtCore.QModelIndex(), self.count, count - 1)
+            self.count = count
+            self.endInsertRows()
+
+        elif count < self.count:
+            self.beginRemoveRows(QtCore.QModelIndex(), count, self.count - 1)
+            self.count = count
+            self.endRemoveRows()
+
+        if count:
+            self.dataChanged.emit(self.index(0), self.index(count - 1), [Qt.DisplayRole, Qt.DecorationRole])
+
+
+    def removeObjectRow(self, row):
+        '''Removes the row of an object that was just removed from
+        Tileset.objects.'''
+
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        self.count -= 1
+        self.endRemoveRows()
+
+        self.refresh()
+
+
+    def objectChanged(self, row):
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+    def prefetchAround(self, row):
+        first = max(row - self.PrefetchDistance, 0)
+        last = min(row + self.PrefetchDistance, self.count - 1)
+
+        self.pending.update(range(first, last + 1))
+
+        if not self.prefetchTimer.isActive():
+            self.prefetchTimer.start()
+
+
+    def prefetchNext(self):
+        while self.pending:
+            row = self.pending.pop()
+
+            if row < len(Tileset.objects) and Tileset.objects[row] not in ObjectThumbnails.pixmaps:
+                ObjectThumbnails.get(Tileset.objects[row], Tileset.tiles)
+                return
+
+        self.prefetchTimer.stop()
+
+
+#############################################################################################
+############################ Collision overlay icons for the palette ########################
+
+
+OverlayPixmaps = {}
+
+
+def OverlayPixmap(name):
+    '''Returns a collision overlay icon from the Icons folder. Each one
+    is only read from disk the first time it's drawn.'''
+    pixmap = OverlayPixmaps.get(name)
+    if pixmap is None:
+        pixmap = QtGui.QPixmap(os.path.dirname(os.path.abspath(sys.argv[0])) + '/Icons/' + name)
+        OverlayPixmaps[name] = pixmap
+
+    return pixmap
 
 
 #############################################################################################
@@ -2639,6 +3085,9 @@ class displayWidget(QtWidgets.QListView):
     mouseMoved = QtCoreSignal(int, int)
     rightClicked = QtCoreSignal(int, int)
 
+    # Milliseconds between repaints of changed tiles, about one frame
+    RepaintInterval = 16
+
     def __init__(self, parent=None):
         super(displayWidget, self).__init__(parent)
 
@@ -2662,6 +3111,30 @@ class displayWidget(QtWidgets.QListView):
 
         self.setItemDelegate(self.TileItemDelegate())
 
+        self.dirtyRows = set()
+        self.repaintTimer = QtCore.QTimer(self)
+        self.repaintTimer.setSingleShot(True)
+        self.repaintTimer.setInterval(self.RepaintInterval)
+        self.repaintTimer.timeout.connect(self.repaintDirtyRows)
+
+
+    def tileChanged(self, row):
+        '''Schedules a repaint of one tile. Tiles changed within the same
+        frame are repainted together.'''
+        self.dirtyRows.add(row)
+        if not self.repaintTimer.isActive():
+            self.repaintTimer.start()
+
+
+    def repaintDirtyRows(self):
+        model = self.model()
+        for row in self.dirtyRows:
+            # Overlay outlines can reach a pixel into the neighbouring tiles
+            rect = self.visualRect(model.index(row, 0))
+            self.viewport().update(rect.adjusted(-1, -1, 1, 1))
+
+        self.dirtyRows.clear()
+
 
     def mouseMoveEvent(self, event):
         QtWidgets.QWidget.mouseMoveEvent(self, event)
@@ -2680,6 +3153,9 @@ class displayWidget(QtWidgets.QListView):
             """Initialises the delegate"""
             QtWidgets.QAbstractItemDelegate.__init__(self)
 
+            self.overlays = {}
+            self.overlayPen = None
+
         def paint(self, painter, option, index):
             """Paints an object"""
 
@@ -2697,404 +3173,7 @@ class displayWidget(QtWidgets.QListView):
             curTile = Tileset.tiles[index.row()]
 
             if info.collisionOverlay.isChecked():
-                path = os.path.dirname(os.path.abspath(sys.argv[0])) + '/Icons/'
-
-                # Sets the colour based on terrain type
-                if curTile.byte2 & 16:      # Red
-                    colour = QtGui.QColor(255, 0, 0, 120)
-                elif curTile.byte5 == 1:    # Ice
-                    colour = QtGui.QColor(0, 0, 255, 120)
-                elif curTile.byte5 == 2:    # Snow
-                    colour = QtGui.QColor(0, 0, 255, 120)
-                elif curTile.byte5 == 3:    # Quicksand
-                    colour = QtGui.QColor(128,64,0, 120)
-                elif curTile.byte5 == 4:    # Conveyor
-                    colour = QtGui.QColor(128,128,128, 120)
-                elif curTile.byte5 == 5:    # Conveyor
-                    colour = QtGui.QColor(128,128,128, 120)
-                elif curTile.byte5 == 6:    # Rope
-                    colour = QtGui.QColor(128,0,255, 120)
-                elif curTile.byte5 == 7:    # Half Spike
-                    colour = QtGui.QColor(128,0,255, 120)
-                elif curTile.byte5 == 8:    # Ledge
-                    colour = QtGui.QColor(128,0,255, 120)
-                elif curTile.byte5 == 9:    # Ladder
-                    colour = QtGui.QColor(128,0,255, 120)
-                elif curTile.byte5 == 10:    # Staircase
-                    colour = QtGui.QColor(255, 0, 0, 120)
-                elif curTile.byte5 == 11:    # Carpet
-                    colour = QtGui.QColor(255, 0, 0, 120)
-                elif curTile.byte5 == 12:    # Dust
-                    colour = QtGui.QColor(128,64,0, 120)
-                elif curTile.byte5 == 13:    # Grass
-                    colour = QtGui.QColor(0, 255, 0, 120)
-                elif curTile.byte5 == 14:    # Unknown
-                    colour = QtGui.QColor(255, 0, 0, 120)
-                elif curTile.byte5 == 15:    # Beach Sand
-                    colour = QtGui.QColor(128, 64, 0, 120)
-                else:                       # Brown?
-                    colour = QtGui.QColor(64, 30, 0, 120)
-
-
-                # Sets Brush style for fills
-                if curTile.byte2 & 4:        # Climbing Grid
-                    style = Qt.DiagCrossPattern
-                elif curTile.byte3 & 16:     # Breakable
-                    style = Qt.VerPattern
-                else:
-                    style = Qt.SolidPattern
-
-
-                brush = QtGui.QBrush(colour, style)
-                painter.setBrush(brush)
-                painter.setRenderHint(QtGui.QPainter.Antialiasing)
-
-
-                # Paints shape based on other junk
-                if curTile.byte3 & 32: # Slope
-                    if curTile.byte7 == 0:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y)]))
-                    elif curTile.byte7 == 1:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 2:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 12)]))
-                    elif curTile.byte7 == 3:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 24)]))
-                    elif curTile.byte7 == 4:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 24)]))
-                    elif curTile.byte7 == 5:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 10:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y)]))
-                    elif curTile.byte7 == 11:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 18),
-                                                            QtCore.QPoint(x + 24, y + 24)]))
-                    elif curTile.byte7 == 12:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x, y + 18),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 13:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 6),
-                                                            QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 14:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x, y + 6),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 15:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 6),
-                                                            QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 16:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x, y + 6),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 17:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 18),
-                                                            QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 18:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x, y + 18),
-                                                            QtCore.QPoint(x, y + 24)]))
-
-                elif curTile.byte3 & 64: # Reverse Slope
-                    if curTile.byte7 == 0:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y)]))
-                    elif curTile.byte7 == 1:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y)]))
-                    elif curTile.byte7 == 2:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y + 12)]))
-                    elif curTile.byte7 == 3:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y)]))
-                    elif curTile.byte7 == 4:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 12)]))
-                    elif curTile.byte7 == 5:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y)]))
-                    elif curTile.byte7 == 10:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y)]))
-                    elif curTile.byte7 == 11:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 6)]))
-                    elif curTile.byte7 == 12:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x, y + 6)]))
-                    elif curTile.byte7 == 13:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 18),
-                                                            QtCore.QPoint(x, y + 12)]))
-                    elif curTile.byte7 == 14:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x, y + 18)]))
-                    elif curTile.byte7 == 15:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 18),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 16:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x, y + 18)]))
-                    elif curTile.byte7 == 17:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 6),
-                                                            QtCore.QPoint(x, y + 12)]))
-                    elif curTile.byte7 == 18:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x, y + 6)]))
-
-                elif curTile.byte2 & 8: # Partial
-                    if curTile.byte7 == 1:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 12, y),
-                                                            QtCore.QPoint(x + 12, y + 12),
-                                                            QtCore.QPoint(x, y + 12)]))
-                    elif curTile.byte7 == 2:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x + 12, y + 12)]))
-                    elif curTile.byte7 == 3:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x, y + 12)]))
-                    elif curTile.byte7 == 4:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x + 12, y + 12),
-                                                            QtCore.QPoint(x + 12, y + 24),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 5:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 12, y),
-                                                            QtCore.QPoint(x + 12, y + 24),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 6:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x + 12, y + 24),
-                                                            QtCore.QPoint(x + 12, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x, y + 12)]))
-                    elif curTile.byte7 == 7:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x + 12, y + 12),
-                                                            QtCore.QPoint(x + 12, y + 24),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 8:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 12, y + 24)]))
-                    elif curTile.byte7 == 9:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x + 12, y + 24),
-                                                            QtCore.QPoint(x + 12, y)]))
-                    elif curTile.byte7 == 10:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 12, y + 24)]))
-                    elif curTile.byte7 == 11:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 12, y + 24),
-                                                            QtCore.QPoint(x + 12, y + 12),
-                                                            QtCore.QPoint(x, y + 12)]))
-                    elif curTile.byte7 == 12:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 13:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 12, y),
-                                                            QtCore.QPoint(x + 12, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 14:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 12, y),
-                                                            QtCore.QPoint(x + 12, y + 12),
-                                                            QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x, y + 24)]))
-                    elif curTile.byte7 == 15:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x, y + 24)]))
-
-                elif curTile.byte2 & 0x40: # Solid-on-bottom
-                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                        QtCore.QPoint(x + 24, y + 24),
-                                                        QtCore.QPoint(x + 24, y + 18),
-                                                        QtCore.QPoint(x, y + 18)]))
-
-                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 15, y),
-                                                        QtCore.QPoint(x + 15, y + 12),
-                                                        QtCore.QPoint(x + 18, y + 12),
-                                                        QtCore.QPoint(x + 12, y + 17),
-                                                        QtCore.QPoint(x + 6, y + 12),
-                                                        QtCore.QPoint(x + 9, y + 12),
-                                                        QtCore.QPoint(x + 9, y)]))
-
-                elif curTile.byte2 & 0x80: # Solid-on-top
-                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                        QtCore.QPoint(x + 24, y),
-                                                        QtCore.QPoint(x + 24, y + 6),
-                                                        QtCore.QPoint(x, y + 6)]))
-
-                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 15, y + 24),
-                                                        QtCore.QPoint(x + 15, y + 12),
-                                                        QtCore.QPoint(x + 18, y + 12),
-                                                        QtCore.QPoint(x + 12, y + 7),
-                                                        QtCore.QPoint(x + 6, y + 12),
-                                                        QtCore.QPoint(x + 9, y + 12),
-                                                        QtCore.QPoint(x + 9, y + 24)]))
-
-                elif curTile.byte2 & 16: # Spikes
-                    if curTile.byte7 == 0:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x, y + 6)]))
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x, y + 18)]))
-                    if curTile.byte7 == 1:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x + 24, y + 6)]))
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
-                                                            QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 18)]))
-                    if curTile.byte7 == 2:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
-                                                            QtCore.QPoint(x + 12, y + 24),
-                                                            QtCore.QPoint(x + 6, y)]))
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y + 24),
-                                                            QtCore.QPoint(x + 24, y + 24),
-                                                            QtCore.QPoint(x + 18, y)]))
-                    if curTile.byte7 == 3:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 12, y),
-                                                            QtCore.QPoint(x + 6, y + 24)]))
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 18, y + 24)]))
-                    if curTile.byte7 == 4:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 18, y + 24),
-                                                            QtCore.QPoint(x + 6, y + 24)]))
-                    if curTile.byte7 == 5:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 6, y),
-                                                            QtCore.QPoint(x + 18, y),
-                                                            QtCore.QPoint(x + 12, y + 24)]))
-                    if curTile.byte7 == 6:
-                        painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
-                                                            QtCore.QPoint(x + 24, y),
-                                                            QtCore.QPoint(x + 12, y + 24)]))
-
-                elif curTile.byte3 & 2: # Coin
-                    if curTile.byte7 == 0:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'Coin/Coin.png'))
-                    if curTile.byte7 == 4:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'Coin/POW.png'))
-
-                elif curTile.byte3 & 8: # Exploder
-                    if curTile.byte7 == 1:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'Explode/Stone.png'))
-                    if curTile.byte7 == 2:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'Explode/Wood.png'))
-                    if curTile.byte7 == 3:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'Explode/Red.png'))
-
-                elif curTile.byte1 & 2: # Falling
-                    painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'Prop/Fall.png'))
-
-                elif curTile.byte3 & 4: # QBlock
-                    if curTile.byte7 == 0:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'QBlock/FireF.png'))
-                    if curTile.byte7 == 1:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'QBlock/Star.png'))
-                    if curTile.byte7 == 2:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'QBlock/Coin.png'))
-                    if curTile.byte7 == 3:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'QBlock/Vine.png'))
-                    if curTile.byte7 == 4:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'QBlock/1up.png'))
-                    if curTile.byte7 == 5:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'QBlock/Mini.png'))
-                    if curTile.byte7 == 6:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'QBlock/Prop.png'))
-                    if curTile.byte7 == 7:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'QBlock/Peng.png'))
-                    if curTile.byte7 == 8:
-                        painter.drawPixmap(option.rect, QtGui.QPixmap(path + 'QBlock/IceF.png'))
-
-                elif curTile.byte3 & 1: # Solid
-                    painter.drawRect(option.rect)
-
-                else: # No fill
-                    pass
+                painter.drawPixmap(x - 1, y - 1, self.overlayPixmap(painter, curTile, x, y))
 
 
             # Highlight stuff.
@@ -3105,21 +3184,453 @@ class displayWidget(QtWidgets.QListView):
                 painter.fillRect(option.rect, colour)
 
 
-        def sizeHint(self, option, index):
-            """Returns the size for the object"""
-            return QtCore.QSize(24,24)
-
-
-
-#############################################################################################
-############################ Tile widget for drag n'drop Objects ############################
+        def overlayPixmap(self, painter, curTile, x, y):
+            """
+            Returns the collision overlay of a tile at (x, y). Overlays are
+            rendered once for each combination of the behaviour bytes they
+            depend on, with a pixel of margin for the outlines, using the
+            view's pen and lining fill patterns up with the view.
+            """
+            if painter.pen() != self.overlayPen:
+                self.overlayPen = QtGui.QPen(painter.pen())
+                self.overlays.clear()
+
+            key = (curTile.byte1 & 2, curTile.byte2, curTile.byte3, curTile.byte5, curTile.byte7, x % 8, y % 8)
+
+            pixmap = self.overlays.get(key)
+            if pixmap is None:
+                pixmap = QtGui.QPixmap(26, 26)
+                pixmap.fill(Qt.transparent)
+
+                overlayPainter = QtGui.QPainter(pixmap)
+                overlayPainter.setPen(self.overlayPen)
+                overlayPainter.setBrushOrigin((1 - x) % 8, (1 - y) % 8)
+                self.drawOverlay(overlayPainter, curTile, QtCore.QRect(1, 1, 24, 24))
+                overlayPainter.end()
+
+                self.overlays[key] = pixmap
+
+            return pixmap
+
+
+        def drawOverlay(self, painter, curTile, rect):
+            """Draws the collision overlay of a tile into rect"""
+            x = rect.x()
+            y = rect.y()
+
+            # Sets the colour based on terrain type
+            if curTile.byte2 & 16:      # Red
+                colour = QtGui.QColor(255, 0, 0, 120)
+            elif curTile.byte5 == 1:    # Ice
+                colour = QtGui.QColor(0, 0, 255, 120)
+            elif curTile.byte5 == 2:    # Snow
+                colour = QtGui.QColor(0, 0, 255, 120)
+            elif curTile.byte5 == 3:    # Quicksand
+                colour = QtGui.QColor(128,64,0, 120)
+            elif curTile.byte5 == 4:    # Conveyor
+                colour = QtGui.QColor(128,128,128, 120)
+            elif curTile.byte5 == 5:    # Conveyor
+                colour = QtGui.QColor(128,128,128, 120)
+            elif curTile.byte5 == 6:    # Rope
+                colour = QtGui.QColor(128,0,255, 120)
+            elif curTile.byte5 == 7:    # Half Spike
+                colour = QtGui.QColor(128,0,255, 120)
+            elif curTile.byte5 == 8:    # Ledge
+                colour = QtGui.QColor(128,0,255, 120)
+            elif curTile.byte5 == 9:    # Ladder
+                colour = QtGui.QColor(128,0,255, 120)
+            elif curTile.byte5 == 10:    # Staircase
+                colour = QtGui.QColor(255, 0, 0, 120)
+            elif curTile.byte5 == 11:    # Carpet
+                colour = QtGui.QColor(255, 0, 0, 120)
+            elif curTile.byte5 == 12:    # Dust
+                colour = QtGui.QColor(128,64,0, 120)
+            elif curTile.byte5 == 13:    # Grass
+                colour = QtGui.QColor(0, 255, 0, 120)
+            elif curTile.byte5 == 14:    # Unknown
+                colour = QtGui.QColor(255, 0, 0, 120)
+            elif curTile.byte5 == 15:    # Beach Sand
+                colour = QtGui.QColor(128, 64, 0, 120)
+            else:                       # Brown?
+                colour = QtGui.QColor(64, 30, 0, 120)
+
+
+            # Sets Brush style for fills
+            if curTile.byte2 & 4:        # Climbing Grid
+                style = Qt.DiagCrossPattern
+            elif curTile.byte3 & 16:     # Breakable
+                style = Qt.VerPattern
+            else:
+                style = Qt.SolidPattern
 
 
-class RepeatXModifiers(QtWidgets.QWidget):
-    def __init__(self):
-        super().__init__()
+            brush = QtGui.QBrush(colour, style)
+            painter.setBrush(brush)
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
 
-        self.setVisible(False)
+
+            # Paints shape based on other junk
+            if curTile.byte3 & 32: # Slope
+                if curTile.byte7 == 0:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y)]))
+                elif curTile.byte7 == 1:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 2:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 12)]))
+                elif curTile.byte7 == 3:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 24)]))
+                elif curTile.byte7 == 4:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 24)]))
+                elif curTile.byte7 == 5:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 10:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y)]))
+                elif curTile.byte7 == 11:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 18),
+                                                        QtCore.QPoint(x + 24, y + 24)]))
+                elif curTile.byte7 == 12:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x, y + 18),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 13:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 6),
+                                                        QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 14:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x, y + 6),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 15:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 6),
+                                                        QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 16:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x, y + 6),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 17:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 18),
+                                                        QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 18:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x, y + 18),
+                                                        QtCore.QPoint(x, y + 24)]))
+
+            elif curTile.byte3 & 64: # Reverse Slope
+                if curTile.byte7 == 0:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y)]))
+                elif curTile.byte7 == 1:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y)]))
+                elif curTile.byte7 == 2:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y + 12)]))
+                elif curTile.byte7 == 3:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y)]))
+                elif curTile.byte7 == 4:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 12)]))
+                elif curTile.byte7 == 5:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y)]))
+                elif curTile.byte7 == 10:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y)]))
+                elif curTile.byte7 == 11:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 6)]))
+                elif curTile.byte7 == 12:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x, y + 6)]))
+                elif curTile.byte7 == 13:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 18),
+                                                        QtCore.QPoint(x, y + 12)]))
+                elif curTile.byte7 == 14:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x, y + 18)]))
+                elif curTile.byte7 == 15:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 18),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 16:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x, y + 18)]))
+                elif curTile.byte7 == 17:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 6),
+                                                        QtCore.QPoint(x, y + 12)]))
+                elif curTile.byte7 == 18:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x, y + 6)]))
+
+            elif curTile.byte2 & 8: # Partial
+                if curTile.byte7 == 1:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 12, y),
+                                                        QtCore.QPoint(x + 12, y + 12),
+                                                        QtCore.QPoint(x, y + 12)]))
+                elif curTile.byte7 == 2:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x + 12, y + 12)]))
+                elif curTile.byte7 == 3:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x, y + 12)]))
+                elif curTile.byte7 == 4:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x + 12, y + 12),
+                                                        QtCore.QPoint(x + 12, y + 24),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 5:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 12, y),
+                                                        QtCore.QPoint(x + 12, y + 24),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 6:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x + 12, y + 24),
+                                                        QtCore.QPoint(x + 12, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x, y + 12)]))
+                elif curTile.byte7 == 7:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x + 12, y + 12),
+                                                        QtCore.QPoint(x + 12, y + 24),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 8:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 12, y + 24)]))
+                elif curTile.byte7 == 9:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x + 12, y + 24),
+                                                        QtCore.QPoint(x + 12, y)]))
+                elif curTile.byte7 == 10:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 12, y + 24)]))
+                elif curTile.byte7 == 11:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 12, y + 24),
+                                                        QtCore.QPoint(x + 12, y + 12),
+                                                        QtCore.QPoint(x, y + 12)]))
+                elif curTile.byte7 == 12:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 13:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 12, y),
+                                                        QtCore.QPoint(x + 12, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 14:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 12, y),
+                                                        QtCore.QPoint(x + 12, y + 12),
+                                                        QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x, y + 24)]))
+                elif curTile.byte7 == 15:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x, y + 24)]))
+
+            elif curTile.byte2 & 0x40: # Solid-on-bottom
+                painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                    QtCore.QPoint(x + 24, y + 24),
+                                                    QtCore.QPoint(x + 24, y + 18),
+                                                    QtCore.QPoint(x, y + 18)]))
+
+                painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 15, y),
+                                                    QtCore.QPoint(x + 15, y + 12),
+                                                    QtCore.QPoint(x + 18, y + 12),
+                                                    QtCore.QPoint(x + 12, y + 17),
+                                                    QtCore.QPoint(x + 6, y + 12),
+                                                    QtCore.QPoint(x + 9, y + 12),
+                                                    QtCore.QPoint(x + 9, y)]))
+
+            elif curTile.byte2 & 0x80: # Solid-on-top
+                painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                    QtCore.QPoint(x + 24, y),
+                                                    QtCore.QPoint(x + 24, y + 6),
+                                                    QtCore.QPoint(x, y + 6)]))
+
+                painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 15, y + 24),
+                                                    QtCore.QPoint(x + 15, y + 12),
+                                                    QtCore.QPoint(x + 18, y + 12),
+                                                    QtCore.QPoint(x + 12, y + 7),
+                                                    QtCore.QPoint(x + 6, y + 12),
+                                                    QtCore.QPoint(x + 9, y + 12),
+                                                    QtCore.QPoint(x + 9, y + 24)]))
+
+            elif curTile.byte2 & 16: # Spikes
+                if curTile.byte7 == 0:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x, y + 6)]))
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 24, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x, y + 18)]))
+                if curTile.byte7 == 1:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x + 24, y + 6)]))
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 12),
+                                                        QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 18)]))
+                if curTile.byte7 == 2:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y + 24),
+                                                        QtCore.QPoint(x + 12, y + 24),
+                                                        QtCore.QPoint(x + 6, y)]))
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y + 24),
+                                                        QtCore.QPoint(x + 24, y + 24),
+                                                        QtCore.QPoint(x + 18, y)]))
+                if curTile.byte7 == 3:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 12, y),
+                                                        QtCore.QPoint(x + 6, y + 24)]))
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 12, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 18, y + 24)]))
+                if curTile.byte7 == 4:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 18, y + 24),
+                                                        QtCore.QPoint(x + 6, y + 24)]))
+                if curTile.byte7 == 5:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x + 6, y),
+                                                        QtCore.QPoint(x + 18, y),
+                                                        QtCore.QPoint(x + 12, y + 24)]))
+                if curTile.byte7 == 6:
+                    painter.drawPolygon(QtGui.QPolygon([QtCore.QPoint(x, y),
+                                                        QtCore.QPoint(x + 24, y),
+                                                        QtCore.QPoint(x + 12, y + 24)]))
+
+            elif curTile.byte3 & 2: # Coin
+                if curTile.byte7 == 0:
+                    painter.drawPixmap(rect, OverlayPixmap('Coin/Coin.png'))
+                if curTile.byte7 == 4:
+                    painter.drawPixmap(rect, OverlayPixmap('Coin/POW.png'))
+
+            elif curTile.byte3 & 8: # Exploder
+                if curTile.byte7 == 1:
+                    painter.drawPixmap(rect, OverlayPixmap('Explode/Stone.png'))
+                if curTile.byte7 == 2:
+                    painter.drawPixmap(rect, OverlayPixmap('Explode/Wood.png'))
+                if curTile.byte7 == 3:
+                    painter.drawPixmap(rect, OverlayPixmap('Explode/Red.png'))
+
+            elif curTile.byte1 & 2: # Falling
+                painter.drawPixmap(rect, OverlayPixmap('Prop/Fall.png'))
+
+            elif curTile.byte3 & 4: # QBlock
+                if curTile.byte7 == 0:
+                    painter.drawPixmap(rect, OverlayPixmap('QBlock/FireF.png'))
+                if curTile.byte7 == 1:
+                    painter.drawPixmap(rect, OverlayPixmap('QBlock/Star.png'))
+                if curTile.byte7 == 2:
+                    painter.drawPixmap(rect, OverlayPixmap('QBlock/Coin.png'))
+                if curTile.byte7 == 3:
+                    painter.drawPixmap(rect, OverlayPixmap('QBlock/Vine.png'))
+                if curTile.byte7 == 4:
+                    painter.drawPixmap(rect, OverlayPixmap('QBlock/1up.png'))
+                if curTile.byte7 == 5:
+                    painter.drawPixmap(rect, OverlayPixmap('QBlock/Mini.png'))
+                if curTile.byte7 == 6:
+                    painter.drawPixmap(rect, OverlayPixmap('QBlock/Prop.png'))
+                if curTile.byte7 == 7:
+                    painter.drawPixmap(rect, OverlayPixmap('QBlock/Peng.png'))
+                if curTile.byte7 == 8:
+                    painter.drawPixmap(rect, OverlayPixmap('QBlock/IceF.png'))
+
+            elif curTile.byte3 & 1: # Solid
+                painter.drawRect(rect)
+
+            else: # No fill
+                pass
+
+
+        def sizeHint(self, option, index):
+            """Returns the size for the object"""
+            return QtCore.QSize(24,24)
+
+
+
+#############################################################################################
+############################ Tile widget for drag n'drop Objects ############################
+
+
+class RepeatXModifiers(QtWidgets.QWidget):
+    def __init__(self):
+        super().__init__()
+
+        self.setVisible(False)
 
         self.layout = QtWidgets.QVBoxLayout(self)
         self.layout.setSpacing(0)
@@ -3226,14 +3737,7 @@ class RepeatXModifiers(QtWidgets.QWidget):
             return
 
         object = Tileset.objects[index]
-        object.repeatX[y][0] = val
-
-        for x in range(len(object.tiles[y])):
-            if x >= val and x < object.repeatX[y][1]:
-                object.tiles[y][x] = (object.tiles[y][x][0] | 1, object.tiles[y][x][1], object.tiles[y][x][2])
-
-            else:
-                object.tiles[y][x] = (object.tiles[y][x][0] & ~1, object.tiles[y][x][1], object.tiles[y][x][2])
+        object.setRepetitionX(y, val, object.repeatX[y][1])
 
         spinbox1, spinbox2 = self.spinboxes[y]
         spinbox1.setRange(0, object.repeatX[y][1]-1)
@@ -3253,14 +3757,7 @@ class RepeatXModifiers(QtWidgets.QWidget):
             return
 
         object = Tileset.objects[index]
-        object.repeatX[y][1] = val
-
-        for x in range(len(object.tiles[y])):
-            if x >= object.repeatX[y][0] and x < val:
-                object.tiles[y][x] = (object.tiles[y][x][0] | 1, object.tiles[y][x][1], object.tiles[y][x][2])
-
-            else:
-                object.tiles[y][x] = (object.tiles[y][x][0] & ~1, object.tiles[y][x][1], object.tiles[y][x][2])
+        object.setRepetitionX(y, object.repeatX[y][0], val)
 
         spinbox1, spinbox2 = self.spinboxes[y]
         spinbox1.setRange(0, val-1)
@@ -3291,6 +3788,8 @@ class RepeatXModifiers(QtWidgets.QWidget):
         else:
             object.tiles[y].append((0, 0, 0))
 
+        Tileset.reindexObject(object)
+
         object.width = max(len(object.tiles[y]), object.width)
 
         self.update()
@@ -3329,18 +3828,14 @@ class RepeatXModifiers(QtWidgets.QWidget):
         else:
             return
 
+        Tileset.reindexObject(object)
+
         start, end = object.repeatX[y]
         end = min(end, len(row))
         start = min(start, end - 1)
 
         if [start, end] != object.repeatX[y]:
-            object.repeatX[y] = [start, end]
-            for x in range(len(row)):
-                if x >= start and x < end:
-                    row[x] = (row[x][0] | 1, row[x][1], row[x][2])
-
-                else:
-                    row[x] = (row[x][0] & ~1, row[x][1], row[x][2])
+            object.setRepetitionX(y, start, end)
 
         object.width = max(len(row) for row in object.tiles)
 
@@ -3618,18 +4113,7 @@ class tileOverlord(QtWidgets.QWidget):
 
         Tileset.addObject(new=True)
 
-        pix = QtGui.QPixmap(24, 24)
-        pix.fill(Qt.transparent)
-
-        painter = QtGui.QPainter(pix)
-        painter.drawImage(0, 0, Tileset.tiles[0].image)
-        painter.end()
-        del painter
-
-        count = len(Tileset.objects)
-        item = QtGui.QStandardItem(QtGui.QIcon(pix), 'Object {0}'.format(count-1))
-        item.setEditable(False)
-        window.objmodel.appendRow(item)
+        window.objmodel.refresh()
         index = window.objectList.currentIndex()
         window.objectList.setCurrentIndex(index)
         self.setObject(index)
@@ -3646,11 +4130,9 @@ class tileOverlord(QtWidgets.QWidget):
             return
 
         Tileset.removeObject(index)
-        window.objmodel.removeRow(index)
+        window.objmodel.removeObjectRow(index)
         self.tiles.clear()
 
-        SetupObjectModel(window.objmodel, Tileset.objects, Tileset.tiles)
-
         window.objectList.update()
         self.update()
 
@@ -3827,6 +4309,7 @@ class tileOverlord(QtWidgets.QWidget):
             self.slopeLine.update()
 
         self.tiles.update()
+        window.objmodel.objectChanged(index)
 
 
     def addRowHandler(self):
@@ -3930,6 +4413,8 @@ class tileWidget(QtWidgets.QWidget):
             for row in curObj.tiles:
                 row.append((0, 0, 0))
 
+        Tileset.reindexObject(curObj)
+
         self.update()
         self.updateList()
 
@@ -3959,6 +4444,8 @@ class tileWidget(QtWidgets.QWidget):
             if len(row) > 1:
                 row.pop()
 
+        Tileset.reindexObject(curObj)
+
         if curObj.repeatX:
             for y, row in enumerate(curObj.tiles):
                 start, end = curObj.repeatX[y]
@@ -3966,13 +4453,7 @@ class tileWidget(QtWidgets.QWidget):
                 start = min(start, end - 1)
 
                 if [start, end] != curObj.repeatX[y]:
-                    curObj.repeatX[y] = [start, end]
-                    for x in range(len(row)):
-                        if x >= start and x < end:
-                            row[x] = (row[x][0] | 1, row[x][1], row[x][2])
-
-                        else:
-                            row[x] = (row[x][0] & ~1, row[x][1], row[x][2])
+                    curObj.setRepetitionX(y, start, end)
 
         self.update()
         self.updateList()
@@ -4007,6 +4488,8 @@ class tileWidget(QtWidgets.QWidget):
         else:
             curObj.tiles.append([(0, 0, 0) for _ in range(curObj.width)])
 
+        Tileset.reindexObject(curObj)
+
         if curObj.upperslope[0] != 0:
             curObj.lowerslope = [0x84, curObj.lowerslope[1] + 1]
 
@@ -4033,10 +4516,10 @@ class tileWidget(QtWidgets.QWidget):
         self.setMinimumSize(self.size[0]*24 + 12, self.size[1]*24 + 12)
 
         curObj = Tileset.objects[self.object]
-        curObj.tiles = list(curObj.tiles)
         curObj.height -= 1
 
         curObj.tiles.pop()
+        Tileset.reindexObject(curObj)
 
         if curObj.repeatX:
             curObj.repeatX.pop()
@@ -4175,7 +4658,7 @@ class tileWidget(QtWidgets.QWidget):
             if Tileset.slot == 0:
                 try:
                     self.tiles[y][x] = Tileset.tiles[0].image
-                    Tileset.objects[self.object].tiles[y][x] = (Tileset.objects[self.object].tiles[y][x][0], 0, 0)
+                    Tileset.setObjectTile(Tileset.objects[self.object], y, x, (Tileset.objects[self.object].tiles[y][x][0], 0, 0))
                 except IndexError:
                     pass
 
@@ -4185,7 +4668,7 @@ class tileWidget(QtWidgets.QWidget):
 
                 try:
                     self.tiles[y][x] = img
-                    Tileset.objects[self.object].tiles[y][x] = (Tileset.objects[self.object].tiles[y][x][0], 0, 0)
+                    Tileset.setObjectTile(Tileset.objects[self.object], y, x, (Tileset.objects[self.object].tiles[y][x][0], 0, 0))
                 except IndexError:
                     pass
 
@@ -4217,7 +4700,7 @@ class tileWidget(QtWidgets.QWidget):
 
                 try:
                     self.tiles[y][x] = Tileset.tiles[tile].image
-                    Tileset.objects[self.object].tiles[y][x] = (Tileset.objects[self.object].tiles[y][x][0], tile, Tileset.slot)
+                    Tileset.setObjectTile(Tileset.objects[self.object], y, x, (Tileset.objects[self.object].tiles[y][x][0], tile, Tileset.slot))
                 except IndexError:
                     pass
 
@@ -4236,8 +4719,8 @@ class tileWidget(QtWidgets.QWidget):
 
     def updateList(self):
         # Update the list >.>
-        object = window.objmodel.itemFromIndex(window.objectList.currentIndex())
-        if not object: return
+        index = window.objectList.currentIndex().row()
+        if index < 0 or index >= len(Tileset.objects): return
 
 
         tex = QtGui.QPixmap(self.size[0] * 24, self.size[1] * 24)
@@ -4253,7 +4736,8 @@ class tileWidget(QtWidgets.QWidget):
 
         painter.end()
 
-        object.setIcon(QtGui.QIcon(tex))
+        ObjectThumbnails.put(Tileset.objects[index], tex)
+        window.objmodel.objectChanged(index)
 
         window.objectList.update()
 
@@ -4280,7 +4764,7 @@ class tileWidget(QtWidgets.QWidget):
             else:
                 self.tiles[y][x] = Tileset.tiles[tile].image
 
-            Tileset.objects[self.object].tiles[y][x] = (Tileset.objects[self.object].tiles[y][x][0], tile, tileset)
+            Tileset.setObjectTile(Tileset.objects[self.object], y, x, (Tileset.objects[self.object].tiles[y][x][0], tile, tileset))
 
             self.update()
             self.updateList()
@@ -4325,7 +4809,7 @@ class tileWidget(QtWidgets.QWidget):
             # Do stuff
             item = dlg.item.currentIndex()
 
-            Tileset.objects[self.object].tiles[y][x] = (obj[0], obj[1], (obj[2] & 3) | (item << 2))
+            Tileset.setObjectTile(Tileset.objects[self.object], y, x, (obj[0], obj[1], (obj[2] & 3) | (item << 2)))
 
             self.update()
             self.updateList()
@@ -4347,7 +4831,7 @@ class tileWidget(QtWidgets.QWidget):
             slot = dlg.slot.value()
             item = dlg.item.value()
 
-            Tileset.objects[self.object].tiles[y][x] = (repeating, tilenum, (slot & 3) | (item << 2))
+            Tileset.setObjectTile(Tileset.objects[self.object], y, x, (repeating, tilenum, (slot & 3) | (item << 2)))
 
             window.tileWidget.setObject(window.objectList.currentIndex())
             window.tileWidget.update()
@@ -4520,10 +5004,16 @@ class tileWidget(QtWidgets.QWidget):
 
 
 class PiecesModel(QtCore.QAbstractListModel):
+    '''The tile palette. Pixmaps are made from the tile images the first
+    time they are shown and kept for both the alpha and no-alpha views, so
+    switching views or changing a few tiles doesn't redo all of them.'''
+
     def __init__(self, parent=None):
         super(PiecesModel, self).__init__(parent)
 
-        self.pixmaps = []
+        self.alpha = True
+        self.count = 0
+        self.pixmaps = {True: [], False: []}
 
     def supportedDragActions(self):
         super().supportedDragActions()
@@ -4534,29 +5024,61 @@ class PiecesModel(QtCore.QAbstractListModel):
             return None
 
         if role == Qt.DecorationRole:
-            return QtGui.QIcon(self.pixmaps[index.row()])
+            return QtGui.QIcon(self.pixmap(index.row()))
 
         if role == Qt.UserRole:
-            return self.pixmaps[index.row()]
+            return self.pixmap(index.row())
 
         return None
 
-    def addPieces(self, pixmap):
-        row = len(self.pixmaps)
+    def pixmap(self, row):
+        '''Returns the pixmap of a tile in the current view, making it if
+        it isn't cached.'''
+        pixmaps = self.pixmaps[self.alpha]
+
+        pixmap = pixmaps[row]
+        if pixmap is None:
+            tile = Tileset.tiles[row]
+            pixmap = QtGui.QPixmap.fromImage(tile.image if self.alpha else tile.noalpha)
+            pixmaps[row] = pixmap
 
-        self.beginInsertRows(QtCore.QModelIndex(), row, row)
-        self.pixmaps.insert(row, pixmap)
-        self.endInsertRows()
+        return pixmap
 
     def flags(self,index):
         if index.isValid():
             return (Qt.ItemIsEnabled | Qt.ItemIsSelectable |
                     Qt.ItemIsDragEnabled)
 
-    def clear(self):
-        row = len(self.pixmaps)
+    def reset(self):
+        '''Drops every cached pixmap; call when the tileset is replaced.'''
+        self.beginResetModel()
+
+        self.count = len(Tileset.tiles)
+        self.pixmaps = {True: [None] * self.count, False: [None] * self.count}
+
+        self.endResetModel()
+
+    def setAlpha(self, alpha):
+        '''Switches between the alpha and no-alpha pixmaps.'''
+        if alpha == self.alpha:
+            return
+
+        self.alpha = alpha
+
+        if self.count:
+            self.dataChanged.emit(self.index(0), self.index(self.count - 1), [Qt.DecorationRole, Qt.UserRole])
+
+    def invalidateTiles(self, tiles):
+        '''Drops the cached pixmaps of tiles whose images changed.'''
+        tiles = [tile for tile in tiles if 0 <= tile < self.count]
+        if not tiles:
+            return
+
+        for tile in tiles:
+            self.pixmaps[True][tile] = None
+            self.pixmaps[False][tile] = None
 
-        del self.pixmaps[:]
+        self.dataChanged.emit(self.index(min(tiles)), self.index(max(tiles)), [Qt.DecorationRole, Qt.UserRole])
 
 
     def mimeTypes(self):
@@ -4582,7 +5104,7 @@ class PiecesModel(QtCore.QAbstractListModel):
         if parent.isValid():
             return 0
         else:
-            return len(self.pixmaps)
+            return self.count
 
     def supportedDragActions(self):
         return Qt.CopyAction | Qt.MoveAction
@@ -4593,473 +5115,192 @@ class PiecesModel(QtCore.QAbstractListModel):
 ################## Python-based RGB5a3 Decoding code from my BRFNT program ##################
 
 
-RGB4A3LUT = []
-RGB4A3LUT_NoAlpha = []
-def PrepareRGB4A3LUTs():
-    global RGB4A3LUT, RGB4A3LUT_NoAlpha
+def ClampFramesheet(framesheet):
+    '''Scales an unclamped framesheet to 24 pixels wide and pads every
+    24x24 frame to 32x32 with clamped borders. Doesn't need a QApplication.'''
 
-    RGB4A3LUT = [None] * 0x10000
-    RGB4A3LUT_NoAlpha = [None] * 0x10000
-    for LUT, hasA in [(RGB4A3LUT, True), (RGB4A3LUT_NoAlpha, False)]:
+    image = framesheet.scaledToWidth(24).convertToFormat(QtGui.QImage.Format_ARGB32)
+    frames = image.height() // 24
 
-        # RGB4A3
-        for d in range(0x8000):
-            if hasA:
-                alpha = d >> 12
-                alpha = alpha << 5 | alpha << 2 | alpha >> 1
-            else:
-                alpha = 0xFF
-            red = ((d >> 8) & 0xF) * 17
-            green = ((d >> 4) & 0xF) * 17
-            blue = (d & 0xF) * 17
-            LUT[d] = blue | (green << 8) | (red << 16) | (alpha << 24)
-
-        # RGB555
-        for d in range(0x8000):
-            red = d >> 10
-            red = red << 3 | red >> 2
-            green = (d >> 5) & 0x1F
-            green = green << 3 | green >> 2
-            blue = d & 0x1F
-            blue = blue << 3 | blue >> 2
-            LUT[d + 0x8000] = blue | (green << 8) | (red << 16) | 0xFF000000
-
-PrepareRGB4A3LUTs()
-
-
-def RGB4A3Decode(tex, useAlpha=True):
-    tx = 0; ty = 0
-    iter = tex.__iter__()
-    dest = [0] * 262144
-
-    LUT = RGB4A3LUT if useAlpha else RGB4A3LUT_NoAlpha
-
-    # Loop over all texels (of which there are 16384)
-    for i in range(16384):
-        temp1 = (i // 256) % 8
-        if temp1 == 0 or temp1 == 7:
-            # Skip every row of texels that is a multiple of 8 or (a
-            # multiple of 8) - 1
-            # Unrolled loop for performance.
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-        else:
-            temp2 = i % 8
-            if temp2 == 0 or temp2 == 7:
-                # Skip every column of texels that is a multiple of 8
-                # or (a multiple of 8) - 1
-                # Unrolled loop for performance.
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-            else:
-                # Actually render this texel
-                for y in range(ty, ty+4):
-                    for x in range(tx, tx+4):
-                        dest[x + y * 1024] = LUT[next(iter) << 8 | next(iter)]
+    data = texture.clampTiles(image.constBits().asstring(frames * 24 * 24 * 4), 1, clampCorners=False)
 
-        # Move on to the next texel
-        tx += 4
-        if tx >= 1024: tx = 0; ty += 4
+    return QtGui.QImage(data, 32, frames * 32, QtGui.QImage.Format_ARGB32).copy()
 
-    # Convert the list of ARGB color values into a bytes object, and
-    # then convert that into a QImage
-    return QtGui.QImage(struct.pack('<262144I', *dest), 1024, 256, QtGui.QImage.Format_ARGB32)
 
+def ReadTilesetArc(path, progress=None, cache=None):
+    '''Reads a tileset arc, sorts out its files, decompresses and decodes
+    the texture and parses the behaviours and objects, without touching
+    Tileset or creating any Qt objects. progress(text, percent) is called
+    along the way, and may raise to abort. Returns the files from
+    tilesetcodec.readArc(); "texture" and "noalpha" are ARGB32 buffers
+    for the 1024x256 texture, or None if the arc doesn't have all of the
+    necessary files, and "behaviours", "objects" and "slot" are the parsed
+    tables and the detected slot.
+    If a decodecache.DecodeCache is given, the decoded results are taken
+    from it if the arc was decoded before, and stored in it otherwise.'''
 
-def color_transparent_pixels_around_edges_24_24(data: bytearray) -> None:
-    """
-    THIS FUNCTION IS AUTO-GENERATED SOURCE CODE!
-    See make_color_transparent_pixels_around_edges.py.
-    Find fully-transparent pixels that border non-fully-transparent
-    pixels, and set their RGB channels to the average of those of their
-    neighboring non-fully-transparent pixels. This solves the
-    longstanding "black outlines around tile edges" bug.
-    "data" should be BGRA8 bytes for an image of size 24x24.
-    """
-    if len(data) != 0x900:
-        raise ValueError(f'expected 0x900 bytes, got {len(data):#x}')
+    def report(text, value):
+        if progress is not None:
+            progress(text, value)
 
-    # Redefine some globals as locals for faster lookups
-    sum_loc, len_loc, range_loc = sum, len, range
+    report('Reading file...', 0)
+    with open(path,'rb') as file:
+        data = file.read()
 
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Top-left corner
+    report('Unpacking archive...', 5)
+    files = tilesetcodec.readArc(data)
+    files['texture'] = files['noalpha'] = None
 
-    if not data[0x3]:
-        neighbors = []
+    if None in (files['image'], files['behaviourdata'], files['objstrings'], files['metadata']):
+        return files
 
-        # (x + 1, y)
-        if data[0x7]:
-            neighbors.append(data[0x4 : 0x7])
+    if cache is not None:
+        report('Reading cache...', 10)
+        key = cache.key(data)
+        cached = cache.load(key)
+        if cached is not None:
+            files['texture'], files['noalpha'], files['behaviours'], files['objects'] = cached
+            files['slot'] = tilesetcodec.detectSlot(files['objects'])
+            return files
 
-        # (x + 1, y + 1)
-        if data[0x67]:
-            neighbors.append(data[0x64 : 0x67])
+    # Stolen from Reggie! Loads the Image Data.
+    report('Decompressing texture...', 10)
+    tiledata = tilesetcodec.decompressTexture(files['image'], HaveNSMBLib,
+        lambda done, total: report('Decompressing texture...', 10 + done * 70 // total))
 
-        # (x, y + 1)
-        if data[0x63]:
-            neighbors.append(data[0x60 : 0x63])
+    report('Decoding texture...', 80)
+    files['texture'] = tilesetcodec.decodeTexture(tiledata, True, HaveNSMBLib)
 
-        if neighbors:
-            ln = len_loc(neighbors)
-            data[0x0] = sum_loc(n[0] for n in neighbors) // ln
-            data[0x1] = sum_loc(n[1] for n in neighbors) // ln
-            data[0x2] = sum_loc(n[2] for n in neighbors) // ln
+    report('Decoding texture...', 90)
+    files['noalpha'] = tilesetcodec.decodeTexture(tiledata, False, HaveNSMBLib)
 
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Top-right corner
-
-    if not data[0x5f]:
-        neighbors = []
-
-        # (x, y + 1)
-        if data[0xbf]:
-            neighbors.append(data[0xbc : 0xbf])
-
-        # (x - 1, y + 1)
-        if data[0xbb]:
-            neighbors.append(data[0xb8 : 0xbb])
-
-        # (x - 1, y)
-        if data[0x5b]:
-            neighbors.append(data[0x58 : 0x5b])
-
-        if neighbors:
-            ln = len_loc(neighbors)
-            data[0x5c] = sum_loc(n[0] for n in neighbors) // ln
-            data[0x5d] = sum_loc(n[1] for n in neighbors) // ln
-            data[0x5e] = sum_loc(n[2] for n in neighbors) // ln
-
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Bottom-left corner
-
-    if not data[0x8a3]:
-        neighbors = []
-
-        # (x, y - 1)
-        if data[0x843]:
-            neighbors.append(data[0x840 : 0x843])
-
-        # (x + 1, y - 1)
-        if data[0x847]:
-            neighbors.append(data[0x844 : 0x847])
-
-        # (x + 1, y)
-        if data[0x8a7]:
-            neighbors.append(data[0x8a4 : 0x8a7])
-
-        if neighbors:
-            ln = len_loc(neighbors)
-            data[0x8a0] = sum_loc(n[0] for n in neighbors) // ln
-            data[0x8a1] = sum_loc(n[1] for n in neighbors) // ln
-            data[0x8a2] = sum_loc(n[2] for n in neighbors) // ln
-
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Bottom-right corner
-
-    if not data[0x8ff]:
-        neighbors = []
-
-        # (x - 1, y)
-        if data[0x8fb]:
-            neighbors.append(data[0x8f8 : 0x8fb])
-
-        # (x - 1, y - 1)
-        if data[0x89b]:
-            neighbors.append(data[0x898 : 0x89b])
-
-        # (x, y - 1)
-        if data[0x89f]:
-            neighbors.append(data[0x89c : 0x89f])
-
-        if neighbors:
-            ln = len_loc(neighbors)
-            data[0x8fc] = sum_loc(n[0] for n in neighbors) // ln
-            data[0x8fd] = sum_loc(n[1] for n in neighbors) // ln
-            data[0x8fe] = sum_loc(n[2] for n in neighbors) // ln
-
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Top edge, except corners
-
-    for offset in range_loc(0x7, 0x5f, 0x4):
-        if not data[offset]:
-            neighbors = []
-
-            # (x + 1, y)
-            offset += 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x + 1, y + 1)
-            offset += 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x, y + 1)
-            offset -= 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x - 1, y + 1)
-            offset -= 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x - 1, y)
-            offset -= 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            if neighbors:
-                ln = len_loc(neighbors)
-                data[offset + 1] = sum_loc(n[0] for n in neighbors) // ln
-                data[offset + 2] = sum_loc(n[1] for n in neighbors) // ln
-                data[offset + 3] = sum_loc(n[2] for n in neighbors) // ln
-
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Bottom edge, except corners
-
-    for offset in range_loc(0x8a7, 0x8ff, 0x4):
-        if not data[offset]:
-            neighbors = []
-
-            # (x - 1, y)
-            offset -= 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x - 1, y - 1)
-            offset -= 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x, y - 1)
-            offset += 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x + 1, y - 1)
-            offset += 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x + 1, y)
-            offset += 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            if neighbors:
-                ln = len_loc(neighbors)
-                data[offset - 7] = sum_loc(n[0] for n in neighbors) // ln
-                data[offset - 6] = sum_loc(n[1] for n in neighbors) // ln
-                data[offset - 5] = sum_loc(n[2] for n in neighbors) // ln
-
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Left edge, except corners
-
-    for offset in range_loc(0x63, 0x8a3, 0x60):
-        if not data[offset]:
-            neighbors = []
-
-            # (x, y - 1)
-            offset -= 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x + 1, y - 1)
-            offset += 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x + 1, y)
-            offset += 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x + 1, y + 1)
-            offset += 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x, y + 1)
-            offset -= 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            if neighbors:
-                offset -= 0x63
-                ln = len_loc(neighbors)
-                data[offset] = sum_loc(n[0] for n in neighbors) // ln
-                data[offset + 1] = sum_loc(n[1] for n in neighbors) // ln
-                data[offset + 2] = sum_loc(n[2] for n in neighbors) // ln
-
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Right edge, except corners
-
-    for offset in range_loc(0xbf, 0x8ff, 0x60):
-        if not data[offset]:
-            neighbors = []
-
-            # (x, y + 1)
-            offset += 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x - 1, y + 1)
-            offset -= 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x - 1, y)
-            offset -= 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x - 1, y - 1)
-            offset -= 0x60
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            # (x, y - 1)
-            offset += 0x4
-            if data[offset]:
-                neighbors.append(data[offset - 3 : offset])
-
-            if neighbors:
-                offset += 0x5d
-                ln = len_loc(neighbors)
-                data[offset] = sum_loc(n[0] for n in neighbors) // ln
-                data[offset + 1] = sum_loc(n[1] for n in neighbors) // ln
-                data[offset + 2] = sum_loc(n[2] for n in neighbors) // ln
-
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Main body
-
-    for row_start_offs in range_loc(0x67, 0x8a7, 0x60):
-        for offset in range_loc(row_start_offs, row_start_offs + 0x58, 0x4):
-            if not data[offset]:  # (fully transparent pixel)
-                neighbors = []
-
-                # (x, y - 1)
-                offset -= 0x60
-                if data[offset]:
-                    neighbors.append(data[offset - 3 : offset])
-
-                # (x + 1, y - 1)
-                offset += 0x4
-                if data[offset]:
-                    neighbors.append(data[offset - 3 : offset])
-
-                # (x + 1, y)
-                offset += 0x60
-                if data[offset]:
-                    neighbors.append(data[offset - 3 : offset])
-
-                # (x + 1, y + 1)
-                offset += 0x60
-                if data[offset]:
-                    neighbors.append(data[offset - 3 : offset])
-
-                # (x, y + 1)
-                offset -= 0x4
-                if data[offset]:
-                    neighbors.append(data[offset - 3 : offset])
-
-                # (x - 1, y + 1)
-                offset -= 0x4
-                if data[offset]:
-                    neighbors.append(data[offset - 3 : offset])
-
-                # (x - 1, y)
-                offset -= 0x60
-                if data[offset]:
-                    neighbors.append(data[offset - 3 : offset])
-
-                # (x - 1, y - 1)
-                offset -= 0x60
-                if data[offset]:
-                    neighbors.append(data[offset - 3 : offset])
-
-                if neighbors:
-                    offset += 0x61
-                    ln = len_loc(neighbors)
-                    data[offset] = sum_loc(n[0] for n in neighbors) // ln
-                    data[offset + 1] = sum_loc(n[1] for n in neighbors) // ln
-                    data[offset + 2] = sum_loc(n[2] for n in neighbors) // ln
-
-
-def RGB4A3Encode(tex):
-    assert len(tex) == (1024 * 256 * 4)
-
-    shorts = []
-    colorCache = {}
-    for ytile in range(0, 256, 4):
-        for xtile in range(0, 1024, 4):
-            for ypixel in range(ytile, ytile + 4):
-                for xpixel in range(xtile, xtile + 4):
-
-                    pixel = tex[ypixel * 4096 + xpixel * 4 : ypixel * 4096 + (xpixel + 1) * 4]
-
-                    if pixel in colorCache:
-                        rgba = colorCache[pixel]
+    report('Loading objects...', 95)
+    files['behaviours'] = tilesetcodec.unpackBehaviours(files['behaviourdata'])
+    slots = {}
+    files['objects'] = tilesetcodec.unpackObjects(files['objstrings'], files['metadata'], slots)
+    files['slot'] = tilesetcodec.detectSlot(files['objects'], slots)
 
-                    else:
-                        b, g, r, a = pixel
-
-                        # See encodingTests.py for verification that these
-                        # channel conversion formulas are 100% correct
-
-                        # Note: we can't do
-                        # if a < 19:
-                        #     rgba = 0
-                        # for speed, because that causes an issue with
-                        # texture filtering that results in graphics
-                        # having faint black borders in-game
-
-                        if a < 238:  # RGB4A3
-                            a = ((a + 18) << 1) // 73
-                            r = (r + 8) // 17
-                            g = (g + 8) // 17
-                            b = (b + 8) // 17
-
-                            # 0aaarrrrggggbbbb
-                            rgba = (a << 12) | (r << 8) | (g << 4) | b
-
-                        else:  # RGB555
-                            r = ((r + 4) << 2) // 33
-                            g = ((g + 4) << 2) // 33
-                            b = ((b + 4) << 2) // 33
-
-                            # 1rrrrrgggggbbbbb
-                            rgba = 0x8000 | (r << 10) | (g << 5) | b
-
-                        colorCache[pixel] = rgba
-
-                    shorts.append(rgba)
-
-                    if xtile % 32 == 0 or xtile % 32 == 28:
-                        shorts.append(rgba)
-                        shorts.append(rgba)
-                        shorts.append(rgba)
-                        break
-                if ytile % 32 == 0 or ytile % 32 == 28:
-                    shorts.extend(shorts[-4:])
-                    shorts.extend(shorts[-8:])
-                    break
+    if cache is not None:
+        report('Caching...', 99)
+        cache.store(key, files['texture'], files['noalpha'], files['behaviours'], files['objects'])
+
+    return files
+
+
+class TilesetOpenWorker(QtCore.QThread):
+    '''Runs ReadTilesetArc() on a separate thread, and hands the result to
+    the GUI thread through the loaded signal.'''
+
+    progress = QtCoreSignal(str, int)
+    loaded = QtCoreSignal(object)
+    failed = QtCoreSignal(str)
+
+    class Cancelled(Exception):
+        pass
+
+    def __init__(self, path, cache=None):
+        super().__init__()
+
+        self.path = path
+        self.cache = cache
+        self.cancelled = False
 
-    return struct.pack('>262144H', *shorts)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+    def report(self, text, value):
+        if self.cancelled:
+            raise self.Cancelled
+        self.progress.emit(text, value)
+
+
+    def run(self):
+        try:
+            files = ReadTilesetArc(self.path, self.report, self.cache)
+            if not self.cancelled:
+                self.loaded.emit(files)
+
+        except self.Cancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class TilesetSaveWorker(QtCore.QThread):
+    '''Encodes and compresses the tileset texture and builds the arc file
+    on a separate thread. It works on a snapshot of the tile images; the
+    other files are packed on the GUI thread in the meantime and handed
+    over with setArcFiles().'''
+
+    progress = QtCoreSignal(str, int)
+    saved = QtCoreSignal(object)
+    failed = QtCoreSignal(str)
+
+    class Cancelled(Exception):
+        pass
+
+    def __init__(self, name, tiles, useNSMBLib):
+        super().__init__()
+
+        self.name = name
+        self.tiles = tiles
+        self.useNSMBLib = useNSMBLib
+        self.arcFiles = None
+        self.arcFilesReady = threading.Event()
+        self.cancelled = False
+
+
+    def setArcFiles(self, arcFiles):
+        self.arcFiles = arcFiles
+        self.arcFilesReady.set()
+
+
+    def cancel(self):
+        self.cancelled = True
+        self.arcFilesReady.set()
+
+
+    def checkCancelled(self):
+        if self.cancelled:
+            raise self.Cancelled
+
+
+    def compressProgress(self, done, total):
+        self.checkCancelled()
+        self.progress.emit('Compressing texture...', 20 + done * 70 // total)
+
+
+    def run(self):
+        try:
+            self.progress.emit('Encoding texture...', 0)
+            tex = tilesetcodec.encodeTexture(self.tiles)
+            self.checkCancelled()
+
+            self.progress.emit('Compressing texture...', 20)
+            tex = tilesetcodec.compressTexture(tex, self.useNSMBLib, self.compressProgress)
+
+            self.progress.emit('Packing tiles and objects...', 90)
+            self.arcFilesReady.wait()
+            self.checkCancelled()
+
+            self.progress.emit('Building archive...', 95)
+            arcFiles = self.arcFiles
+            arcFiles['BG_tex'] = None
+            arcFiles['BG_tex/{0}_tex.bin.LZ'.format(self.name)] = tex
+
+            data = tilesetcodec.packArc(arcFiles)
+            self.checkCancelled()
+
+            self.progress.emit('Saved', 100)
+            self.saved.emit(data)
+
+        except self.Cancelled:
+            pass
+        except Exception as e:
+            traceback.print_exc()
+            self.failed.emit('{0}: {1}'.format(type(e).__name__, e))
 
 
 #############################################################################################
@@ -5092,6 +5333,9 @@ class MainWindow(QtWidgets.QMainWindow):
         RandTiles = RandTilesClass()
 
         self.name = ''
+        self.saveWorker = None
+        self.openWorker = None
+        self.closeAfterSave = False
 
         self.setupMenus()
         self.updateRecentFileActions()
@@ -5149,6 +5393,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.geometrySettings = None
         self.windowStateSettings = None
         self.isDarkMode = True
+        self.decodeCachePath = ""
+        self.decodeCacheSize = 256
+        self.dedupeObjects = False
 
         f = open("Other/settings.ini", "r")
         for line in f.read().splitlines():
@@ -5175,6 +5422,20 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.restoreState(QtCore.QByteArray.fromHex(bytes(attr[1], "ascii")))
             elif attr[0] == "isDarkMode":
                 self.isDarkMode = attr[1] == "True"
+            elif attr[0] == "decodeCachePath":
+                self.decodeCachePath = attr[1]
+            elif attr[0] == "decodeCacheSize":
+                self.decodeCacheSize = int(attr[1])
+            elif attr[0] == "dedupeObjects":
+                self.dedupeObjects = attr[1] == "True"
+
+        self.setupDecodeCache()
+
+
+    def setupDecodeCache(self):
+        '''Sets up the cache of decoded tilesets from the settings. The size
+        is in MB; 0 turns the cache off.'''
+        self.decodeCache = decodecache.DecodeCache(self.decodeCachePath or "Other/cache", self.decodeCacheSize * 1024 * 1024)
 
 
     def saveIni(self):
@@ -5187,6 +5448,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.randTilesXMLDialoguePath = self.randTilesXMLDialoguePathBox.text()
         self.randTilesBINDialoguePath = self.randTilesBINDialoguePathBox.text()
         self.isDarkMode = self.isDarkModeCheckBox.isChecked()
+        self.decodeCachePath = self.decodeCachePathBox.text()
+        self.decodeCacheSize = self.decodeCacheSizeBox.value()
+        self.dedupeObjects = self.dedupeObjectsCheckBox.isChecked()
 
         settingsText = ""
         settingsText += "tilesetPath=" + self.tilesetPath
@@ -5200,11 +5464,15 @@ class MainWindow(QtWidgets.QMainWindow):
         settingsText += "\ngeometry=" + bytes(self.saveGeometry().toHex()).decode('ascii')
         settingsText += "\nwindowState=" + bytes(self.saveState().toHex()).decode('ascii')
         settingsText += "\nisDarkMode=" + str(self.isDarkMode)
+        settingsText += "\ndecodeCachePath=" + self.decodeCachePath
+        settingsText += "\ndecodeCacheSize=" + str(self.decodeCacheSize)
+        settingsText += "\ndedupeObjects=" + str(self.dedupeObjects)
 
         f = open("Other/settings.ini", 'w')
         f.write(settingsText)
         self.settingsWindow.hide()
-        
+
+        self.setupDecodeCache()
         self.setColorMode()
 
 
@@ -5232,6 +5500,17 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
     def closeEvent(self, event):
+        # Closing would destroy a save thread before the arc is written, so
+        # close once the save is done instead
+        if self.saveWorker is not None:
+            self.closeAfterSave = True
+            event.ignore()
+            return
+
+        if self.openWorker is not None:
+            self.openWorker.cancel()
+            self.openWorker.wait()
+
         self.saveIni()
         QtWidgets.QMainWindow.closeEvent(self, event)
 
@@ -5271,6 +5550,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.randTilesBINDialoguePathBox = QtWidgets.QLineEdit(self.randTilesBINDialoguePath)
         self.randTilesBINDialoguePathBox.setPlaceholderText('Start in this directory when opening/saving a RandTiles.bin file ...')
         self.randTilesBINDialoguePathOpen = QtWidgets.QPushButton('Select')
+        self.decodeCacheDescription = QtWidgets.QLabel('Decode Cache')
+        self.decodeCachePathBox = QtWidgets.QLineEdit(self.decodeCachePath)
+        self.decodeCachePathBox.setPlaceholderText('Keep decoded tilesets in this directory (default: Other/cache) ...')
+        self.decodeCachePathOpen = QtWidgets.QPushButton('Select')
+        self.decodeCacheSizeBox = QtWidgets.QSpinBox()
+        self.decodeCacheSizeBox.setRange(0, 65536)
+        self.decodeCacheSizeBox.setSuffix(' MB')
+        self.decodeCacheSizeBox.setSpecialValueText('Off')
+        self.decodeCacheSizeBox.setValue(self.decodeCacheSize)
+        self.dedupeObjectsCheckBox = QtWidgets.QCheckBox("Share identical object layouts when saving")
+        self.dedupeObjectsCheckBox.setChecked(self.dedupeObjects)
         self.isDarkModeCheckBox = QtWidgets.QCheckBox("Dark Mode")
         self.isDarkModeCheckBox.setChecked(self.isDarkMode)
         self.saveSettings = QtWidgets.QPushButton('Save')
@@ -5296,8 +5586,13 @@ class MainWindow(QtWidgets.QMainWindow):
         layout.addWidget(self.randTilesXMLDialoguePathOpen, 10, 3, 1, 1)
         layout.addWidget(self.randTilesBINDialoguePathBox, 11, 0, 1, 3)
         layout.addWidget(self.randTilesBINDialoguePathOpen, 11, 3, 1, 1)
-        layout.addWidget(self.isDarkModeCheckBox, 12, 0, 1, 3)
-        layout.addWidget(self.saveSettings, 12, 3, 1, 1)
+        layout.addWidget(self.decodeCacheDescription, 12, 0, 1, 4, Qt.AlignCenter)
+        layout.addWidget(self.decodeCachePathBox, 13, 0, 1, 2)
+        layout.addWidget(self.decodeCacheSizeBox, 13, 2, 1, 1)
+        layout.addWidget(self.decodeCachePathOpen, 13, 3, 1, 1)
+        layout.addWidget(self.dedupeObjectsCheckBox, 14, 0, 1, 3)
+        layout.addWidget(self.isDarkModeCheckBox, 15, 0, 1, 3)
+        layout.addWidget(self.saveSettings, 15, 3, 1, 1)
         self.settingsWindow.setLayout(layout)
 
         self.tilesetPathOpen.released.connect(self.getTilesetPath)
@@ -5308,6 +5603,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.randTilesPathOpen.released.connect(self.getRandTilesPath)
         self.randTilesXMLDialoguePathOpen.released.connect(self.getXMLRandTilesPathOpen)
         self.randTilesBINDialoguePathOpen.released.connect(self.getBINRandTilesPathOpen)
+        self.decodeCachePathOpen.released.connect(self.getDecodeCachePath)
         self.saveSettings.released.connect(self.saveIni)
 
         self.settingsWindow.setMinimumWidth(900)
@@ -5328,6 +5624,11 @@ class MainWindow(QtWidgets.QMainWindow):
         if not path: return
         self.tilesetDialoguePathBox.setText(path)
 
+    def getDecodeCachePath(self):
+        path = QtWidgets.QFileDialog.getExistingDirectory(self, 'Choose a folder ...')
+        if not path: return
+        self.decodeCachePathBox.setText(path)
+
     def getAnimTilesPath(self):
         path = QtWidgets.QFileDialog.getOpenFileName(self, "Choose a file ...", '', "AnimTiles.txt (*.txt);;AnimTiles.bin (*.bin)")[0]
         if not path: return
@@ -5395,9 +5696,8 @@ class MainWindow(QtWidgets.QMainWindow):
         i = 0
         while i < self.framesheetmodel.rowCount():
             item = self.framesheetmodel.itemFromIndex(self.framesheetmodel.index(i, 0))
-            icon = item.icon()
             name = item.text()
-            pixmap = icon.pixmap(icon.availableSizes()[0])
+            pixmap = self.frames.sheet("BG_tex/{0}.bin".format(name))
             pixmap.save("{}/{}.png".format(path, name), "PNG")
             i += 1
 
@@ -5406,7 +5706,7 @@ class MainWindow(QtWidgets.QMainWindow):
         path = QtWidgets.QFileDialog.getOpenFileName(self, "Open unclamped framesheet", '', "Unclamped Framesheet (*.png)")[0]
 
         if path:
-            framesheet = QtGui.QPixmap()
+            framesheet = QtGui.QImage()
             if not framesheet.load(path):
                 QtWidgets.QMessageBox.warning(self, "Open framesheet", "The framesheet file could not be loaded.", QtWidgets.QMessageBox.Cancel)
                 return
@@ -5416,60 +5716,7 @@ class MainWindow(QtWidgets.QMainWindow):
                         "There seem to be some pixels missing here.\n"
                         "Make sure that the height of your framesheet is a multiple of its' width!")
 
-            downScaledFramesheet = framesheet.scaledToWidth(24)
-            downScaledImage = downScaledFramesheet.toImage().convertToFormat(QtGui.QImage.Format_ARGB32)
-
-            image = QtGui.QImage(32, downScaledFramesheet.height() // 24 * 32, QtGui.QImage.Format_ARGB32)
-            image.fill(Qt.transparent)
-
-            i = 0
-            while i < downScaledImage.height() // 24:
-                y = 0
-                while y < 24:
-                    x = 0
-                    while x < 24:
-                        color = downScaledImage.pixel(x, y + i*24)
-                        image.setPixel(x + 4, i * 32 + y + 4, color)
-                        x += 1
-                    y += 1
-
-                y = 0                                                   #texture clamp top
-                while y < 4:
-                    x = 0
-                    while x < 24:
-                        color = image.pixel(x + 4, i * 32 + 4)
-                        image.setPixel(x + 4, i * 32 + y, color)
-                        x += 1
-                    y += 1
-
-                y = 0                                                   #texture clamp bottom
-                while y < 4:
-                    x = 0
-                    while x < 24:
-                        color = image.pixel(x + 4, i * 32 + 27)
-                        image.setPixel(x + 4, i * 32 + y + 28, color)
-                        x += 1
-                    y += 1
-
-                x = 0                                                   #texture clamp left
-                while x < 4:
-                    y = 0
-                    while y < 24:
-                        color = image.pixel(4, i * 32 + y + 4)
-                        image.setPixel(x, i * 32 + y + 4, color)
-                        y += 1
-                    x += 1
-
-                x = 0                                                   #texture clamp right
-                while x < 4:
-                    y = 0
-                    while y < 24:
-                        color = image.pixel(27, i * 32 + y + 4)
-                        image.setPixel(x + 28, i * 32 + y + 4, color)
-                        y += 1
-                    x += 1
-
-                i += 1
+            image = ClampFramesheet(framesheet)
 
             fn = QtWidgets.QFileDialog.getSaveFileName(self, 'Save the clamped framesheet', '', 'Clamped Framesheet (*.png)')[0]
             if not fn: return
@@ -5688,16 +5935,16 @@ class MainWindow(QtWidgets.QMainWindow):
         QHelpDialog().exec_()
 
 
-    def setuptile(self):
+    def setuptile(self, tiles=None):
+        '''Updates the tile palette after the tileset is replaced, or after
+        the images of the given tiles changed.'''
         self.tileWidget.tiles.clear()
-        self.model.clear()
 
-        if self.alpha == True:
-            for tile in Tileset.tiles:
-                self.model.addPieces(QtGui.QPixmap.fromImage(tile.image))
+        if tiles is None:
+            self.model.reset()
+            self.infoKey = None
         else:
-            for tile in Tileset.tiles:
-                self.model.addPieces(QtGui.QPixmap.fromImage(tile.noalpha))
+            self.model.invalidateTiles(tiles)
 
 
     def newTileset(self):
@@ -5739,16 +5986,69 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
     def openTileset(self):
-        '''Asks the user for a filename, then calls openTilesetFromPath().'''
+        '''Asks the user for a filename, then calls openTilesetInBackground().'''
 
         path = QtWidgets.QFileDialog.getOpenFileName(self, "Open NSMBW Tileset", window.tilesetDialoguePath, "Tileset Files (*.arc)")[0]
 
         if path:
-            self.openTilesetFromPath(path)
+            self.openTilesetInBackground(path)
 
 
     def openTilesetFromPath(self, path, suppressSlotWarning=False):
         '''Opens a Nintendo tileset arc and parses the heck out of it.'''
+        self.loadTileset(path, ReadTilesetArc(path, cache=self.decodeCache), suppressSlotWarning)
+
+
+    def openTilesetInBackground(self, path):
+        '''Like openTilesetFromPath(), but reads, decompresses and decodes the
+        arc on a TilesetOpenWorker. Any open that's still in progress is
+        canceled and waited for, so it can't load or cache anything later.'''
+
+        if self.openWorker is not None:
+            self.openWorker.cancel()
+            self.openWorker.wait()
+            self.openProgress.close()
+
+        worker = TilesetOpenWorker(path, self.decodeCache)
+        progress = QtWidgets.QProgressDialog('Opening {0}...'.format(os.path.basename(path)), 'Cancel', 0, 100, self)
+        progress.setWindowTitle('Open tileset')
+        # Edits made while the tileset is opening would be thrown away
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+
+        def showProgress(text, value):
+            progress.setLabelText(text)
+            progress.setValue(value)
+
+        def finish():
+            progress.close()
+            if self.openWorker is worker:
+                self.openWorker = None
+
+        def load(files):
+            if self.openWorker is worker:
+                self.loadTileset(path, files)
+
+        def showError(message):
+            if self.openWorker is worker:
+                QtWidgets.QMessageBox.warning(self, 'Open tileset', 'The tileset could not be opened:\n{0}'.format(message))
+
+        worker.progress.connect(showProgress)
+        worker.loaded.connect(load)
+        worker.failed.connect(showError)
+        worker.finished.connect(finish)
+        progress.canceled.connect(worker.cancel)
+
+        self.openWorker = worker
+        self.openProgress = progress
+        worker.start()
+
+
+    def loadTileset(self, path, files, suppressSlotWarning=False):
+        '''Sets up the tileset and the widgets from the files returned by
+        ReadTilesetArc().'''
         if path in self.recentFiles:
             self.recentFiles.insert(0, self.recentFiles.pop(self.recentFiles.index(path)))
         else:
@@ -5763,166 +6063,44 @@ class MainWindow(QtWidgets.QMainWindow):
 
         basename = os.path.basename(path[str(path).rfind('/')+1:-4])
 
-        with open(path,'rb') as file:
-            data = file.read()
-
-        arc = archive.U8()
-        arc._load(data)
-
-        Image = None
-        behaviourdata = None
-        objstrings = None
-        metadata = None
-
-        Tileset.plantOverrides = None
-        Tileset.profileOverrides = None
-
-        for key, value in arc.files:
-            if value is None:
-                continue
-            elif key.startswith('BG_tex/') and key.endswith('_tex.bin.LZ'):
-                Image = arc[key]
-            elif key.startswith('BG_tex/') and key.endswith('.bin'):
-                Tileset.animdata[key] = arc[key]
-            elif key.startswith('BG_chk/d_bgchk_') and key.endswith('.bin'):
-                behaviourdata = arc[key]
-            elif key.startswith('BG_unt/') and key.endswith('_hd.bin'):
-                metadata = arc[key]
-            elif key.startswith('BG_unt/') and key.endswith('.bin'):
-                objstrings = arc[key]
-            elif key == 'BG_new/AnimTiles.bin':
-                Tileset.animTilesBin = arc[key]
-            elif key == 'BG_new/RandTiles.bin':
-                Tileset.randTilesBin = arc[key]
-            elif key == 'BG_ext/PlantTiles.bin':
-                print('Loading PlantTiles.bin')
-                Tileset.plantOverrides = arc[key]
-            elif key == 'BG_ext/ProfileTiles.bin':
-                print('Loading ProfileTiles.bin')
-                Tileset.profileOverrides = arc[key]
-            else:
-                Tileset.unknownFiles[key] = arc[key]
-                print(f"Unknown File: {key}")
+        Tileset.animdata.update(files['animdata'])
+        Tileset.animTilesBin = files['animTilesBin']
+        Tileset.randTilesBin = files['randTilesBin']
+        Tileset.plantOverrides = files['plantOverrides']
+        Tileset.profileOverrides = files['profileOverrides']
+        Tileset.unknownFiles.update(files['unknownFiles'])
 
         self.plantOverwriteEditor.load_from_bin(Tileset.plantOverrides)
         self.profileOverwriteEditor.load_from_bin(Tileset.profileOverrides)
 
-        if (Image is None) or (behaviourdata is None) or (objstrings is None) or (metadata is None):
+        if files['texture'] is None:
             QtWidgets.QMessageBox.warning(None, 'Error',  'Error - the necessary files were not found.\n\nNot a valid tileset, sadly.')
             return
 
-        # Stolen from Reggie! Loads the Image Data.
-        if HaveNSMBLib:
-            tiledata = nsmblib.decompress11LZS(Image)
-            if hasattr(nsmblib, 'decodeTilesetNoPremultiplication'):
-                argbdata = nsmblib.decodeTilesetNoPremultiplication(tiledata)
-                tileImage = QtGui.QImage(argbdata, 1024, 256, QtGui.QImage.Format_ARGB32)
-            else:
-                tileImage = RGB4A3Decode(tiledata)
-
-            if hasattr(nsmblib, 'decodeTilesetNoPremultiplicationNoAlpha'):
-                rgbdata = nsmblib.decodeTilesetNoPremultiplicationNoAlpha(tiledata)
-                noalphaImage = QtGui.QImage(rgbdata, 1024, 256, QtGui.QImage.Format_ARGB32)
-            else:
-                noalphaImage = RGB4A3Decode(tiledata, False)
-        else:
-            lz = lz77.LZS11()
-            decomp = lz.Decompress11LZS(Image)
-            tileImage = RGB4A3Decode(decomp)
-            noalphaImage = RGB4A3Decode(decomp, False)
-
-        # Loads Tile Behaviours
-
-        behaviours = []
-        for entry in range(256):
-            behaviours.append(struct.unpack_from('>8B', behaviourdata, entry*8))
-
+        tileImage = QtGui.QImage(files['texture'], 1024, 256, QtGui.QImage.Format_ARGB32)
+        noalphaImage = QtGui.QImage(files['noalpha'], 1024, 256, QtGui.QImage.Format_ARGB32)
 
         # Makes us some nice Tile Classes!
         Xoffset = 4
         Yoffset = 4
         for i in range(256):
-            Tileset.addTile(tileImage.copy(Xoffset,Yoffset,24,24), noalphaImage.copy(Xoffset,Yoffset,24,24), behaviours[i])
+            Tileset.addTile(tileImage.copy(Xoffset,Yoffset,24,24), noalphaImage.copy(Xoffset,Yoffset,24,24))
             Xoffset += 32
             if Xoffset >= 1024:
                 Xoffset = 4
                 Yoffset += 32
 
+        Tileset.setBehaviours(files['behaviours'])
 
-        # Load Objects
-
-        meta = []
-        for i in range(len(metadata) // 4):
-            meta.append(struct.unpack_from('>H2B', metadata, i * 4))
-
-        tilelist = [[]]
-        upperslope = [0, 0]
-        lowerslope = [0, 0]
-        byte = 0
-
-        for entry in meta:
-            offset = entry[0]
-            byte = struct.unpack_from('>B', objstrings, offset)[0]
-            row = 0
-
-            while byte != 0xFF:
-
-                if byte == 0xFE:
-                    tilelist.append([])
-
-                    if (upperslope[0] != 0) and (lowerslope[0] == 0):
-                        upperslope[1] = upperslope[1] + 1
-
-                    if lowerslope[0] != 0:
-                        lowerslope[1] = lowerslope[1] + 1
-
-                    offset += 1
-                    byte = struct.unpack_from('>B', objstrings, offset)[0]
-
-                elif (byte & 0x80):
-
-                    if upperslope[0] == 0:
-                        upperslope[0] = byte
-                    else:
-                        lowerslope[0] = byte
-
-                    offset += 1
-                    byte = struct.unpack_from('>B', objstrings, offset)[0]
-
-                else:
-                    tilelist[-1].append(struct.unpack_from('>3B', objstrings, offset))
 
-                    offset += 3
-                    byte = struct.unpack_from('>B', objstrings, offset)[0]
-
-            tilelist.pop()
-
-            if (upperslope[0] & 0x80) and (upperslope[0] & 0x2):
-                for i in range(lowerslope[1]):
-                    pop = tilelist.pop()
-                    tilelist.insert(0, pop)
+        # Load Objects
 
-            Tileset.addObject(entry[2], entry[1], upperslope, lowerslope, tilelist)
+        for object in files['objects']:
+            Tileset.addObject(object.height, object.width, object.upperslope, object.lowerslope, object.tiles)
 
-            tilelist = [[]]
-            upperslope = [0, 0]
-            lowerslope = [0, 0]
+        Tileset.slot = files['slot']
 
         if Tileset.objects:
-            slots = []
-            for object in Tileset.objects:
-                for row in object.tiles:
-                    for tile in row:
-                        slot = tile[2] & 3
-                        if slot != 0 or tile[1] != 0:
-                            slots.append(slot)
-
-            if not slots:
-                Tileset.slot = 0
-            else:
-                Tileset.slot = max(slots, key=slots.count)
-            del slots
-
             if basename[:4] in ('Pa0_', 'Pa1_', 'Pa2_', 'Pa3_'):
                 slot = int(basename[2])
                 if slot != Tileset.slot and not suppressSlotWarning:
@@ -5931,14 +6109,10 @@ class MainWindow(QtWidgets.QMainWindow):
             else:
                 print("WARNING: Tileset name does not begin with \"PaX_\". Unable to verify tileset slot.")
 
-
-        else:
-            Tileset.slot = 1
-
         self.tileWidget.tilesetType.setText('Pa{0}'.format(Tileset.slot))
 
         self.setuptile()
-        SetupObjectModel(self.objmodel, Tileset.objects, Tileset.tiles)
+        self.objmodel.refresh()
         SetupFramesheetModel(self, Tileset.animdata)
 
         self.objectList.clearCurrentIndex()
@@ -5989,62 +6163,23 @@ class MainWindow(QtWidgets.QMainWindow):
         else:
             isFirstTime = False
 
-        tileImagesRaw = []
-        tileImagesFixed = []
-        tileImagesRawNoAlpha = []
-        tileImagesFixedNoAlpha = []
-
-        x = 0
-        y = 0
-        for i in range(256):
-            img = tileImage.copy(x*24,y*24,24,24)
-
-            bgra = bytearray(img.bits().asstring(24 * 24 * 4))
-
-            # Skip this if it's not going to be used for anything
-            if not self.skipExtendEdgesDialog or not self.extendEdges:
-                bgra_bk = bytearray(bgra)
+        # Read the sheet into a buffer once. The edge fix and the alpha
+        # removal both work on the whole sheet, and only the variant
+        # that's going to be used gets split into tiles.
+        raw = bytearray(tileImage.constBits().asstring(384 * 384 * 4))
 
-                tileImagesRaw.append(QtGui.QImage(bytes(bgra), 24, 24, QtGui.QImage.Format.Format_ARGB32))
-                for offs in range(3, 24 * 24 * 4, 4):
-                    bgra[offs] = 0xff
-                tileImagesRawNoAlpha.append(QtGui.QImage(bytes(bgra), 24, 24, QtGui.QImage.Format.Format_ARGB32))
+        if not self.skipExtendEdgesDialog or self.extendEdges:
+            fixed = bytearray(raw)
+            texture.fixTransparentEdges(fixed, 384, 384)
 
-                bgra = bgra_bk
-
-            # Ditto
-            if not self.skipExtendEdgesDialog or self.extendEdges:
-                color_transparent_pixels_around_edges_24_24(bgra)
-
-                tileImagesFixed.append(QtGui.QImage(bytes(bgra), 24, 24, QtGui.QImage.Format.Format_ARGB32))
-                for offs in range(3, 24 * 24 * 4, 4):
-                    bgra[offs] = 0xff
-                tileImagesFixedNoAlpha.append(QtGui.QImage(bytes(bgra), 24, 24, QtGui.QImage.Format.Format_ARGB32))
-
-            x += 1
-            if x >= 16:
-                y += 1
-                x = 0
+        def withoutAlpha(data):
+            data = bytearray(data)
+            data[3::4] = b'\xff' * (384 * 384)
+            return QtGui.QImage(data, 384, 384, QtGui.QImage.Format.Format_ARGB32).copy()
 
         # Show dialog if needed
         if not self.skipExtendEdgesDialog:
-            fullRaw = QtGui.QImage(384, 384, QtGui.QImage.Format.Format_ARGB32)
-            painterRaw = QtGui.QPainter(fullRaw)
-            fullFixed = QtGui.QImage(384, 384, QtGui.QImage.Format.Format_ARGB32)
-            painterFixed = QtGui.QPainter(fullFixed)
-
-            Xoffset = Yoffset = 0
-            for raw, fixed in zip(tileImagesRawNoAlpha, tileImagesFixedNoAlpha):
-                painterRaw.drawImage(Xoffset, Yoffset, raw)
-                painterFixed.drawImage(Xoffset, Yoffset, fixed)
-                Xoffset += 24
-                if Xoffset >= 384:
-                    Xoffset = 0
-                    Yoffset += 24
-
-            del painterRaw, painterFixed
-
-            dlg = self.extendEdgesDialog(fullRaw, fullFixed, self.extendEdges, isFirstTime)
+            dlg = self.extendEdgesDialog(withoutAlpha(raw), withoutAlpha(fixed), self.extendEdges, isFirstTime)
 
             if dlg.exec() == QtWidgets.QDialog.DialogCode.Accepted:
                 self.extendEdges = dlg.doFix
@@ -6053,19 +6188,26 @@ class MainWindow(QtWidgets.QMainWindow):
                 return
 
         # Apply new tile images
-        if self.extendEdges:
-            for i in range(256):
-                Tileset.tiles[i].image = tileImagesFixed[i]
-                Tileset.tiles[i].noalpha = tileImagesFixedNoAlpha[i]
-        else:
-            for i in range(256):
-                Tileset.tiles[i].image = tileImagesRaw[i]
-                Tileset.tiles[i].noalpha = tileImagesRawNoAlpha[i]
+        sheet = fixed if self.extendEdges else raw
+        image = QtGui.QImage(sheet, 384, 384, QtGui.QImage.Format.Format_ARGB32)
+        noalpha = withoutAlpha(sheet)
+
+        changed = []
+        for i in range(256):
+            y, x = divmod(i, 16)
+            tile = image.copy(x * 24, y * 24, 24, 24)
+            if tile != Tileset.tiles[i].image:
+                changed.append(i)
+
+            Tileset.tiles[i].image = tile
+            Tileset.tiles[i].noalpha = noalpha.copy(x * 24, y * 24, 24, 24)
+
+        ObjectThumbnails.invalidateTiles(changed)
 
         index = self.objectList.currentIndex()
-        self.setuptile()
+        self.setuptile(changed)
         self.objectList.clearCurrentIndex()
-        SetupObjectModel(self.objmodel, Tileset.objects, Tileset.tiles)
+        self.objmodel.refresh()
         self.objectList.setCurrentIndex(self.objmodel.index(index.row(), index.column()))
         self.tileWidget.setObject(index)
         self.objectList.update()
@@ -6181,12 +6323,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.saveTilesetAs()
             return
 
-        outdata = self.saving(os.path.basename(self.name)[:-4])
-
-        if outdata is not None:
-            fn = self.name
-            with open(fn, 'wb') as f:
-                f.write(outdata)
+        self.saving(os.path.basename(self.name)[:-4], self.name)
 
 
     def saveTilesetAs(self):
@@ -6194,115 +6331,95 @@ class MainWindow(QtWidgets.QMainWindow):
         fn = QtWidgets.QFileDialog.getSaveFileName(self, 'Choose a new filename', window.tilesetDialoguePath, '.arc (*.arc)')[0]
         if not fn: return
 
-        outdata = self.saving(os.path.basename(str(fn))[:-4])
-
-        if outdata is not None:
-            self.name = fn
-            self.setWindowTitle(os.path.basename(str(fn)))
-
-            with open(fn, 'wb') as f:
-                f.write(outdata)
-
+        self.saving(os.path.basename(str(fn))[:-4], fn)
 
-    def saving(self, name):
 
-        # Prepare tiles, objects, object metadata, and textures and stuff into buffers.
+    def saving(self, name, fn):
+        '''Saves the tileset to fn in the background. The texture is encoded,
+        compressed and archived by a TilesetSaveWorker while the tiles and
+        objects are packed here.'''
 
-        textureBuffer = self.PackTexture()
+        if self.saveWorker is not None:
+            QtWidgets.QMessageBox.information(self, 'Save tileset', 'The tileset is already being saved.')
+            return
 
-        if textureBuffer is None:
+        useNSMBLib = self.chooseCompression()
+        if useNSMBLib is None:
             # The user canceled the saving process in the "use nsmblib?" dialog
-            return None
-
-        tileBuffer = self.PackTiles()
-        objectBuffers = self.PackObjects()
-        objectBuffer = objectBuffers[0]
-        objectMetaBuffer = objectBuffers[1]
-
-
-        # Make an arc and pack up the files!
-
-        # NOTE: adding the files/folders to the U8 object in
-        # alphabetical order is a simple workaround for a wii.py... bug?
-        # unintuitive quirk? Whatever. Fixes one of the issues listed
-        # in GitHub issue #3 (in the RoadrunnerWMC/Puzzle-Updated repo)
-
-        arcFiles = {}
-        arcFiles['BG_tex'] = None
-        arcFiles['BG_tex/{0}_tex.bin.LZ'.format(name)] = textureBuffer
-
-        arcFiles['BG_chk'] = None
-        arcFiles['BG_chk/d_bgchk_{0}.bin'.format(name)] = tileBuffer
+            return
 
-        arcFiles['BG_unt'] = None
-        arcFiles['BG_unt/{0}.bin'.format(name)] = objectBuffer
-        arcFiles['BG_unt/{0}_hd.bin'.format(name)] = objectMetaBuffer
+        # Snapshot the tile images for the worker
+        tiles = b''.join(tile.image.bits().asstring(24 * 24 * 4) for tile in Tileset.tiles)
 
-        self.sortedAnimdata = sorted(Tileset.animdata.items())
-        arcFiles.update(self.sortedAnimdata)
+        worker = TilesetSaveWorker(name, tiles, useNSMBLib)
+        progress = QtWidgets.QProgressDialog('Saving tileset...', 'Cancel', 0, 100, self)
+        progress.setWindowTitle('Save tileset')
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
 
-        if Tileset.animTilesBin or Tileset.randTilesBin:
-            arcFiles['BG_new'] = None
-            if Tileset.animTilesBin:
-                arcFiles['BG_new/AnimTiles.bin'] = Tileset.animTilesBin
-            if Tileset.randTilesBin:
-                arcFiles['BG_new/RandTiles.bin'] = Tileset.randTilesBin
+        def showProgress(text, value):
+            progress.setLabelText(text)
+            progress.setValue(value)
 
-        grassData = self.plantOverwriteEditor.to_bytes()
-        if grassData is not None:
-            print('Saving PlantTiles.bin')
-            arcFiles['BG_ext'] = None
-            arcFiles['BG_ext/PlantTiles.bin'] = self.plantOverwriteEditor.to_bytes()
+        def writeFile(data):
+            self.name = fn
+            self.setWindowTitle(os.path.basename(str(fn)))
 
-        profileData = self.profileOverwriteEditor.to_bytes()
-        if profileData is not None:
-            print('Saving ProfileTiles.bin')
-            arcFiles['BG_ext'] = None
-            arcFiles['BG_ext/ProfileTiles.bin'] = self.profileOverwriteEditor.to_bytes()
+            with open(fn, 'wb') as f:
+                f.write(data)
 
-        for key, file in Tileset.unknownFiles.items():
-            arcFiles[key.split("/")[0]] = None
-            arcFiles[key] = file
+        def showError(message):
+            # Stay open, so the user can try again
+            self.closeAfterSave = False
+            QtWidgets.QMessageBox.warning(self, 'Save tileset', 'The tileset could not be saved:\n{0}'.format(message))
 
-        arc = archive.U8()
-        for name in sorted(arcFiles):
-            arc[name] = arcFiles[name]
-        return arc._dump()
+        def finish():
+            # Runs after writeFile(), as the signals are queued in order
+            progress.close()
+            self.saveWorker = None
 
+            if self.closeAfterSave:
+                self.closeAfterSave = False
+                self.close()
 
-    def PackTexture(self):
+        worker.progress.connect(showProgress)
+        worker.saved.connect(writeFile)
+        worker.failed.connect(showError)
+        worker.finished.connect(finish)
+        progress.canceled.connect(worker.cancel)
 
-        tex = bytearray(1024 * 256 * 4)
-        stride = 1024 * 4
+        self.saveWorker = worker
+        worker.start()
 
-        for i, tile in enumerate(Tileset.tiles):
-            tile_bytes = bytearray(tile.image.bits().asstring(24 * 24 * 4))
+        # Pack everything else while the texture is being encoded
+        try:
+            worker.setArcFiles(self.PackArcFiles(name))
+        except:
+            worker.cancel()
+            raise
 
-            row, col = divmod(i, 32)
-            dest_offs = row * 32 * stride + col * (32 * 4)
 
-            for src_y in range(24):
-                row = tile_bytes[src_y * (24 * 4) : (src_y + 1) * (24 * 4)]
+    def PackArcFiles(self, name):
+        '''Returns the files for the arc, other than the texture.'''
 
-                # Clamp left/right pixels of the row
-                row = row[:4] * 4 + row + row[-4:] * 4
+        snapshot = tilesetcodec.Tileset()
+        snapshot.behaviours = bytes(Tileset.behaviours)
+        snapshot.objects = Tileset.objects
+        snapshot.animdata = Tileset.animdata
+        snapshot.animTilesBin = Tileset.animTilesBin
+        snapshot.randTilesBin = Tileset.randTilesBin
+        snapshot.plantOverrides = self.plantOverwriteEditor.to_bytes()
+        snapshot.profileOverrides = self.profileOverwriteEditor.to_bytes()
+        snapshot.unknownFiles = Tileset.unknownFiles
 
-                tex[dest_offs : dest_offs + (32 * 4)] = row
-                dest_offs += stride
-                if src_y == 0 or src_y == 23:
-                    # Clamp top/bottom rows of the tile
-                    tex[dest_offs : dest_offs + (32 * 4)] = row
-                    dest_offs += stride
-                    tex[dest_offs : dest_offs + (32 * 4)] = row
-                    dest_offs += stride
-                    tex[dest_offs : dest_offs + (32 * 4)] = row
-                    dest_offs += stride
-                    tex[dest_offs : dest_offs + (32 * 4)] = row
-                    dest_offs += stride
+        return tilesetcodec.arcFiles(name, snapshot, dedupeObjects=self.dedupeObjects)
 
-        tex = bytes(tex)
 
-        tex = RGB4A3Encode(tex)
+    def chooseCompression(self):
+        '''Returns whether the texture should be compressed with nsmblib,
+        or None if the user canceled.'''
 
         useNSMBLib = HaveNSMBLib and hasattr(nsmblib, 'compress11LZS')
 
@@ -6346,107 +6463,7 @@ class MainWindow(QtWidgets.QMainWindow):
             # NSMBLib is not available, so we have to use the Python version
             useNSMBLib = False
 
-        if useNSMBLib:
-            return nsmblib.compress11LZS(bytes(tex))
-        else:
-            return lz77.LZS11().Compress11LZS(tex)
-
-
-    def PackTiles(self):
-        offset = 0
-        tilespack = struct.Struct('>8B')
-        Tilebuffer = create_string_buffer(2048)
-        for tile in Tileset.tiles:
-            tilespack.pack_into(Tilebuffer, offset, tile.byte0, tile.byte1, tile.byte2, tile.byte3, tile.byte4, tile.byte5, tile.byte6, tile.byte7)
-            offset += 8
-
-        return Tilebuffer.raw
-
-
-    def PackObjects(self):
-        objectStrings = []
-
-        o = 0
-        for object in Tileset.objects:
-
-
-            # Slopes
-            if object.upperslope[0] != 0:
-
-                # Reverse Slopes
-                if object.upperslope[0] & 0x2:
-                    a = struct.pack('>B', object.upperslope[0])
-
-                    for row in range(object.lowerslope[1], object.height):
-                        for tile in object.tiles[row]:
-                            a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                        a += b'\xfe'
-
-                    if object.height > 1 and object.lowerslope[1]:
-                        a += struct.pack('>B', object.lowerslope[0])
-
-                        for row in range(0, object.lowerslope[1]):
-                            for tile in object.tiles[row]:
-                                a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                            a += b'\xfe'
-
-                    a += b'\xff'
-
-                    objectStrings.append(a)
-
-
-                # Regular Slopes
-                else:
-                    a = struct.pack('>B', object.upperslope[0])
-
-                    for row in range(0, object.upperslope[1]):
-                        try:
-                            for tile in object.tiles[row]:
-                                a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                            a += b'\xfe'
-                        except:
-                            print(row)
-                            print(len(object.tiles))
-                            continue
-                    if object.height > 1 and object.lowerslope[1]:
-                        a += struct.pack('>B', object.lowerslope[0])
-
-                        for row in range(object.upperslope[1], object.height):
-                            for tile in object.tiles[row]:
-                                a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                            a += b'\xfe'
-
-                    a += b'\xff'
-
-                    objectStrings.append(a)
-
-
-            # Not slopes!
-            else:
-                a = b''
-
-                for tilerow in object.tiles:
-                    for tile in tilerow:
-                        a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-
-                    a += b'\xfe'
-
-                a += b'\xff'
-
-                objectStrings.append(a)
-
-            o += 1
-
-        Objbuffer = b''
-        Metabuffer = b''
-        i = 0
-        for a in objectStrings:
-            Metabuffer += struct.pack('>H2B', len(Objbuffer), Tileset.objects[i].width, Tileset.objects[i].height)
-            Objbuffer += a
-
-            i += 1
-
-        return (Objbuffer, Metabuffer)
+        return useNSMBLib
 
 
     def setupMenus(self):
@@ -6526,7 +6543,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def openRecentFile(self):
         action = self.sender()
         if action:
-            self.openTilesetFromPath(action.data())
+            self.openTilesetInBackground(action.data())
 
 
     def strippedName(self, fullFileName):
@@ -6544,32 +6561,21 @@ class MainWindow(QtWidgets.QMainWindow):
             Tileset.slot = int(item[2])
             self.tileWidget.tilesetType.setText(item)
 
-            self.updateInfo(0, 0)
-
-            cobj = 0
-            crow = 0
-            ctile = 0
             for object in Tileset.objects:
-                for row in object.tiles:
-                    for tile in row:
-                        if (tile[2] & 3) != 0 or tile[1] != 0:
-                            Tileset.objects[cobj].tiles[crow][ctile] = (tile[0], tile[1], (tile[2] & 0xFC) | int(str(item[2])))
-                        ctile += 1
-                    crow += 1
-                    ctile = 0
-                cobj += 1
-                crow = 0
-                ctile = 0
+                object.tiles.remapSlots(Tileset.slot)
+                Tileset.reindexObject(object)
 
+            ObjectThumbnails.clear()
+            self.objmodel.refresh()
 
-    def toggleAlpha(self):
-        # Replace Alpha Image with non-Alpha images in model
-        self.alpha = not self.alpha
+            self.updateInfo(0, 0)
 
-        self.setuptile()
 
-        self.tileWidget.setObject(self.objectList.currentIndex())
-        self.tileWidget.update()
+    def toggleAlpha(self):
+        # Show the cached non-Alpha pixmaps instead of the Alpha ones, or
+        # the other way round
+        self.alpha = not self.alpha
+        self.model.setAlpha(self.alpha)
 
 
     def importObjFromFile(self):
@@ -6590,101 +6596,42 @@ class MainWindow(QtWidgets.QMainWindow):
 
         dir = os.path.dirname(file)
 
-        tilelist = [[]]
-        upperslope = [0, 0]
-        lowerslope = [0, 0]
-
         metaData = open(dir + "/" + jsonData["meta"], "rb").read()
         objstrings = open(dir + "/" + jsonData["objlyt"], "rb").read()
         colls = open(dir + "/" + jsonData["colls"], "rb").read()
 
-        tilesUsed = []
-
-        pos = 0
-        while objstrings[pos] != 0xFF:
-            if objstrings[pos] & 0x80:
-                pos += 1
-                continue
-
-            tile = objstrings[pos:pos+3]
-            if tile != b'\0\0\0':
-                if tile[1] not in tilesUsed:
-                    tilesUsed.append(tile[1])
+        tiles, upperslope, lowerslope = tilesetcodec.parseLayout(objstrings)
 
-            pos += 3
+        # The tiles of the object, in order of first use in the file, where
+        # the rows of reverse slopes are stored with the lower part first
+        storedRows = tiles
+        if upperslope[0] & 0x2 and tiles:
+            split = lowerslope[1] % len(tiles)
+            storedRows = tiles[split:] + tiles[:split]
 
-        numTiles = len(tilesUsed)
+        tilesUsed = {}
+        for row in storedRows:
+            for tile in row:
+                if tile != (0, 0, 0) and tile[1] not in tilesUsed:
+                    tilesUsed[tile[1]] = len(tilesUsed)
 
-        if numTiles + len(usedTiles) > 256:
+        if len(tilesUsed) + len(usedTiles) > 256:
             QtWidgets.QMessageBox.warning(self, "Open Object",
                     "There isn't enough room for the object.",
                     QtWidgets.QMessageBox.Cancel)
             return
 
-        freeTiles = [i for i in range(256) if i not in usedTiles]
-
-        tilesUsed = {}
-
-        offset = 0
-        byte = struct.unpack_from('>B', objstrings, offset)[0]
-        i = 0
-        row = 0
-
-        while byte != 0xFF:
-
-            if byte == 0xFE:
-                tilelist.append([])
-
-                if (upperslope[0] != 0) and (lowerslope[0] == 0):
-                    upperslope[1] = upperslope[1] + 1
-
-                if lowerslope[0] != 0:
-                    lowerslope[1] = lowerslope[1] + 1
-
-                offset += 1
-                byte = struct.unpack_from('>B', objstrings, offset)[0]
-
-            elif (byte & 0x80):
-
-                if upperslope[0] == 0:
-                    upperslope[0] = byte
-                else:
-                    lowerslope[0] = byte
-
-                offset += 1
-                byte = struct.unpack_from('>B', objstrings, offset)[0]
-
-            else:
-                tileBytes = objstrings[offset:offset + 3]
-                if tileBytes == b'\0\0\0':
-                    tile = [0, 0, 0]
+        freeTiles = Tileset.getFreeTiles()
 
+        # Move the object's tiles to free tiles in this tileset's slot
+        tilelist = []
+        for row in tiles:
+            tilelist.append([])
+            for tile in row:
+                if tile == (0, 0, 0):
+                    tilelist[-1].append([0, 0, 0])
                 else:
-                    tile = []
-                    tile.append(byte)
-
-                    if tileBytes[1] not in tilesUsed:
-                        tilesUsed[tileBytes[1]] = i
-                        tile.append(freeTiles[i])
-                        i += 1
-                    else:
-                        tile.append(freeTiles[tilesUsed[tileBytes[1]]])
-
-                    byte2 = (struct.unpack_from('>B', objstrings, offset + 2)[0]) & 0xFC
-                    byte2 |= Tileset.slot
-                    tile.append(byte2)
-
-                tilelist[-1].append(tile)
-
-                offset += 3
-                byte = struct.unpack_from('>B', objstrings, offset)[0]
-
-        tilelist.pop()
-
-        if (upperslope[0] & 0x80) and (upperslope[0] & 0x2):
-            for i in range(lowerslope[1]):
-                pop = tilelist.pop()
-                tilelist.insert(0, pop)
+                    tilelist[-1].append([tile[0], freeTiles[tilesUsed[tile[1]]], (tile[2] & 0xFC) | Tileset.slot])
 
         Tileset.addObject(metaData[3], metaData[2], upperslope, lowerslope, tilelist)
 
@@ -6712,22 +6659,8 @@ class MainWindow(QtWidgets.QMainWindow):
                         tilesReplaced.append(tile[1])
 
                         Tileset.tiles[tile[1]].image = tileImage.copy(Xoffset,Yoffset,24,24).toImage()
-                        Tileset.tiles[tile[1]].byte0 = colls[colls_off]
-                        colls_off += 1
-                        Tileset.tiles[tile[1]].byte1 = colls[colls_off]
-                        colls_off += 1
-                        Tileset.tiles[tile[1]].byte2 = colls[colls_off]
-                        colls_off += 1
-                        Tileset.tiles[tile[1]].byte3 = colls[colls_off]
-                        colls_off += 1
-                        Tileset.tiles[tile[1]].byte4 = colls[colls_off]
-                        colls_off += 1
-                        Tileset.tiles[tile[1]].byte5 = colls[colls_off]
-                        colls_off += 1
-                        Tileset.tiles[tile[1]].byte6 = colls[colls_off]
-                        colls_off += 1
-                        Tileset.tiles[tile[1]].byte7 = colls[colls_off]
-                        colls_off += 1
+                        Tileset.tiles[tile[1]].behaviour[:] = colls[colls_off : colls_off + 8]
+                        colls_off += 8
 
                     painter.drawImage(Xoffset, Yoffset, Tileset.tiles[tile[1]].image)
                 Xoffset += 24
@@ -6736,9 +6669,12 @@ class MainWindow(QtWidgets.QMainWindow):
 
         painter.end()
 
-        self.setuptile()
+        self.setuptile(tilesReplaced)
 
-        self.objmodel.appendRow(QtGui.QStandardItem(QtGui.QIcon(tex), 'Object {0}'.format(count-1)))
+        ObjectThumbnails.invalidateTiles(tilesReplaced)
+        ObjectThumbnails.put(object, tex)
+
+        self.objmodel.refresh()
 
         index = self.objectList.currentIndex()
         self.objectList.setCurrentIndex(index)
@@ -6785,7 +6721,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         index = self.objectList.currentIndex()
         self.objectList.clearCurrentIndex()
-        SetupObjectModel(self.objmodel, Tileset.objects, Tileset.tiles)
+        self.objmodel.refresh()
         self.objectList.setCurrentIndex(self.objmodel.index(index.row(), index.column()))
         self.objectList.update()
 
@@ -6814,83 +6750,14 @@ class MainWindow(QtWidgets.QMainWindow):
                 for tile in object.tiles[i]:
                     if (Tileset.slot == 0) or ((tile[2] & 3) != 0):
                         painter.drawImage(Xoffset, Yoffset, Tileset.tiles[tile[1]].image)
-                    Tilebuffer += (Tileset.tiles[tile[1]].byte0).to_bytes(1, 'big')
-                    Tilebuffer += (Tileset.tiles[tile[1]].byte1).to_bytes(1, 'big')
-                    Tilebuffer += (Tileset.tiles[tile[1]].byte2).to_bytes(1, 'big')
-                    Tilebuffer += (Tileset.tiles[tile[1]].byte3).to_bytes(1, 'big')
-                    Tilebuffer += (Tileset.tiles[tile[1]].byte4).to_bytes(1, 'big')
-                    Tilebuffer += (Tileset.tiles[tile[1]].byte5).to_bytes(1, 'big')
-                    Tilebuffer += (Tileset.tiles[tile[1]].byte6).to_bytes(1, 'big')
-                    Tilebuffer += (Tileset.tiles[tile[1]].byte7).to_bytes(1, 'big')
+                    Tilebuffer += Tileset.tiles[tile[1]].behaviour
                     Xoffset += 24
                 Xoffset = 0
                 Yoffset += 24
 
             painter.end()
 
-            # Slopes
-            if object.upperslope[0] != 0:
-
-                # Reverse Slopes
-                if object.upperslope[0] & 0x2:
-                    a = struct.pack('>B', object.upperslope[0])
-
-                    if object.height == 1:
-                        iterationsA = 0
-                        iterationsB = 1
-                    else:
-                        iterationsA = object.upperslope[1]
-                        iterationsB = object.lowerslope[1] + object.upperslope[1]
-
-                    for row in range(iterationsA, iterationsB):
-                        for tile in object.tiles[row]:
-                            a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                        a += b'\xfe'
-
-                    if object.height > 1:
-                        a += struct.pack('>B', object.lowerslope[0])
-
-                        for row in range(0, object.upperslope[1]):
-                            for tile in object.tiles[row]:
-                                a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                            a += b'\xfe'
-
-                    a += b'\xff'
-
-
-                # Regular Slopes
-                else:
-                    a = struct.pack('>B', object.upperslope[0])
-
-                    #for row in range(0, object.upperslope[1]):
-                    #    for tile in object.tiles[row]:
-                    #        a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                    #    a += b'\xfe'
-
-                    if object.height > 1:
-                        a += struct.pack('>B', object.lowerslope[0])
-
-                        for row in range(object.upperslope[1], object.height):
-                            for tile in object.tiles[row]:
-                                a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                            a += b'\xfe'
-
-                    a += b'\xff'
-
-
-            # Not slopes!
-            else:
-                a = b''
-
-                for tilerow in object.tiles:
-                    for tile in tilerow:
-                        a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-
-                    a += b'\xfe'
-
-                a += b'\xff'
-
-            Objbuffer = a
+            Objbuffer = tilesetcodec.packLayout(object)
             Metabuffer = struct.pack('>HBB', (0 if count == 0 else len(Objbuffer)), object.width, object.height)
 
             if not os.path.isdir(save_path + "/" + tile_name + "_objects"):
@@ -6927,14 +6794,13 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def saveFramesheet(self, index):
         item = self.framesheetmodel.itemFromIndex(index)
-        icon = item.icon()
         name = item.text()
 
         path = QtWidgets.QFileDialog.getSaveFileName(self, 'Framesheet', '{}.png'.format(name), 'Framesheet (*.png)')[0]
         if not path: return
 
 
-        pixmap = icon.pixmap(icon.availableSizes()[0])
+        pixmap = self.frames.sheet("BG_tex/{0}.bin".format(name))
         pixmap.save(path, "PNG")
 
 
@@ -6966,83 +6832,14 @@ class MainWindow(QtWidgets.QMainWindow):
             for tile in object.tiles[i]:
                 if (Tileset.slot == 0) or ((tile[2] & 3) != 0):
                     painter.drawImage(Xoffset, Yoffset, Tileset.tiles[tile[1]].image)
-                Tilebuffer += (Tileset.tiles[tile[1]].byte0).to_bytes(1, 'big')
-                Tilebuffer += (Tileset.tiles[tile[1]].byte1).to_bytes(1, 'big')
-                Tilebuffer += (Tileset.tiles[tile[1]].byte2).to_bytes(1, 'big')
-                Tilebuffer += (Tileset.tiles[tile[1]].byte3).to_bytes(1, 'big')
-                Tilebuffer += (Tileset.tiles[tile[1]].byte4).to_bytes(1, 'big')
-                Tilebuffer += (Tileset.tiles[tile[1]].byte5).to_bytes(1, 'big')
-                Tilebuffer += (Tileset.tiles[tile[1]].byte6).to_bytes(1, 'big')
-                Tilebuffer += (Tileset.tiles[tile[1]].byte7).to_bytes(1, 'big')
+                Tilebuffer += Tileset.tiles[tile[1]].behaviour
                 Xoffset += 24
             Xoffset = 0
             Yoffset += 24
 
         painter.end()
 
-        # Slopes
-        if object.upperslope[0] != 0:
-
-            # Reverse Slopes
-            if object.upperslope[0] & 0x2:
-                a = struct.pack('>B', object.upperslope[0])
-
-                if object.height == 1:
-                    iterationsA = 0
-                    iterationsB = 1
-                else:
-                    iterationsA = object.upperslope[1]
-                    iterationsB = object.lowerslope[1] + object.upperslope[1]
-
-                for row in range(iterationsA, iterationsB):
-                    for tile in object.tiles[row]:
-                        a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                    a += b'\xfe'
-
-                if object.height > 1:
-                    a += struct.pack('>B', object.lowerslope[0])
-
-                    for row in range(0, object.upperslope[1]):
-                        for tile in object.tiles[row]:
-                            a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                        a += b'\xfe'
-
-                a += b'\xff'
-
-
-            # Regular Slopes
-            else:
-                a = struct.pack('>B', object.upperslope[0])
-
-                for row in range(0, object.upperslope[1]):
-                    for tile in object.tiles[row]:
-                        a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                    a += b'\xfe'
-
-                if object.height > 1:
-                    a += struct.pack('>B', object.lowerslope[0])
-
-                    for row in range(object.upperslope[1], object.height):
-                        for tile in object.tiles[row]:
-                            a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-                        a += b'\xfe'
-
-                a += b'\xff'
-
-
-        # Not slopes!
-        else:
-            a = b''
-
-            for tilerow in object.tiles:
-                for tile in tilerow:
-                    a += struct.pack('>BBB', tile[0], tile[1], tile[2])
-
-                a += b'\xfe'
-
-            a += b'\xff'
-
-        Objbuffer = a
+        Objbuffer = tilesetcodec.packLayout(object)
         Metabuffer = struct.pack('>HBB', (0 if n == 0 else len(Objbuffer)), object.width, object.height)
 
         if not os.path.isdir(save_path + "/" + tile_name + "_objects"):
@@ -7077,10 +6874,10 @@ class MainWindow(QtWidgets.QMainWindow):
     def clearObjects(self):
         '''Clears the object data'''
 
-        Tileset.objects = []
+        Tileset.clearObjects()
         Tileset.animdata = {}
 
-        SetupObjectModel(self.objmodel, Tileset.objects, Tileset.tiles)
+        self.objmodel.refresh()
         SetupFramesheetModel(self, Tileset.animdata)
 
 
@@ -7092,15 +6889,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def clearCollisions(self):
         '''Clears the collisions data'''
 
-        for tile in Tileset.tiles:
-            tile.byte0 = 0
-            tile.byte1 = 0
-            tile.byte2 = 0
-            tile.byte3 = 0
-            tile.byte4 = 0
-            tile.byte5 = 0
-            tile.byte6 = 0
-            tile.byte7 = 0
+        Tileset.clearBehaviours()
 
         self.updateInfo(0, 0)
         self.tileDisplay.update()
@@ -7122,8 +6911,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Object List
         self.objectList = objectList()
-        self.objmodel = QtGui.QStandardItemModel()
-        SetupObjectModel(self.objmodel, Tileset.objects, Tileset.tiles)
+        self.objmodel = ObjectListModel(self)
+        self.objmodel.refresh()
         self.objectList.setModel(self.objmodel)
 
         self.importObject = QtWidgets.QPushButton('Import Object')
@@ -7146,7 +6935,7 @@ class MainWindow(QtWidgets.QMainWindow):
         # Framesheet List
         self.framesheetList = framesheetList()
         self.framesheetmodel = QtGui.QStandardItemModel()
-        self.frames = {}
+        self.frames = FramesheetCache()
         SetupFramesheetModel(self, Tileset.animdata)
         self.framesheetList.setModel(self.framesheetmodel)
 
@@ -7182,9 +6971,25 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tabWidget.addTab(self.plantOverwriteEditor, "PlantTiles")
         self.tabWidget.addTab(self.profileOverwriteEditor, "ProfileTiles")
 
+        # Hovering over the palette updates the info panel at most once
+        # per frame, see tileHovered()
+        self.hoverPos = None
+        self.infoKey = None
+        self.tileInfoCache = {}
+        self.infoTimer = QtCore.QTimer(self)
+        self.infoTimer.setSingleShot(True)
+        self.infoTimer.setInterval(displayWidget.RepaintInterval)
+        self.infoTimer.timeout.connect(self.updateHoveredInfo)
+
+        # The panel shows the objects using the tile and moves the current
+        # index, so fill it in again after those change
+        for signal in (self.objmodel.dataChanged, self.objmodel.rowsInserted, self.objmodel.rowsRemoved, self.objmodel.modelReset,
+                       self.tileDisplay.selectionModel().currentChanged, self.tabWidget.currentChanged):
+            signal.connect(self.invalidateInfo)
+
         # Connections do things!
         self.tileDisplay.clicked.connect(self.paintFormat)
-        self.tileDisplay.mouseMoved.connect(self.updateInfo)
+        self.tileDisplay.mouseMoved.connect(self.tileHovered)
         self.tileDisplay.rightClicked.connect(self.editHexData)
         self.objectList.selectionModel().currentChanged.connect(self.tileWidget.setObject)
         self.objectList.doubleClicked.connect(self.saveObject)
@@ -7214,21 +7019,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setCentralWidget(frame)
 
 
-    def updateInfo(self, x, y, noRecursion = False, realIndex = None):
-        index = [self.tileDisplay.indexAt(QtCore.QPoint(x, y))]
-        
-        if not noRecursion:
-            if app.mouseButtons() == QtCore.Qt.LeftButton:
-                if not index[0].column() == -1:
-                    self.paintFormat(index[0])
-        else:
-            index[0] = realIndex
-        
-        if self.tabWidget.currentIndex() != 1:
-            self.tileDisplay.setCurrentIndex(index[0])
-        
-        curTile = Tileset.tiles[index[0].row()]
-        info = self.infoDisplay
+    def tileInfo(self, curTile):
+        '''Works out what the info panel shows for a tile's behaviours:
+        the core type, terrain type and parameter as (pixmap, text) pairs,
+        then the property and hex data texts. These only depend on the
+        behaviour bytes, so they're cached by them.'''
+        key = bytes(curTile.behaviour)
+        if key in self.tileInfoCache:
+            return self.tileInfoCache[key]
+
         palette = self.paletteWidget
 
         propertyList = []
@@ -7300,38 +7099,109 @@ class MainWindow(QtWidgets.QMainWindow):
                 parameter[1].fill(Qt.transparent)
 
         try:
-            info.coreImage.setPixmap(palette.coreTypes[coreType][1].pixmap(24,24))
-            info.coreInfo.setText(palette.coreTypes[coreType][0])
+            coreInfo = (palette.coreTypes[coreType][1].pixmap(24,24), palette.coreTypes[coreType][0])
         except:
-            info.coreImage.clear()
-            info.coreInfo.setText("Unknown")
+            coreInfo = (None, "Unknown")
         try:
-            info.terrainImage.setPixmap(palette.terrainTypes[curTile.byte5][1].pixmap(24,24))
-            info.terrainInfo.setText(palette.terrainTypes[curTile.byte5][0])
+            terrainInfo = (palette.terrainTypes[curTile.byte5][1].pixmap(24,24), palette.terrainTypes[curTile.byte5][0])
         except:
-            info.terrainImage.clear()
-            info.terrainInfo.setText("Unknown")
+            terrainInfo = (None, "Unknown")
         try:
-            info.parameterImage.setPixmap(parameter[1].pixmap(24,24))
-            info.paramInfo.setText(parameter[0])
+            paramInfo = (parameter[1].pixmap(24,24), parameter[0])
         except:
-            info.parameterImage.clear()
-            info.paramInfo.setText("Unknown")
+            paramInfo = (None, "Unknown")
+
+        hexText = 'Hex Data: {0} {1} {2} {3} {4} {5} {6} {7}'.format(
+                        hex(curTile.byte0), hex(curTile.byte1), hex(curTile.byte2), hex(curTile.byte3),
+                        hex(curTile.byte4), hex(curTile.byte5), hex(curTile.byte6), hex(curTile.byte7))
+
+        # Every distinct set of behaviours ever hovered is kept, so start
+        # over once there are a lot of them
+        if len(self.tileInfoCache) >= 1024:
+            self.tileInfoCache.clear()
+
+        tileInfo = (coreInfo, terrainInfo, paramInfo, "Properties:\n{0}".format(propertyText), hexText)
+        self.tileInfoCache[key] = tileInfo
+        return tileInfo
+
+
+    def tileHovered(self, x, y):
+        '''Called for every mouse move over the palette. Dragging with the
+        left button paints behaviours straight away; otherwise the info
+        panel is updated on the next frame, for wherever the mouse is then.'''
+        if app.mouseButtons() == QtCore.Qt.LeftButton:
+            index = self.tileDisplay.indexAt(QtCore.QPoint(x, y))
+            if not index.column() == -1:
+                self.paintFormat(index)
+                return
 
+        self.hoverPos = (x, y)
+        if not self.infoTimer.isActive():
+            self.infoTimer.start()
 
-        info.propertyInfo.setText("Properties:\n{0}".format(propertyText))
+
+    def updateHoveredInfo(self):
+        x, y = self.hoverPos
+        index = self.tileDisplay.indexAt(QtCore.QPoint(x, y))
+
+        # Nothing to do if the panel already shows this tile as it is
+        if self.infoKey == (index.row(), bytes(Tileset.tiles[index.row()].behaviour)):
+            return
+
+        self.updateInfo(x, y, noRecursion = True, realIndex = index)
+
+
+    def invalidateInfo(self, *args):
+        '''Makes the next hover update fill in the info panel again, even
+        for the same tile'''
+        self.infoKey = None
+
+
+    def updateInfo(self, x, y, noRecursion = False, realIndex = None):
+        index = [self.tileDisplay.indexAt(QtCore.QPoint(x, y))]
         
+        if not noRecursion:
+            if app.mouseButtons() == QtCore.Qt.LeftButton:
+                if not index[0].column() == -1:
+                    self.paintFormat(index[0])
+        else:
+            index[0] = realIndex
+        
+        if self.tabWidget.currentIndex() != 1:
+            self.tileDisplay.setCurrentIndex(index[0])
+        
+        curTile = Tileset.tiles[index[0].row()]
+        info = self.infoDisplay
+        self.infoKey = (index[0].row(), bytes(curTile.behaviour))
 
+        coreInfo, terrainInfo, paramInfo, propertyText, hexText = self.tileInfo(curTile)
+
+        for image, label, (pixmap, text) in ((info.coreImage, info.coreInfo, coreInfo),
+                                             (info.terrainImage, info.terrainInfo, terrainInfo),
+                                             (info.parameterImage, info.paramInfo, paramInfo)):
+            if pixmap is None:
+                image.clear()
+            else:
+                image.setPixmap(pixmap)
+            label.setText(text)
 
-        info.hexdata.setText('Hex Data: {0} {1} {2} {3} {4} {5} {6} {7}'.format(
-                                hex(curTile.byte0), hex(curTile.byte1), hex(curTile.byte2), hex(curTile.byte3),
-                                hex(curTile.byte4), hex(curTile.byte5), hex(curTile.byte6), hex(curTile.byte7)))
+        info.propertyInfo.setText(propertyText)
+        info.hexdata.setText(hexText)
 
         column = index[0].row() % 16
         row = index[0].row() // 16
         if 0 <= row <= 15 and 0 <= column <= 15:
             info.numInfo.setText('Slot: %X Row: 0x%X Column: 0x%X' % (Tileset.slot, row, column))
 
+        users = Tileset.getObjectsUsingTile(index[0].row())
+        if users:
+            objects = [str(i) for i, object in enumerate(Tileset.objects) if object in users]
+            if len(objects) > 8:
+                objects[8:] = ['... (%d more)' % (len(objects) - 8)]
+            info.usageInfo.setText('Used by objects: ' + ', '.join(objects))
+        else:
+            info.usageInfo.setText('Not used by any object')
+
 
     def editHexData(self, x, y):
         self.index = [self.tileDisplay.indexAt(QtCore.QPoint(x, y))][0]
@@ -7427,6 +7297,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         curTile = Tileset.tiles[index.row()]
         palette = self.paletteWidget
+        previous = bytes(curTile.behaviour)
 
         if palette.coreWidgets[8].isChecked() == 1 or palette.propertyWidgets[0].isChecked() == 1:
             solid = 1
@@ -7472,7 +7343,9 @@ class MainWindow(QtWidgets.QMainWindow):
             curTile.byte7 = palette.parameters.currentIndex()
 
         self.updateInfo(0, 0, noRecursion = True, realIndex = index)
-        self.tileDisplay.update()
+
+        if curTile.behaviour != previous:
+            self.tileDisplay.tileChanged(index.row())
 
 
 
@@ -7483,6 +7356,12 @@ def osExit(self):
     os._exit(0)
 
 
+# In the frozen build, worker processes of -export-all and -build start
+# the executable again as __main__ without those arguments; this runs
+# the worker and exits before it can get to the command line or the GUI
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
 if '-nolib' in sys.argv:
     HaveNSMBLib = False
     sys.argv.remove('-nolib')
@@ -7492,43 +7371,97 @@ if '-split' in sys.argv:
     sys.argv.remove('-split')
 
 # export all .arc files from -export-all folder to -out folder as .png
-# -export-all specifies an input path for .arc files and -out the output path for .png files
-if '-export-all' in sys.argv and '-out' in sys.argv:
+# -export-all specifies an input path for .arc files and -out the output path for .png files,
+# which get the same subfolders as the .arc files
+# -jobs optionally sets the number of worker processes (default: one per CPU)
+# Worker processes re-import this file as __mp_main__ on platforms that
+# spawn them, so only the parent process may handle the command line.
+if __name__ == '__mp_main__':
+    pass
+
+elif '-export-all' in sys.argv and '-out' in sys.argv:
     import sys
+    import tools.export as export
     try:
         inputPath = os.path.normpath(sys.argv[sys.argv.index('-export-all') + 1])
         outputPath = os.path.normpath(sys.argv[sys.argv.index('-out') + 1])
+        jobs = int(sys.argv[sys.argv.index('-jobs') + 1]) if '-jobs' in sys.argv else None
         if not os.path.isdir(inputPath):
             raise Exception("Input path does not exist")
         if not os.path.isdir(outputPath):
             os.makedirs(outputPath)
 
-        app = QtWidgets.QApplication(sys.argv)
+        # Each arc is exported on its own by a worker process with
+        # tilesetcodec, so no QApplication or MainWindow is needed, and
+        # one bad file doesn't stop the others
+        summary = export.exportAll(inputPath, outputPath, jobs, HaveNSMBLib)
 
-        window = MainWindow()
+        print("Exported {0}, skipped {1} unchanged and failed {2} of {3} files in {4:.2f}s".format(
+            summary['exported'], summary['skipped'], summary['failed'], summary['total'], summary['seconds']))
+        print("Summary written to {0}".format(os.path.join(outputPath, export.SUMMARY_NAME)))
 
-        window.setAttribute(Qt.WA_DeleteOnClose)
-        window.destroyed.connect(osExit)
-
-        try:
-            for root, dirs, files in os.walk(inputPath):
-                for file in files:
-                    if file.endswith('.arc'):
-                        print(f"Exporting: {file} to {outputPath}")
-                        window.openTilesetFromPath(os.path.join(root, file), suppressSlotWarning=True)
-                        window.saveImage(os.path.join(outputPath, file.replace('.arc', '.png')))
-        except Exception as e:
-            print(f"Error exporting {file}: {e}")
-
-        os._exit(0) # exit the program after exporting all .arc files
+        os._exit(1 if summary['failed'] else 0) # exit the program after exporting all .arc files
 
     except Exception as e:
         print("Error: {}".format(e))
         #print("Error: -export-all and -out arguments must be directly followed by a path")
         os._exit(1)
         
-elif '-export-all' in sys.argv or '-out' in sys.argv:
-    print("Error: -export-all and -out arguments must be used together, each directly followed by a path")
+# build .arc files from the tileset source folders in -build to the -out folder
+# -jobs optionally sets the number of worker processes (default: one per CPU)
+# -dedupe-objects lets objects with identical layouts share them in the arcs
+# -no-extend-edges turns off the fix for transparent tile edges that is
+# applied by default, like "extend edges" when importing an image
+elif '-build' in sys.argv and '-out' in sys.argv:
+    import tools.build as build
+    try:
+        inputPath = os.path.normpath(sys.argv[sys.argv.index('-build') + 1])
+        outputPath = os.path.normpath(sys.argv[sys.argv.index('-out') + 1])
+        jobs = int(sys.argv[sys.argv.index('-jobs') + 1]) if '-jobs' in sys.argv else None
+        if not os.path.isdir(inputPath):
+            raise Exception("Input path does not exist")
+        if not os.path.isdir(outputPath):
+            os.makedirs(outputPath)
+
+        converters = {
+            'AnimTiles.txt': ('animTilesBin', AnimTilesTextToBin),
+            'RandTiles.xml': ('randTilesBin', RandTilesXmlToBin),
+        }
+        summary = build.buildAll(inputPath, outputPath, jobs, HaveNSMBLib, converters, '-dedupe-objects' in sys.argv, '-no-extend-edges' not in sys.argv)
+
+        print("Built {0}, skipped {1} up to date and failed {2} of {3} tilesets in {4:.2f}s".format(
+            summary['built'], summary['skipped'], summary['failed'], summary['total'], summary['seconds']))
+        print("Summary written to {0}".format(os.path.join(outputPath, build.SUMMARY_NAME)))
+
+        os._exit(1 if summary['failed'] else 0)
+
+    except Exception as e:
+        print("Error: {}".format(e))
+        os._exit(1)
+
+# clamp the unclamped framesheet given by -clamp and save it to -out, without starting the GUI
+elif '-clamp' in sys.argv and '-out' in sys.argv:
+    try:
+        inputPath = os.path.normpath(sys.argv[sys.argv.index('-clamp') + 1])
+        outputPath = os.path.normpath(sys.argv[sys.argv.index('-out') + 1])
+
+        framesheet = QtGui.QImage()
+        if not framesheet.load(inputPath):
+            raise Exception("The framesheet file could not be loaded")
+        if framesheet.height() % framesheet.width() != 0:
+            print("Warning: the height of {0} is not a multiple of its width".format(inputPath))
+
+        if not ClampFramesheet(framesheet).save(outputPath, "PNG"):
+            raise Exception("The clamped framesheet could not be saved")
+
+        os._exit(0)
+
+    except Exception as e:
+        print("Error: {}".format(e))
+        os._exit(1)
+
+elif '-export-all' in sys.argv or '-build' in sys.argv or '-clamp' in sys.argv or '-out' in sys.argv:
+    print("Error: -export-all, -build or -clamp and -out arguments must be used together, each directly followed by a path")
     sys.exit(1)
 
 
@@ -7550,9 +7483,9 @@ if __name__ == '__main__':
     window.setAttribute(Qt.WA_DeleteOnClose)
     window.destroyed.connect(osExit)
 
-    if len(sys.argv) > 1:
-        window.openTilesetFromPath(sys.argv[1])
     window.show()
+    if len(sys.argv) > 1:
+        window.openTilesetInBackground(sys.argv[1])
 
     sys.exit(app.exec_())
     app.deleteLater()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+# build.py
+# Batch builder for the -build command line mode. Builds tileset arcs
+# from folders of source files on a pool of worker processes, only
+# rebuilding the tilesets whose sources changed since the last run.
+#
+# Every folder in the source path with a tiles.png in it is a tileset,
+# named after the folder, and may contain:
+#
+#   tiles.png            384x384 image of the 256 tiles (required)
+#   behaviours.bin       256 8-byte tile behaviours (default: all zero)
+#   objects.bin          object layouts (default: no objects)
+#   objects_hd.bin       object metadata, needed with objects.bin
+#   anim/*.bin           framesheets, stored as BG_tex/*.bin
+#   AnimTiles.bin/.txt   AnimTiles
+#   RandTiles.bin/.xml   RandTiles
+#   PlantTiles.json      grass and flower overrides
+#   ProfileTiles.json    profile overrides
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+
+from tools import grass, profoverride
+from tools import texture
+from tools import tileset as tilesetcodec
+from tools.export import loadManifest, writeJSON
+
+try:
+    from PyQt5 import QtGui
+except ImportError:
+    from PySide2 import QtGui
+
+# Bump this whenever the arcs built from the same sources would change,
+# e.g. when the texture encoder or the packing in texture.py, tileset.py
+# or this file change, so that existing arcs are rebuilt
+BUILD_VERSION = 1
+
+MANIFEST_NAME = 'build-manifest.json'
+SUMMARY_NAME = 'build-summary.json'
+SHEET_NAME = 'tiles.png'
+
+# Source files that need converting, and the tileset field they end up
+# in. The text formats of AnimTiles and RandTiles are handled by the
+# converters passed to buildAll().
+CONVERTERS = {
+    'AnimTiles.bin': ('animTilesBin', bytes),
+    'RandTiles.bin': ('randTilesBin', bytes),
+    'PlantTiles.json': ('plantOverrides', lambda data: grass.encode(json.loads(data))),
+    'ProfileTiles.json': ('profileOverrides', lambda data: profoverride.encode(json.loads(data))),
+}
+
+
+def findTilesets(sourcePath: str) -> list:
+    return sorted(entry.name for entry in os.scandir(sourcePath)
+        if entry.is_dir() and os.path.isfile(os.path.join(entry.path, SHEET_NAME)))
+
+
+def findSources(folder: str) -> list:
+    """
+    Returns the paths of all files in a tileset folder, relative to it.
+    These are the inputs that decide whether the tileset is rebuilt.
+    """
+    sources = []
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for file in sorted(files):
+            sources.append(os.path.relpath(os.path.join(root, file), folder).replace(os.sep, '/'))
+
+    return sources
+
+
+def hashSources(folder: str) -> dict:
+    hashes = {}
+    for source in findSources(folder):
+        with open(os.path.join(folder, source), 'rb') as file:
+            hashes[source] = hashlib.sha1(file.read()).hexdigest()
+
+    return hashes
+
+
+def readSources(folder: str, converters: dict) -> dict:
+    """
+    Reads and converts everything in a tileset folder except the tile
+    image, which is left to the worker process.
+    """
+    def read(source):
+        with open(os.path.join(folder, source), 'rb') as file:
+            return file.read()
+
+    sources = findSources(folder)
+    fields = {'animdata': {}}
+
+    for source in sources:
+        if source in converters:
+            field, convert = converters[source]
+            fields[field] = convert(read(source))
+        elif source.startswith('anim/') and source.endswith('.bin'):
+            fields['animdata']['BG_tex/' + source[5:]] = read(source)
+
+    if 'behaviours.bin' in sources:
+        fields['behaviours'] = tilesetcodec.unpackBehaviours(read('behaviours.bin'))
+
+    if 'objects.bin' in sources:
+        if 'objects_hd.bin' not in sources:
+            raise ValueError('objects.bin needs an objects_hd.bin next to it')
+        fields['objects'] = tilesetcodec.unpackObjects(read('objects.bin'), read('objects_hd.bin'))
+
+    return fields
+
+
+def buildArc(name: str, sheetPath: str, fields: dict, arcPath: str, useNSMBLib: bool = None, dedupeObjects: bool = False, fixEdges: bool = True) -> dict:
+    """
+    Builds one tileset arc from its tile image and the fields returned
+    by readSources(). Unless fixEdges is False, the tile edges get the
+    same transparency fix as importing an image in the editor with
+    "extend edges" on. Never raises; failures are returned in the
+    "error" field of the record instead.
+    """
+    start = time.perf_counter()
+    record = {'arc': arcPath, 'arcSize': None, 'seconds': None, 'error': None}
+
+    try:
+        sheet = QtGui.QImage(sheetPath)
+        if sheet.isNull():
+            raise ValueError('{0} could not be loaded'.format(SHEET_NAME))
+        if sheet.width() != 384 or sheet.height() != 384:
+            raise ValueError('{0} must be 384x384 pixels'.format(SHEET_NAME))
+
+        sheet = sheet.convertToFormat(QtGui.QImage.Format_ARGB32)
+        data = bytearray(sheet.constBits().asstring(384 * 384 * 4))
+        if fixEdges:
+            texture.fixTransparentEdges(data, 384, 384)
+
+        tileset = tilesetcodec.Tileset()
+        tileset.tiles = tilesetcodec.splitSheet(data)
+        for field, value in fields.items():
+            setattr(tileset, field, value)
+
+        arc = tilesetcodec.save(tileset, name, useNSMBLib, dedupeObjects)
+
+        with open(arcPath + '.tmp', 'wb') as file:
+            file.write(arc)
+        os.replace(arcPath + '.tmp', arcPath)
+
+        record['arcSize'] = len(arc)
+
+    except Exception as e:
+        record['error'] = '{0}: {1}'.format(type(e).__name__, e)
+
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def buildAll(sourcePath: str, outputPath: str, jobs: int = None, useNSMBLib: bool = None, converters: dict = None, dedupeObjects: bool = False, fixEdges: bool = True, log=print) -> dict:
+    """
+    Builds an arc in outputPath for every tileset folder in sourcePath,
+    using up to `jobs` worker processes (default: one per CPU).
+
+    The manifest from the previous run records the hash of every source
+    file of every tileset; a tileset is only rebuilt if a source file
+    was added, removed or changed, if the compressor, dedupeObjects,
+    fixEdges or BUILD_VERSION changed, or if its arc is missing.
+    `converters` adds to CONVERTERS.
+
+    Writes the updated manifest and a JSON summary of per-tileset
+    timings, sizes and errors to outputPath, and returns the summary.
+    """
+    start = time.perf_counter()
+
+    allConverters = dict(CONVERTERS)
+    allConverters.update(converters or {})
+
+    manifestPath = os.path.join(outputPath, MANIFEST_NAME)
+    manifest = loadManifest(manifestPath)
+
+    records = []
+    pending = []
+    for name in findTilesets(sourcePath):
+        folder = os.path.join(sourcePath, name)
+        arcPath = os.path.join(outputPath, name + '.arc')
+
+        try:
+            inputs = hashSources(folder)
+            entry = {'inputs': inputs, 'nsmblib': bool(useNSMBLib), 'dedupeObjects': dedupeObjects, 'fixEdges': fixEdges, 'version': BUILD_VERSION}
+
+            if manifest.get(name) == entry and os.path.isfile(arcPath):
+                log("Skipping: {0} (up to date)".format(name))
+                records.append({'name': name, 'arc': arcPath, 'skipped': True, 'error': None})
+                continue
+
+            fields = readSources(folder, allConverters)
+
+        except Exception as e:
+            record = {'name': name, 'arc': arcPath, 'skipped': False, 'seconds': None, 'error': '{0}: {1}'.format(type(e).__name__, e)}
+            log("Error building {0}: {1}".format(name, record['error']))
+            records.append(record)
+            manifest.pop(name, None)
+            continue
+
+        pending.append((name, folder, arcPath, fields, entry))
+
+    if pending:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {}
+            for name, folder, arcPath, fields, entry in pending:
+                future = pool.submit(buildArc, name, os.path.join(folder, SHEET_NAME), fields, arcPath, useNSMBLib, dedupeObjects, fixEdges)
+                futures[future] = (name, arcPath, entry)
+
+            for future in concurrent.futures.as_completed(futures):
+                name, arcPath, entry = futures[future]
+
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # The worker process itself died
+                    record = {'arc': arcPath, 'seconds': None, 'error': '{0}: {1}'.format(type(e).__name__, e)}
+
+                record['name'] = name
+                record['skipped'] = False
+                records.append(record)
+
+                if record['error'] is None:
+                    log("Built: {0} ({1:.2f}s)".format(arcPath, record['seconds']))
+                    manifest[name] = entry
+                else:
+                    log("Error building {0}: {1}".format(name, record['error']))
+                    manifest.pop(name, None)
+
+                # Saved after every tileset, so an interrupted run can resume
+                writeJSON(manifestPath, manifest)
+
+    writeJSON(manifestPath, manifest)
+
+    records.sort(key=lambda record: record['name'])
+
+    summary = {
+        'input': sourcePath,
+        'output': outputPath,
+        'jobs': jobs or os.cpu_count(),
+        'total': len(records),
+        'built': sum(1 for record in records if not record['skipped'] and record['error'] is None),
+        'skipped': sum(1 for record in records if record['skipped']),
+        'failed': sum(1 for record in records if record['error'] is not None),
+        'seconds': round(time.perf_counter() - start, 4),
+        'files': records,
+    }
+
+    writeJSON(os.path.join(outputPath, SUMMARY_NAME), summary)
+
+    return summary
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+# decodecache.py
+# On-disk cache of decoded tilesets, so that reopening an arc doesn't
+# have to decompress and decode its texture and parse its objects again.
+
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+
+from tools import tileset as tilesetcodec
+
+# Bump this whenever the decoders or the file layout below change, so
+# that old cache files are never used
+CACHE_VERSION = 2
+
+MAGIC = b'PZDC'
+HEADER_STRUCT = struct.Struct('>4sII12x')
+TEXTURE_SIZE = tilesetcodec.TEXTURE_WIDTH * tilesetcodec.TEXTURE_HEIGHT * 4
+EXTENSION = '.cache'
+
+# File layout:
+#   header        magic, version, size of the marshalled tables
+#   texture       1024x256 ARGB32
+#   noalpha       1024x256 ARGB32, without alpha
+#   tables        marshal of (behaviours, objects)
+
+
+class DecodeCache:
+    """
+    A folder of decoded tilesets, keyed by the hash of the arc and the
+    cache version. Hits are read through a map that's closed before they
+    are returned, so no cache file stays open (which would stop it being
+    replaced or evicted on Windows). Once the folder is over maxBytes,
+    the least recently used files are deleted; a maxBytes of 0 turns the
+    cache off.
+    """
+    def __init__(self, path: str, maxBytes: int):
+        self.path = path
+        self.maxBytes = maxBytes
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxBytes > 0
+
+
+    def key(self, data: bytes) -> str:
+        return hashlib.sha1(b'%d:' % CACHE_VERSION + data).hexdigest()
+
+
+    def filename(self, key: str) -> str:
+        return os.path.join(self.path, key + EXTENSION)
+
+
+    def load(self, key: str):
+        """
+        Returns (texture, noalpha, behaviours, objects) for the key, or
+        None on a miss. The textures are bytes.
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            with open(self.filename(key), 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, version, tablesSize = HEADER_STRUCT.unpack_from(mapped)
+                if magic != MAGIC or version != CACHE_VERSION or len(mapped) != HEADER_STRUCT.size + 2 * TEXTURE_SIZE + tablesSize:
+                    return None
+
+                # Slicing the map copies, so nothing refers to it once
+                # it's closed
+                offs = HEADER_STRUCT.size
+                texture = mapped[offs : offs + TEXTURE_SIZE]
+                noalpha = mapped[offs + TEXTURE_SIZE : offs + 2 * TEXTURE_SIZE]
+                behaviours, objects = marshal.loads(mapped[offs + 2 * TEXTURE_SIZE:])
+
+            # Refresh the modification time, which eviction goes by
+            os.utime(self.filename(key))
+
+        except (OSError, ValueError, EOFError, TypeError, struct.error):
+            return None
+
+        return texture, noalpha, behaviours, [tilesetcodec.Object(*object) for object in objects]
+
+
+    def store(self, key: str, texture, noalpha, behaviours: bytes, objects: list):
+        """
+        Writes a decoded tileset to the cache, then evicts old files if
+        the cache got too big. Errors are ignored; the cache is only an
+        optimisation.
+        """
+        if not self.enabled:
+            return
+
+        tempName = None
+
+        try:
+            tables = marshal.dumps((bytes(behaviours), [(o.height, o.width, o.upperslope, o.lowerslope, o.tiles) for o in objects]))
+
+            # Every writer gets its own temporary file, as two opens of
+            # the same arc can be storing it at the same time
+            os.makedirs(self.path, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.path, suffix='.tmp', delete=False) as file:
+                tempName = file.name
+                file.write(HEADER_STRUCT.pack(MAGIC, CACHE_VERSION, len(tables)))
+                file.write(texture)
+                file.write(noalpha)
+                file.write(tables)
+            os.replace(tempName, self.filename(key))
+            tempName = None
+
+            self.evict()
+
+        except (OSError, ValueError, TypeError):
+            pass
+
+        finally:
+            if tempName is not None:
+                try:
+                    os.remove(tempName)
+                except OSError:
+                    pass
+
+
+    def evict(self):
+        """
+        Deletes the least recently used files until the cache fits in
+        maxBytes.
+        """
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # Still open somewhere (on Windows); try again next time
+                pass
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+# export.py
+# Batch exporter for the -export-all command line mode. Exports every
+# tileset arc under a folder to PNG on a pool of worker processes,
+# skipping arcs that haven't changed since the last run.
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+
+from tools import tileset as tilesetcodec
+
+try:
+    from PyQt5 import QtGui
+except ImportError:
+    from PySide2 import QtGui
+
+MANIFEST_NAME = 'export-manifest.json'
+SUMMARY_NAME = 'export-summary.json'
+
+
+def hashArc(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def exportArc(arcPath: str, pngPath: str, useNSMBLib: bool = None) -> dict:
+    """
+    Exports one tileset arc to PNG. Never raises; failures are returned
+    in the "error" field of the record instead.
+    """
+    start = time.perf_counter()
+    record = {'arc': arcPath, 'png': pngPath, 'hash': None, 'arcSize': None, 'pngSize': None, 'seconds': None, 'error': None}
+
+    try:
+        os.makedirs(os.path.dirname(pngPath), exist_ok=True)
+
+        with open(arcPath, 'rb') as file:
+            data = file.read()
+        record['hash'] = hashArc(data)
+        record['arcSize'] = len(data)
+
+        tileset = tilesetcodec.load(data, useNSMBLib)
+
+        image = QtGui.QImage(tilesetcodec.exportImage(tileset.tiles), 384, 384, QtGui.QImage.Format_ARGB32)
+        if not image.save(pngPath, 'PNG'):
+            raise OSError('the image could not be saved')
+
+        record['pngSize'] = os.path.getsize(pngPath)
+
+    except Exception as e:
+        record['error'] = '{0}: {1}'.format(type(e).__name__, e)
+
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def findArcs(inputPath: str) -> list:
+    arcs = []
+    for root, dirs, files in os.walk(inputPath):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith('.arc'):
+                arcs.append(os.path.join(root, file))
+
+    return arcs
+
+
+def loadManifest(path: str) -> dict:
+    """
+    Reads a manifest from a previous run. A missing or broken manifest
+    gives an empty one, and entries that aren't objects are left out,
+    so those files are simply processed again.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(manifest, dict):
+        return {}
+
+    return {key: entry for key, entry in manifest.items() if isinstance(entry, dict)}
+
+
+def writeJSON(path: str, data: dict):
+    # Write to a temporary file first, so that an interrupted run never
+    # leaves a truncated manifest behind
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def exportAll(inputPath: str, outputPath: str, jobs: int = None, useNSMBLib: bool = None, log=print) -> dict:
+    """
+    Exports every arc under inputPath to a PNG of the same name and
+    relative path in outputPath, using up to `jobs` worker processes (default: one per
+    CPU). Arcs whose hash matches the manifest from the previous run,
+    and whose PNG still exists, are skipped.
+
+    Writes the updated manifest and a JSON summary of per-file timings,
+    sizes and errors to outputPath, and returns the summary.
+    """
+    start = time.perf_counter()
+
+    manifestPath = os.path.join(outputPath, MANIFEST_NAME)
+    manifest = loadManifest(manifestPath)
+
+    records = []
+    pending = []
+    for arcPath in findArcs(inputPath):
+        key = os.path.relpath(arcPath, inputPath).replace(os.sep, '/')
+
+        # Arcs in subfolders go to the same subfolders of outputPath, so
+        # arcs with the same name in different folders don't collide
+        pngPath = os.path.join(outputPath, key[:-len('.arc')] + '.png')
+
+        previous = manifest.get(key)
+        if previous is not None and os.path.isfile(pngPath):
+            try:
+                with open(arcPath, 'rb') as file:
+                    unchanged = hashArc(file.read()) == previous.get('hash')
+            except OSError:
+                unchanged = False
+
+            if unchanged:
+                log("Skipping: {0} (unchanged)".format(key))
+                records.append({'key': key, 'arc': arcPath, 'png': pngPath, 'hash': previous['hash'], 'skipped': True, 'error': None})
+                continue
+
+        pending.append((key, arcPath, pngPath))
+
+    if pending:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(exportArc, arcPath, pngPath, useNSMBLib): (key, arcPath, pngPath) for key, arcPath, pngPath in pending}
+
+            for future in concurrent.futures.as_completed(futures):
+                key, arcPath, pngPath = futures[future]
+
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # The worker process itself died
+                    record = {'arc': arcPath, 'png': pngPath, 'hash': None, 'seconds': None, 'error': '{0}: {1}'.format(type(e).__name__, e)}
+
+                record['key'] = key
+                record['skipped'] = False
+                records.append(record)
+
+                if record['error'] is None:
+                    log("Exported: {0} to {1} ({2:.2f}s)".format(key, record['png'], record['seconds']))
+                    manifest[key] = {'hash': record['hash'], 'png': os.path.relpath(record['png'], outputPath).replace(os.sep, '/')}
+                else:
+                    log("Error exporting {0}: {1}".format(key, record['error']))
+                    manifest.pop(key, None)
+
+                # Saved after every file, so an interrupted run can resume
+                writeJSON(manifestPath, manifest)
+
+    writeJSON(manifestPath, manifest)
+
+    records.sort(key=lambda record: record['key'])
+
+    summary = {
+        'input': inputPath,
+        'output': outputPath,
+        'jobs': jobs or os.cpu_count(),
+        'total': len(records),
+        'exported': sum(1 for record in records if not record['skipped'] and record['error'] is None),
+        'skipped': sum(1 for record in records if record['skipped']),
+        'failed': sum(1 for record in records if record['error'] is not None),
+        'seconds': round(time.perf_counter() - start, 4),
+        'files': records,
+    }
+
+    writeJSON(os.path.join(outputPath, SUMMARY_NAME), summary)
+
+    return summary
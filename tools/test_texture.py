@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# test_texture.py
+# Parity tests for the RGB4A3 encoder in texture.py, against the
+# per-pixel encoder it replaced. Run with: python -m unittest tools.test_texture
+
+import random
+import struct
+import unittest
+
+from tools import texture
+
+
+def referenceEncodeRGB4A3(data: bytes, width: int, height: int) -> bytes:
+    """
+    The old encoder: walks the 4x4 texel blocks pixel by pixel and
+    converts each BGRA pixel on its own.
+    """
+    shorts = []
+    for ytile in range(0, height, 4):
+        for xtile in range(0, width, 4):
+            for ypixel in range(ytile, ytile + 4):
+                for xpixel in range(xtile, xtile + 4):
+                    offs = (ypixel * width + xpixel) * 4
+                    b, g, r, a = data[offs : offs + 4]
+
+                    if a < 238:  # RGB4A3
+                        a = ((a + 18) << 1) // 73
+                        r = (r + 8) // 17
+                        g = (g + 8) // 17
+                        b = (b + 8) // 17
+
+                        # 0aaarrrrggggbbbb
+                        rgba = (a << 12) | (r << 8) | (g << 4) | b
+
+                    else:  # RGB555
+                        r = ((r + 4) << 2) // 33
+                        g = ((g + 4) << 2) // 33
+                        b = ((b + 4) << 2) // 33
+
+                        # 1rrrrrgggggbbbbb
+                        rgba = 0x8000 | (r << 10) | (g << 5) | b
+
+                    shorts.append(rgba)
+
+    return struct.pack('>{0}H'.format(len(shorts)), *shorts)
+
+
+def randomPixels(rnd: random.Random, count: int, alphas) -> bytes:
+    """Random little-endian ARGB32 (BGRA) pixels with alphas picked from alphas"""
+    data = bytearray()
+    for _ in range(count):
+        data += bytes((rnd.randrange(256), rnd.randrange(256), rnd.randrange(256), rnd.choice(alphas)))
+
+    return bytes(data)
+
+
+class EncodeRGB4A3Test(unittest.TestCase):
+    # Framesheets are 32 wide; the other sizes cover both ways
+    # linearToBlocks() reorders the blocks
+    SIZES = [(32, 64), (64, 32), (128, 64), (4, 4)]
+
+    def check(self, alphas, seed):
+        rnd = random.Random(seed)
+        for width, height in self.SIZES:
+            data = randomPixels(rnd, width * height, alphas)
+            with self.subTest(width=width, height=height):
+                self.assertEqual(texture.encodeRGB4A3(data, width, height), referenceEncodeRGB4A3(data, width, height))
+
+    def testOpaque(self):
+        self.check([255], 1)
+
+    def testTransparent(self):
+        self.check([0], 2)
+
+    def testPartialAlpha(self):
+        self.check(range(1, 255), 3)
+
+    def testMixed(self):
+        # Includes the alphas either side of the RGB4A3/RGB555 switch
+        self.check([0, 1, 18, 19, 128, 237, 238, 254, 255], 4)
+
+    def testRepeatedColors(self):
+        # A few distinct colors, so the quantizer's cache is hit a lot
+        rnd = random.Random(5)
+        colors = [randomPixels(rnd, 1, [0, 100, 255]) for _ in range(6)]
+        data = b''.join(rnd.choice(colors) for _ in range(32 * 64))
+        self.assertEqual(texture.encodeRGB4A3(data, 32, 64), referenceEncodeRGB4A3(data, 32, 64))
+
+    def testWrongSize(self):
+        with self.assertRaises(ValueError):
+            texture.encodeRGB4A3(bytes(4 * 15), 4, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
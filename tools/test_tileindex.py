@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# test_tileindex.py
+# Tests that the tile usage index in puzzle.py stays in step with the
+# objects while they are edited. Run with: python -m unittest tools.test_tileindex
+
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtWidgets
+
+import puzzle
+
+
+def scanUsedTiles(tileset) -> set:
+    """The used tiles, found by going through every tile of every object"""
+    return {tile[1] for object in tileset.objects for row in object.tiles for tile in row
+            if tileset.slot == 0 or tile[2] & 3}
+
+
+class TileIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        puzzle.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+
+        # The frame editor's preview thread never ends (the app quits with
+        # os._exit()), and would keep the tests from exiting
+        with mock.patch.object(threading.Thread, 'start'):
+            puzzle.window = puzzle.MainWindow()
+
+    def setUp(self):
+        self.window = puzzle.window
+        self.window.newTileset()
+
+    def addRepeatXObject(self):
+        """Adds a repeat-X object with a short second row and selects it"""
+        puzzle.Tileset.addObject(2, 3, tilelist=[[(1, 5, 0), (1, 6, 0), (1, 7, 0)], [(1, 8, 0)]])
+        self.window.objmodel.refresh()
+        self.window.objectList.setCurrentIndex(self.window.objmodel.index(len(puzzle.Tileset.objects) - 1))
+        return puzzle.Tileset.objects[-1]
+
+    def assertIndexUpToDate(self):
+        tileset = puzzle.Tileset
+        self.assertEqual(set(tileset.getUsedTiles()), scanUsedTiles(tileset))
+        self.assertEqual(tileset.getFreeTiles(), [tile for tile in range(256) if tile not in scanUsedTiles(tileset)])
+
+    def testClearRepetition(self):
+        object = self.addRepeatXObject()
+        self.assertIndexUpToDate()
+
+        object.clearRepetitionXY()
+        self.assertIn(0, puzzle.Tileset.getUsedTiles())
+        self.assertIndexUpToDate()
+
+    def testClearRepetitionOutsideTileset(self):
+        # Objects that aren't in the tileset (yet) aren't indexed
+        object = puzzle.TilesetClass.Object(2, 3, [0, 0], [0, 0], [[(1, 5, 0), (1, 6, 0), (1, 7, 0)], [(1, 8, 0)]])
+        object.clearRepetitionXY()
+        self.assertNotIn(object, puzzle.Tileset.objectTileCounts)
+
+    def testSetTiling(self):
+        # Every tiling method from every other one, starting from the
+        # short row each time
+        for before in range(8):
+            for after in range(8):
+                with self.subTest(before=before, after=after):
+                    self.window.newTileset()
+                    self.addRepeatXObject()
+
+                    for method in (before, after):
+                        self.window.tileWidget.setTiling(method)
+                        self.assertIndexUpToDate()
+
+    def testSetTilingSlotted(self):
+        self.window.newTileset()
+        puzzle.Tileset.slot = 1
+        puzzle.Tileset.addObject(2, 3, tilelist=[[(1, 5, 1), (1, 6, 1), (1, 7, 1)], [(1, 8, 1)]])
+        self.window.objmodel.refresh()
+        self.window.objectList.setCurrentIndex(self.window.objmodel.index(0))
+
+        for method in range(8):
+            with self.subTest(method=method):
+                self.window.tileWidget.setTiling(method)
+                self.assertIndexUpToDate()
+
+
+if __name__ == '__main__':
+    unittest.main()
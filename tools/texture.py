@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+
+# texture.py
+# Buffer-based RGB4A3 (RGB5A3) texture decoding and encoding for tilesets
+# and framesheets.
+
+import sys
+from array import array
+
+
+RGB4A3LUT = []
+RGB4A3LUT_NoAlpha = []
+def PrepareRGB4A3LUTs():
+    global RGB4A3LUT, RGB4A3LUT_NoAlpha
+
+    RGB4A3LUT = [None] * 0x10000
+    RGB4A3LUT_NoAlpha = [None] * 0x10000
+    for LUT, hasA in [(RGB4A3LUT, True), (RGB4A3LUT_NoAlpha, False)]:
+
+        # RGB4A3
+        for d in range(0x8000):
+            if hasA:
+                alpha = d >> 12
+                alpha = alpha << 5 | alpha << 2 | alpha >> 1
+            else:
+                alpha = 0xFF
+            red = ((d >> 8) & 0xF) * 17
+            green = ((d >> 4) & 0xF) * 17
+            blue = (d & 0xF) * 17
+            LUT[d] = blue | (green << 8) | (red << 16) | (alpha << 24)
+
+        # RGB555
+        for d in range(0x8000):
+            red = d >> 10
+            red = red << 3 | red >> 2
+            green = (d >> 5) & 0x1F
+            green = green << 3 | green >> 2
+            blue = d & 0x1F
+            blue = blue << 3 | blue >> 2
+            LUT[d + 0x8000] = blue | (green << 8) | (red << 16) | 0xFF000000
+
+PrepareRGB4A3LUTs()
+
+
+def blocksToLinear(texels: array, width: int, height: int) -> array:
+    """
+    Reorders an array of pixels stored as 4x4 texel blocks (the GX
+    texture layout) into plain row-major order. The copy is done with
+    one strided slice per pixel-in-block position and block row or
+    column, whichever there are fewer of.
+    """
+    blocksX = width // 4
+    blocksY = height // 4
+    out = array(texels.typecode, bytes(texels.itemsize * width * height))
+
+    for py in range(4):
+        for px in range(4):
+            if blocksX <= blocksY:
+                # One slice per block column, running down all block rows
+                for bx in range(blocksX):
+                    start = py * width + bx * 4 + px
+                    out[start::width * 4] = texels[bx * 16 + py * 4 + px::blocksX * 16]
+            else:
+                # One slice per block row, running across all block columns
+                for by in range(blocksY):
+                    start = (by * 4 + py) * width + px
+                    src = by * blocksX * 16 + py * 4 + px
+                    out[start:start + width:4] = texels[src:src + blocksX * 16:16]
+
+    return out
+
+
+def decodeRGB4A3(data: bytes, width: int, height: int, useAlpha: bool = True) -> array:
+    """
+    Decodes big-endian RGB4A3 texel data into a preallocated array of
+    native-endian ARGB32 pixels (the memory layout of
+    QImage.Format_ARGB32), in row-major order.
+    """
+    if len(data) != width * height * 2:
+        raise ValueError(f'expected {width * height * 2:#x} bytes, got {len(data):#x}')
+
+    shorts = array('H', data)
+    if sys.byteorder == 'little':
+        shorts.byteswap()
+
+    LUT = RGB4A3LUT if useAlpha else RGB4A3LUT_NoAlpha
+    texels = array('I', map(LUT.__getitem__, shorts))
+
+    return blocksToLinear(texels, width, height)
+
+
+def linearToBlocks(pixels: array, width: int, height: int) -> array:
+    """
+    Reorders an array of row-major pixels into 4x4 texel blocks. This
+    is the inverse of blocksToLinear().
+    """
+    blocksX = width // 4
+    blocksY = height // 4
+    out = array(pixels.typecode, bytes(pixels.itemsize * width * height))
+
+    for py in range(4):
+        for px in range(4):
+            if blocksX <= blocksY:
+                for bx in range(blocksX):
+                    start = py * width + bx * 4 + px
+                    out[bx * 16 + py * 4 + px::blocksX * 16] = pixels[start::width * 4]
+            else:
+                for by in range(blocksY):
+                    start = (by * 4 + py) * width + px
+                    dest = by * blocksX * 16 + py * 4 + px
+                    out[dest:dest + blocksX * 16:16] = pixels[start:start + width:4]
+
+    return out
+
+
+class RGB4A3Quantizer(dict):
+    """
+    Maps ARGB32 pixels to RGB4A3 texels, quantizing each distinct color
+    only the first time it's looked up.
+    """
+    def __missing__(self, pixel):
+        a = pixel >> 24
+        r = (pixel >> 16) & 0xFF
+        g = (pixel >> 8) & 0xFF
+        b = pixel & 0xFF
+
+        # See encodingTests.py for verification that these
+        # channel conversion formulas are 100% correct
+
+        # Note: we can't do
+        # if a < 19:
+        #     rgba = 0
+        # for speed, because that causes an issue with
+        # texture filtering that results in graphics
+        # having faint black borders in-game
+
+        if a < 238:  # RGB4A3
+            a = ((a + 18) << 1) // 73
+            r = (r + 8) // 17
+            g = (g + 8) // 17
+            b = (b + 8) // 17
+
+            # 0aaarrrrggggbbbb
+            rgba = (a << 12) | (r << 8) | (g << 4) | b
+
+        else:  # RGB555
+            r = ((r + 4) << 2) // 33
+            g = ((g + 4) << 2) // 33
+            b = ((b + 4) << 2) // 33
+
+            # 1rrrrrgggggbbbbb
+            rgba = 0x8000 | (r << 10) | (g << 5) | b
+
+        self[pixel] = rgba
+        return rgba
+
+
+def encodeRGB4A3(data: bytes, width: int, height: int) -> bytes:
+    """
+    Encodes row-major, native-endian ARGB32 pixel data (the memory
+    layout of QImage.Format_ARGB32) into big-endian RGB4A3 texel data.
+    """
+    if len(data) != width * height * 4:
+        raise ValueError(f'expected {width * height * 4:#x} bytes, got {len(data):#x}')
+
+    texels = linearToBlocks(array('I', data), width, height)
+
+    shorts = array('H', map(RGB4A3Quantizer().__getitem__, texels))
+    if sys.byteorder == 'little':
+        shorts.byteswap()
+
+    return shorts.tobytes()
+
+
+def clampTiles(data: bytes, columns: int, rows: int = None, clampCorners: bool = True) -> bytearray:
+    """
+    Pads a run of 24x24 ARGB32 tiles, stored one after another (which is
+    also the layout of a 24-pixel-wide strip of frames), into 32x32
+    cells laid out `columns` to a row. Each cell gets a 4-pixel border
+    that repeats the outermost pixels of its tile; if clampCorners is
+    False, the 4x4 corners are left transparent.
+    """
+    count, extra = divmod(len(data), 24 * 24 * 4)
+    if extra:
+        raise ValueError(f'{len(data):#x} bytes is not a whole number of 24x24 tiles')
+    if rows is None:
+        rows = -(-count // columns)
+    if count > columns * rows:
+        raise ValueError(f'{count} tiles do not fit in {columns}x{rows} cells')
+
+    # Stack every row of every tile into one array and pad them all to
+    # 32 pixels at once, one strided slice per output column
+    tileRows = memoryview(data).cast('B').cast('I')
+    padded = bytearray(count * 24 * 32 * 4)
+    paddedRows = memoryview(padded).cast('I')
+    for x in range(32):
+        paddedRows[x::32] = tileRows[min(max(x - 4, 0), 23)::24]
+
+    # Then spread the padded rows out over the cells, repeating the
+    # first and last ones for the top/bottom clamp. This works in units
+    # of two pixels (16 per padded row), with one strided slice per unit
+    # per cell row or cell column, whichever there are fewer of.
+    out = bytearray(columns * 32 * rows * 32 * 4)
+    src = memoryview(padded).cast('Q')
+    dest = memoryview(out).cast('Q')
+    blank = memoryview(bytes(max(rows, columns) * 8)).cast('Q')
+
+    if columns <= rows:
+        # One slice per cell column, running down all cell rows
+        lines = [(c * 24 * 16, c * 16, -(-(count - c) // columns)) for c in range(min(columns, count))]
+        srcStep, destStep = columns * 24 * 16, columns * 32 * 16
+    else:
+        # One slice per cell row, running across all cell columns
+        lines = [(r * columns * 24 * 16, r * columns * 32 * 16, min(columns, count - r * columns)) for r in range(-(-count // columns))]
+        srcStep, destStep = 24 * 16, 16
+
+    for srcBase, destBase, n in lines:
+        for cy in range(32):
+            sy = min(max(cy - 4, 0), 23)
+            corner = not clampCorners and (cy < 4 or cy >= 28)
+
+            for q in range(16):
+                srcStart = srcBase + sy * 16 + q
+                destStart = destBase + cy * columns * 16 + q
+
+                if corner and (q < 2 or q >= 14):
+                    dest[destStart : destStart + n * destStep : destStep] = blank[:n]
+                else:
+                    dest[destStart : destStart + n * destStep : destStep] = src[srcStart : srcStart + n * srcStep : srcStep]
+
+    return out
+
+
+def _lanes(plane: bytes) -> int:
+    """
+    Widens a plane of one byte per pixel into a big integer with one
+    16-bit lane per pixel, pixel 0 in the lowest lane.
+    """
+    lanes = bytearray(len(plane) * 2)
+    lanes[0::2] = plane
+    return int.from_bytes(lanes, 'little')
+
+
+def _unlanes(value: int, count: int) -> array:
+    """
+    Splits a big integer built by _lanes() back into its 16-bit lanes.
+    """
+    values = array('H', value.to_bytes(count * 2, 'little'))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def fixTransparentEdges(data: bytearray, width: int, height: int, tileWidth: int = 24, tileHeight: int = 24) -> None:
+    """
+    Finds fully-transparent pixels that border non-fully-transparent
+    pixels within the same tile, and sets their RGB channels to the
+    average of those of their non-fully-transparent neighbors. This
+    solves the longstanding "black outlines around tile edges" bug.
+    "data" should be BGRA8 bytes for an image of size width x height,
+    made of tiles of size tileWidth x tileHeight; it's modified in
+    place.
+
+    Every channel of the whole image is held as one big integer with a
+    16-bit lane per pixel, so shifting it by one lane or one row of
+    lanes moves every pixel onto its neighbor at once. Lanes are masked
+    off wherever the neighbor would be in another tile. The sums of
+    eight neighbors never exceed 8 * 255, so lanes never carry into
+    each other.
+    """
+    count = width * height
+    if len(data) != count * 4:
+        raise ValueError(f'expected {count * 4:#x} bytes, got {len(data):#x}')
+    if width % tileWidth or height % tileHeight:
+        raise ValueError(f'{width}x{height} is not a whole number of {tileWidth}x{tileHeight} tiles')
+
+    alpha = bytes(data[3::4])
+    opaque = _lanes(alpha.translate(bytes([0]) + bytes([0xFF]) * 255))
+    transparent = _lanes(alpha.translate(bytes([0xFF]) + bytes(255)))
+    if not opaque or not transparent:
+        return
+
+    # Only non-transparent neighbors are counted
+    planes = [_lanes(data[c::4]) & opaque for c in range(3)]
+    ones = _lanes(alpha.translate(bytes([0]) + bytes([1]) * 255))
+
+    # Lanes whose neighbor in each direction is in the same tile
+    full = b'\xff\xff'
+    tileRows = {
+        -1: b'\0\0' + full * (tileWidth - 1),
+        0: full * tileWidth,
+        1: full * (tileWidth - 1) + b'\0\0',
+        }
+    xMasks = {dx: int.from_bytes(row * (width // tileWidth) * height, 'little') for dx, row in tileRows.items()}
+
+    yMasks = {}
+    for dy in (-1, 0, 1):
+        rows = [full * width] * tileHeight
+        if dy < 0: rows[0] = bytes(width * 2)
+        if dy > 0: rows[-1] = bytes(width * 2)
+        yMasks[dy] = int.from_bytes(b''.join(rows) * (height // tileHeight), 'little')
+
+    sums = [0, 0, 0]
+    neighbors = 0
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if not dx and not dy:
+                continue
+            mask = xMasks[dx] & yMasks[dy]
+
+            # Shifting right pulls in the neighbor further along the image
+            shift = (dy * width + dx) * 16
+            if shift > 0:
+                neighbors += (ones >> shift) & mask
+                for c in range(3):
+                    sums[c] += (planes[c] >> shift) & mask
+            else:
+                neighbors += (ones << -shift) & mask
+                for c in range(3):
+                    sums[c] += (planes[c] << -shift) & mask
+
+    neighbors &= transparent
+    if not neighbors:
+        return
+
+    neighbors = _unlanes(neighbors, count)
+    sums = [_unlanes(s, count) for s in sums]
+    for i in [i for i, n in enumerate(neighbors) if n]:
+        n = neighbors[i]
+        data[i * 4] = sums[0][i] // n
+        data[i * 4 + 1] = sums[1][i] // n
+        data[i * 4 + 2] = sums[2][i] // n
@@ -0,0 +1,779 @@
+#!/usr/bin/env python3
+
+# tileset.py
+# Qt-free tileset model and codec. Reads and writes tileset arcs, with
+# tile images kept as plain ARGB32 buffers, so that batch tools don't
+# need a QApplication or a display.
+
+import struct
+from array import array
+
+import archive
+import lz77
+from tools import texture
+
+try:
+    import nsmblib
+    HaveNSMBLib = True
+except ImportError:
+    HaveNSMBLib = False
+
+TILE_COUNT = 256
+TILE_SIZE = 24 * 24 * 4
+TEXTURE_WIDTH = 1024
+TEXTURE_HEIGHT = 256
+
+BEHAVIOUR_SIZE = 8
+BEHAVIOURS_SIZE = TILE_COUNT * BEHAVIOUR_SIZE
+OBJECTMETA_STRUCT = struct.Struct('>H2B')
+
+
+class Object:
+    """
+    An object's layout: its size, its slopes, and rows of
+    (repetition/slope flags, tile number, slot) tuples.
+    """
+    def __init__(self, height: int, width: int, upperslope: list, lowerslope: list, tiles: list):
+        self.height = height
+        self.width = width
+        self.upperslope = upperslope
+        self.lowerslope = lowerslope
+        self.tiles = tiles
+
+
+def byteTable(function) -> bytes:
+    """
+    Returns a bytes.translate() table that maps every byte through
+    function.
+    """
+    return bytes(function(byte) & 0xFF for byte in range(256))
+
+
+class TileGrid:
+    """
+    An object's tiles, stored as three flat array('B') planes of
+    repetition/slope flags, tile numbers and slot/item bytes, with
+    `stride` cells per row. Rows can be shorter than the stride (and
+    than each other); the cells past the end of a row are kept zero.
+
+    For code that works with rows of (flags, tile, slot) tuples, the
+    grid can be indexed, iterated, appended to and popped from like a
+    list of rows; grid[y] is a TileRow view of row y.
+    """
+    __slots__ = ('flags', 'numbers', 'slots', 'lengths', 'stride')
+
+    def __init__(self, rows=()):
+        rows = list(rows)
+        self.stride = max((len(row) for row in rows), default=0)
+        self.lengths = array('H', (len(row) for row in rows))
+
+        size = self.stride * len(rows)
+        self.flags = array('B', bytes(size))
+        self.numbers = array('B', bytes(size))
+        self.slots = array('B', bytes(size))
+
+        for y, row in enumerate(rows):
+            start = y * self.stride
+            end = start + len(row)
+            self.flags[start:end] = array('B', [tile[0] for tile in row])
+            self.numbers[start:end] = array('B', [tile[1] for tile in row])
+            self.slots[start:end] = array('B', [tile[2] for tile in row])
+
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+
+    def __getitem__(self, y):
+        if isinstance(y, slice):
+            return [TileRow(self, row) for row in range(*y.indices(len(self)))]
+
+        if y < 0:
+            y += len(self)
+        if not 0 <= y < len(self):
+            raise IndexError('row index out of range')
+
+        return TileRow(self, y)
+
+
+    def __iter__(self):
+        for y in range(len(self)):
+            yield TileRow(self, y)
+
+
+    def rowRange(self, y: int) -> tuple:
+        start = y * self.stride
+        return start, start + self.lengths[y]
+
+
+    def restride(self, stride: int):
+        """
+        Changes the number of cells reserved per row.
+        """
+        old = self.stride
+        planes = []
+        for plane in (self.flags, self.numbers, self.slots):
+            new = array('B', bytes(stride * len(self)))
+            for y, length in enumerate(self.lengths):
+                new[y * stride : y * stride + length] = plane[y * old : y * old + length]
+            planes.append(new)
+
+        self.flags, self.numbers, self.slots = planes
+        self.stride = stride
+
+
+    def append(self, row):
+        row = list(row)
+        if len(row) > self.stride:
+            self.restride(len(row))
+
+        padding = bytes(self.stride - len(row))
+        self.flags.extend(array('B', [tile[0] for tile in row]) + array('B', padding))
+        self.numbers.extend(array('B', [tile[1] for tile in row]) + array('B', padding))
+        self.slots.extend(array('B', [tile[2] for tile in row]) + array('B', padding))
+        self.lengths.append(len(row))
+
+
+    def pop(self, y: int = -1) -> list:
+        row = list(self[y])
+        y = y % len(self)
+
+        start = y * self.stride
+        for plane in (self.flags, self.numbers, self.slots):
+            del plane[start : start + self.stride]
+        del self.lengths[y]
+
+        return row
+
+
+    def resize(self, width: int, height: int):
+        """
+        Makes the grid exactly width x height, cutting off tiles or
+        padding it with blank ones.
+        """
+        del self.lengths[height:]
+        for plane in (self.flags, self.numbers, self.slots):
+            del plane[height * self.stride:]
+
+        if width > self.stride:
+            self.restride(width)
+
+        blank = array('B', bytes(self.stride - width))
+        for y, length in enumerate(self.lengths):
+            if length > width:
+                start = y * self.stride + width
+                end = (y + 1) * self.stride
+                self.flags[start:end] = self.numbers[start:end] = self.slots[start:end] = blank
+
+        self.lengths = array('H', [width]) * len(self.lengths)
+
+        missing = max(height - len(self), 0)
+        blank = array('B', bytes(self.stride * missing))
+        for plane in (self.flags, self.numbers, self.slots):
+            plane.extend(blank)
+        self.lengths.extend([width] * missing)
+
+
+    def mapFlags(self, table: bytes, y1: int = 0, y2: int = None, x1: int = 0, x2: int = None):
+        """
+        Maps the flags of the tiles in rows y1 to y2 and columns x1 to
+        x2 through a byteTable().
+        """
+        if y2 is None:
+            y2 = len(self)
+        if y2 > len(self):
+            raise IndexError('row index out of range')
+
+        for y in range(y1, y2):
+            start, end = self.rowRange(y)
+            rowEnd = end if x2 is None else min(end, start + x2)
+            rowStart = min(start + x1, rowEnd)
+
+            flags = self.flags[rowStart:rowEnd]
+            self.flags[rowStart:rowEnd] = array('B', flags.tobytes().translate(table))
+
+
+    def remapSlots(self, slot: int):
+        """
+        Moves every tile to the given slot, keeping the item bits,
+        except for Pa0 tile 0, which stays blank.
+        """
+        slots = self.slots.tobytes()
+        numbers = self.numbers.tobytes()
+
+        remapped = bytearray(slots.translate(byteTable(lambda byte: (byte & 0xFC) | slot)))
+
+        # Blank tiles, including the padding at the ends of rows
+        offset = numbers.find(0)
+        while offset != -1:
+            if not slots[offset] & 3:
+                remapped[offset] = slots[offset]
+            offset = numbers.find(0, offset + 1)
+
+        self.slots = array('B', remapped)
+
+
+    def toList(self) -> list:
+        return [list(row) for row in self]
+
+
+class TileRow:
+    """
+    A view of one row of a TileGrid, which reads and writes (flags,
+    tile, slot) tuples like the list of tuples it replaces.
+    """
+    __slots__ = ('grid', 'y')
+
+    def __init__(self, grid: TileGrid, y: int):
+        self.grid = grid
+        self.y = y
+
+
+    def __len__(self) -> int:
+        return self.grid.lengths[self.y]
+
+
+    def cell(self, x: int) -> int:
+        length = len(self)
+        if x < 0:
+            x += length
+        if not 0 <= x < length:
+            raise IndexError('tile index out of range')
+
+        return self.y * self.grid.stride + x
+
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            return list(self)[x]
+
+        grid, cell = self.grid, self.cell(x)
+        return (grid.flags[cell], grid.numbers[cell], grid.slots[cell])
+
+
+    def __setitem__(self, x: int, tile):
+        grid, cell = self.grid, self.cell(x)
+        grid.flags[cell], grid.numbers[cell], grid.slots[cell] = tile
+
+
+    def __iter__(self):
+        start, end = self.grid.rowRange(self.y)
+        return zip(self.grid.flags[start:end], self.grid.numbers[start:end], self.grid.slots[start:end])
+
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+
+    def append(self, tile):
+        grid = self.grid
+        length = len(self)
+        if length == grid.stride:
+            grid.restride(length + 1)
+
+        grid.lengths[self.y] = length + 1
+        self[length] = tile
+
+
+    def pop(self, x: int = -1) -> tuple:
+        grid = self.grid
+        tile = self[x]
+
+        start, end = grid.rowRange(self.y)
+        cell = self.cell(x)
+        for plane in (grid.flags, grid.numbers, grid.slots):
+            plane[cell : end - 1] = plane[cell + 1 : end]
+            plane[end - 1] = 0
+
+        grid.lengths[self.y] -= 1
+        return tile
+
+
+class Tileset:
+    """
+    Everything in a tileset arc. Tiles are 24x24 ARGB32 buffers and
+    behaviours are a bytearray of 8 bytes per tile; the other files are
+    kept as they were read.
+    """
+    def __init__(self):
+        self.tiles = [bytes(TILE_SIZE)] * TILE_COUNT
+        self.behaviours = bytearray(BEHAVIOURS_SIZE)
+        self.objects = []
+        self.animdata = {}
+        self.animTilesBin = 0
+        self.randTilesBin = 0
+        self.plantOverrides = None
+        self.profileOverrides = None
+        self.unknownFiles = {}
+        self.slot = 0
+
+
+def readArc(data: bytes) -> dict:
+    """
+    Unpacks a tileset arc and sorts out its files. The texture, tile
+    behaviours and object files are None if they're missing.
+    """
+    arc = archive.U8()
+    arc._load(data)
+
+    files = {
+        'image': None,
+        'behaviourdata': None,
+        'objstrings': None,
+        'metadata': None,
+        'animdata': {},
+        'animTilesBin': 0,
+        'randTilesBin': 0,
+        'plantOverrides': None,
+        'profileOverrides': None,
+        'unknownFiles': {},
+        }
+
+    for key, value in arc.files:
+        if value is None:
+            continue
+        elif key.startswith('BG_tex/') and key.endswith('_tex.bin.LZ'):
+            files['image'] = value
+        elif key.startswith('BG_tex/') and key.endswith('.bin'):
+            files['animdata'][key] = value
+        elif key.startswith('BG_chk/d_bgchk_') and key.endswith('.bin'):
+            files['behaviourdata'] = value
+        elif key.startswith('BG_unt/') and key.endswith('_hd.bin'):
+            files['metadata'] = value
+        elif key.startswith('BG_unt/') and key.endswith('.bin'):
+            files['objstrings'] = value
+        elif key == 'BG_new/AnimTiles.bin':
+            files['animTilesBin'] = value
+        elif key == 'BG_new/RandTiles.bin':
+            files['randTilesBin'] = value
+        elif key == 'BG_ext/PlantTiles.bin':
+            print('Loading PlantTiles.bin')
+            files['plantOverrides'] = value
+        elif key == 'BG_ext/ProfileTiles.bin':
+            print('Loading ProfileTiles.bin')
+            files['profileOverrides'] = value
+        else:
+            files['unknownFiles'][key] = value
+            print(f"Unknown File: {key}")
+
+    return files
+
+
+def decompressTexture(data: bytes, useNSMBLib: bool = None, progress=None) -> bytes:
+    """
+    LZ11-decompresses the texture. progress(done, total) is passed on
+    to the pure-Python decompressor.
+    """
+    if useNSMBLib is None:
+        useNSMBLib = HaveNSMBLib
+
+    if useNSMBLib:
+        return nsmblib.decompress11LZS(data)
+    return lz77.LZS11().Decompress11LZS(data, progress)
+
+
+def decodeTexture(data: bytes, useAlpha: bool = True, useNSMBLib: bool = None):
+    """
+    Decodes the decompressed texture into an ARGB32 buffer.
+    """
+    if useNSMBLib is None:
+        useNSMBLib = HaveNSMBLib
+
+    decoder = 'decodeTilesetNoPremultiplication' if useAlpha else 'decodeTilesetNoPremultiplicationNoAlpha'
+    if useNSMBLib and hasattr(nsmblib, decoder):
+        return getattr(nsmblib, decoder)(data)
+    return memoryview(texture.decodeRGB4A3(data, TEXTURE_WIDTH, TEXTURE_HEIGHT, useAlpha)).cast('B')
+
+
+def splitTiles(data) -> list:
+    """
+    Cuts the 24x24 tiles out of the 32x32 cells of a decoded texture.
+    """
+    data = memoryview(data).cast('B')
+    stride = TEXTURE_WIDTH * 4
+
+    tiles = []
+    for i in range(TILE_COUNT):
+        row, col = divmod(i, TEXTURE_WIDTH // 32)
+        offs = (row * 32 + 4) * stride + (col * 32 + 4) * 4
+        tiles.append(b''.join(data[offs + y * stride : offs + y * stride + (24 * 4)] for y in range(24)))
+
+    return tiles
+
+
+def joinTiles(tiles: list, columns: int = 16) -> bytearray:
+    """
+    Lays 24x24 tiles out in a grid, `columns` to a row, as one ARGB32
+    buffer; this is the layout of an exported tileset image.
+    """
+    rows = -(-len(tiles) // columns)
+    stride = columns * 24 * 4
+    out = bytearray(stride * rows * 24)
+
+    for i, tile in enumerate(tiles):
+        row, col = divmod(i, columns)
+        offs = row * 24 * stride + col * 24 * 4
+        for y in range(24):
+            out[offs + y * stride : offs + y * stride + (24 * 4)] = tile[y * (24 * 4) : (y + 1) * (24 * 4)]
+
+    return out
+
+
+def splitSheet(data, columns: int = 16) -> list:
+    """
+    Cuts a grid of 24x24 tiles, laid out like joinTiles() does, back
+    into separate tiles.
+    """
+    data = memoryview(data).cast('B')
+    stride = columns * 24 * 4
+    count = len(data) // (stride * 24) * columns
+
+    tiles = []
+    for i in range(count):
+        row, col = divmod(i, columns)
+        offs = row * 24 * stride + col * 24 * 4
+        tiles.append(b''.join(data[offs + y * stride : offs + y * stride + (24 * 4)] for y in range(24)))
+
+    return tiles
+
+
+# Maps alpha 0 to 0x00 and everything else to 0xFF
+_VISIBLE = bytes([0]) + bytes([0xFF]) * 255
+
+
+def exportImage(tiles: list) -> bytes:
+    """
+    Returns the 384x384 ARGB32 image of the tiles that gets exported to
+    PNG. Fully transparent pixels come out as 0, the same as painting
+    the tiles onto a transparent image.
+    """
+    data = joinTiles(tiles)
+
+    mask = bytearray(len(data))
+    visible = data[3::4].translate(_VISIBLE)
+    for i in range(4):
+        mask[i::4] = visible
+
+    return (int.from_bytes(data, 'little') & int.from_bytes(mask, 'little')).to_bytes(len(data), 'little')
+
+
+def unpackBehaviours(data: bytes) -> bytearray:
+    if len(data) < BEHAVIOURS_SIZE:
+        raise struct.error('the behaviours need {0} bytes, not {1}'.format(BEHAVIOURS_SIZE, len(data)))
+
+    return bytearray(data[:BEHAVIOURS_SIZE])
+
+
+def packBehaviours(behaviours) -> bytes:
+    return bytes(behaviours)
+
+
+def parseLayout(objstrings, offset: int = 0, slots: dict = None) -> tuple:
+    """
+    Parses one object layout, starting at offset in the object strings,
+    in a single pass. Returns (tiles, upperslope, lowerslope), with the
+    tiles as rows of (repetition/slope flags, tile number, slot) tuples.
+
+    If a dict is given as slots, it counts how often each slot is used
+    by the tiles, in order of first use (see detectSlot()).
+    """
+    view = memoryview(objstrings).cast('B')
+
+    rows = [[]]
+    row = rows[0]
+    upperslope = [0, 0]
+    lowerslope = [0, 0]
+
+    byte = view[offset]
+    while byte != 0xFF:
+
+        if byte == 0xFE:
+            row = []
+            rows.append(row)
+
+            if lowerslope[0] != 0:
+                lowerslope[1] += 1
+            elif upperslope[0] != 0:
+                upperslope[1] += 1
+
+            offset += 1
+
+        elif byte & 0x80:
+
+            if upperslope[0] == 0:
+                upperslope[0] = byte
+            else:
+                lowerslope[0] = byte
+
+            offset += 1
+
+        else:
+            tile = (byte, view[offset + 1], view[offset + 2])
+            row.append(tile)
+
+            if slots is not None and (tile[1] or tile[2] & 3):
+                slot = tile[2] & 3
+                slots[slot] = slots.get(slot, 0) + 1
+
+            offset += 3
+
+        byte = view[offset]
+
+    rows.pop()
+
+    # Reverse slopes are stored with the lower part first
+    if upperslope[0] & 0x2 and rows:
+        split = lowerslope[1] % len(rows)
+        if split:
+            rows = rows[-split:] + rows[:-split]
+
+    return rows, upperslope, lowerslope
+
+
+def unpackObjects(objstrings: bytes, metadata: bytes, slots: dict = None) -> list:
+    """
+    Parses the object layouts in BG_unt. If a dict is given as slots,
+    the slot histogram is counted along the way, like parseLayout().
+    """
+    view = memoryview(objstrings).cast('B')
+
+    objects = []
+    for offset, width, height in OBJECTMETA_STRUCT.iter_unpack(metadata[:len(metadata) // 4 * 4]):
+        tiles, upperslope, lowerslope = parseLayout(view, offset, slots)
+        objects.append(Object(height, width, upperslope, lowerslope, tiles))
+
+    return objects
+
+
+def packLayout(object) -> bytes:
+    """
+    Packs one object's layout, the inverse of parseLayout(). The tiles
+    can be rows of tuples or a TileGrid.
+    """
+    upperslope, lowerslope = object.upperslope, object.lowerslope
+    tiles = object.tiles
+
+    if isinstance(tiles, TileGrid):
+        # Interleave the whole grid at once, then copy out the rows
+        interleaved = bytearray(3 * len(tiles.flags))
+        interleaved[0::3] = tiles.flags
+        interleaved[1::3] = tiles.numbers
+        interleaved[2::3] = tiles.slots
+
+        out = bytearray()
+        extend, append = out.extend, out.append
+        lengths, stride = tiles.lengths, tiles.stride
+
+        def addRows(rows):
+            for row in rows:
+                start = 3 * row * stride
+                extend(interleaved[start : start + 3 * lengths[row]])
+                append(0xFE)
+
+    else:
+        out = []
+        extend, append = out.extend, out.append
+
+        def addRows(rows):
+            for row in rows:
+                for tile in tiles[row]:
+                    extend(tile)
+                append(0xFE)
+
+    # Not slopes!
+    if upperslope[0] == 0:
+        addRows(range(len(tiles)))
+
+    # Reverse Slopes: the lower part is stored first
+    elif upperslope[0] & 0x2:
+        append(upperslope[0])
+        addRows(range(lowerslope[1], object.height))
+
+        if object.height > 1 and lowerslope[1]:
+            append(lowerslope[0])
+            addRows(range(0, lowerslope[1]))
+
+    # Regular Slopes
+    else:
+        if upperslope[1] > len(tiles):
+            print('WARNING: Object slope has {0} rows, but the object only has {1}.'.format(upperslope[1], len(tiles)))
+
+        append(upperslope[0])
+        addRows(range(min(upperslope[1], len(tiles))))
+
+        if object.height > 1 and lowerslope[1]:
+            append(lowerslope[0])
+            addRows(range(upperslope[1], object.height))
+
+    append(0xFF)
+    return bytes(out)
+
+
+def packObjects(objects, dedupe: bool = False) -> tuple:
+    """
+    Packs object layouts into the BG_unt object and metadata files.
+    Anything with height, width, upperslope, lowerslope and tiles
+    attributes can be packed.
+
+    With dedupe, objects with byte-identical layouts share one copy of
+    it in the object file.
+    """
+    layouts = [packLayout(object) for object in objects]
+
+    offsets = []
+    stored = {}
+    size = 0
+    for layout in layouts:
+        if dedupe and layout in stored:
+            offsets.append(stored[layout])
+            continue
+
+        stored.setdefault(layout, size)
+        offsets.append(size)
+        size += len(layout)
+
+    Objbuffer = bytearray(size)
+    Metabuffer = bytearray(OBJECTMETA_STRUCT.size * len(objects))
+
+    for i, (object, layout, offset) in enumerate(zip(objects, layouts, offsets)):
+        Objbuffer[offset : offset + len(layout)] = layout
+        OBJECTMETA_STRUCT.pack_into(Metabuffer, i * OBJECTMETA_STRUCT.size, offset, object.width, object.height)
+
+    return (bytes(Objbuffer), bytes(Metabuffer))
+
+
+def detectSlot(objects, slots: dict = None) -> int:
+    """
+    Guesses the tileset slot from the slot bits the objects use most.
+    The slot histogram counted by unpackObjects() can be passed in to
+    skip walking the objects again.
+    """
+    if not objects:
+        return 1
+
+    if slots is None:
+        slots = {}
+        for object in objects:
+            for row in object.tiles:
+                for tile in row:
+                    if tile[1] or tile[2] & 3:
+                        slot = tile[2] & 3
+                        slots[slot] = slots.get(slot, 0) + 1
+
+    if not slots:
+        return 0
+
+    # Ties go to the slot that was used first
+    return max(slots, key=slots.get)
+
+
+def encodeTexture(tiles: bytes) -> bytes:
+    """
+    Clamps and encodes the texture from 256 24x24 ARGB32 tiles stored
+    one after another.
+    """
+    return texture.encodeRGB4A3(texture.clampTiles(tiles, 32, 8), TEXTURE_WIDTH, TEXTURE_HEIGHT)
+
+
+def compressTexture(data: bytes, useNSMBLib: bool = None, progress=None) -> bytes:
+    """
+    LZ11-compresses the encoded texture. progress(done, total) is
+    passed on to the pure-Python compressor.
+    """
+    if useNSMBLib is None:
+        useNSMBLib = HaveNSMBLib and hasattr(nsmblib, 'compress11LZS')
+
+    if useNSMBLib:
+        return nsmblib.compress11LZS(data)
+    return bytes(lz77.LZS11().Compress11LZS(data, progress))
+
+
+def arcFiles(name: str, tileset, textureData: bytes = None, dedupeObjects: bool = False) -> dict:
+    """
+    Returns the files of the arc for a tileset (the headless Tileset
+    above, or anything with the same attributes), other than the
+    texture unless it's given already packed. dedupeObjects is passed
+    on to packObjects().
+    """
+    files = {}
+    if textureData is not None:
+        files['BG_tex'] = None
+        files['BG_tex/{0}_tex.bin.LZ'.format(name)] = textureData
+
+    files['BG_chk'] = None
+    files['BG_chk/d_bgchk_{0}.bin'.format(name)] = packBehaviours(tileset.behaviours)
+
+    objectBuffer, objectMetaBuffer = packObjects(tileset.objects, dedupeObjects)
+    files['BG_unt'] = None
+    files['BG_unt/{0}.bin'.format(name)] = objectBuffer
+    files['BG_unt/{0}_hd.bin'.format(name)] = objectMetaBuffer
+
+    files.update(sorted(tileset.animdata.items()))
+
+    if tileset.animTilesBin or tileset.randTilesBin:
+        files['BG_new'] = None
+        if tileset.animTilesBin:
+            files['BG_new/AnimTiles.bin'] = tileset.animTilesBin
+        if tileset.randTilesBin:
+            files['BG_new/RandTiles.bin'] = tileset.randTilesBin
+
+    if tileset.plantOverrides is not None:
+        print('Saving PlantTiles.bin')
+        files['BG_ext'] = None
+        files['BG_ext/PlantTiles.bin'] = tileset.plantOverrides
+
+    if tileset.profileOverrides is not None:
+        print('Saving ProfileTiles.bin')
+        files['BG_ext'] = None
+        files['BG_ext/ProfileTiles.bin'] = tileset.profileOverrides
+
+    for key, file in tileset.unknownFiles.items():
+        files[key.split("/")[0]] = None
+        files[key] = file
+
+    return files
+
+
+def packArc(files: dict) -> bytes:
+    """
+    Builds the arc from the files returned by arcFiles().
+    """
+    # NOTE: adding the files/folders to the U8 object in
+    # alphabetical order is a simple workaround for a wii.py... bug?
+    # unintuitive quirk? Whatever. Fixes one of the issues listed
+    # in GitHub issue #3 (in the RoadrunnerWMC/Puzzle-Updated repo)
+
+    arc = archive.U8()
+    for name in sorted(files):
+        arc[name] = files[name]
+    return arc._dump()
+
+
+def load(data: bytes, useNSMBLib: bool = None) -> Tileset:
+    """
+    Loads a tileset from the contents of an arc file. Raises ValueError
+    if it isn't a valid tileset.
+    """
+    files = readArc(data)
+    if None in (files['image'], files['behaviourdata'], files['objstrings'], files['metadata']):
+        raise ValueError('the necessary files were not found')
+
+    tileset = Tileset()
+    tileset.tiles = splitTiles(decodeTexture(decompressTexture(files['image'], useNSMBLib), True, useNSMBLib))
+    tileset.behaviours = unpackBehaviours(files['behaviourdata'])
+    slots = {}
+    tileset.objects = unpackObjects(files['objstrings'], files['metadata'], slots)
+    tileset.slot = detectSlot(tileset.objects, slots)
+
+    for key in ('animdata', 'animTilesBin', 'randTilesBin', 'plantOverrides', 'profileOverrides', 'unknownFiles'):
+        setattr(tileset, key, files[key])
+
+    return tileset
+
+
+def save(tileset: Tileset, name: str, useNSMBLib: bool = None, dedupeObjects: bool = False) -> bytes:
+    """
+    Packs a tileset into the contents of an arc file named `name`.arc.
+    """
+    textureData = compressTexture(encodeTexture(b''.join(tileset.tiles)), useNSMBLib)
+    return packArc(arcFiles(name, tileset, textureData, dedupeObjects))